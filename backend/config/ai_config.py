@@ -3,7 +3,10 @@ AI模型统一配置
 管理所有AI服务的配置参数
 """
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import List, Optional
+import copy
+import json
+import logging
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -12,6 +15,11 @@ from dotenv import load_dotenv
 PROJECT_ROOT = Path(__file__).parent.parent.parent
 load_dotenv(dotenv_path=PROJECT_ROOT / ".env")
 
+logger = logging.getLogger(__name__)
+
+# 自动调优档案（scripts/bench_asr_autotune.py 生成）可覆盖的字段
+PROFILE_FIELDS = ("compute_type", "cpu_threads", "num_workers", "concurrency")
+
 
 @dataclass
 class WhisperConfig:
@@ -54,6 +62,36 @@ class ASRConfig:
     compute_type: str = "int8"
     max_input_seconds: int = 60
     batch_size: int = 1
+    # 推理线程数：Whisper 为 CTranslate2 线程数，FunASR / Qwen3 为 torch 线程数（0 = 自动）
+    cpu_threads: int = 0
+    # Whisper 模型可同时执行的转录数（CTranslate2 num_workers），并发转录时与 concurrency 一致才能真正并行
+    num_workers: int = 1
+    # 同时进行的转录数（共享同一份模型）
+    concurrency: int = 1
+    # 长音频并行转录（仅 whisper）：时长超过该值（秒）时在静音处切窗、多进程并行解码，0 关闭
+    parallel_min_duration: float = 1800.0
+    # 并行转录进程数（0 = CPU 核数 / parallel_cpu_threads）及每个进程的推理线程数
+    parallel_workers: int = 0
+    parallel_cpu_threads: int = 4
+    # 每个窗口的目标长度与相邻窗口的重叠（秒）
+    parallel_window_seconds: float = 300.0
+    parallel_overlap_seconds: float = 2.0
+    # 跨任务批量推理引擎：并发任务的 VAD 片段攒成微批一起推理（共用一份模型）
+    batch_engine: bool = False
+    engine_max_batch: int = 8
+    engine_max_wait_ms: int = 50
+    # 独立 ASR 工作进程数（0 = 在 API 进程的线程中转录）；每个进程各加载一份模型
+    worker_processes: int = 0
+    # 等待工作进程处理的任务队列上限，满时新的转录请求等待（背压）
+    worker_queue_size: int = 16
+    # 除默认模型外允许按请求选择的模型（同一 provider），如 ["tiny", "large-v3"]
+    models: List[str] = field(default_factory=list)
+    # 启动时在后台预加载默认模型与 models 中的模型
+    preload_models: bool = False
+    # 常驻内存的 ASR 模型总预算（MB），超出时按最近最少使用卸载空闲模型；0 不限制
+    model_memory_mb: int = 0
+    # 已生效的自动调优档案路径（未使用档案时为 None）
+    profile: Optional[str] = None
     whisper: WhisperConfig = field(default_factory=WhisperConfig)
     
     def __post_init__(self):
@@ -95,6 +133,34 @@ class ASRConfig:
             except ValueError:
                 pass
         
+        for attr, env_name, cast in (
+            ("cpu_threads", "ASR_CPU_THREADS", int),
+            ("num_workers", "ASR_NUM_WORKERS", int),
+            ("concurrency", "ASR_CONCURRENCY", int),
+            ("parallel_min_duration", "ASR_PARALLEL_MIN_DURATION", float),
+            ("parallel_workers", "ASR_PARALLEL_WORKERS", int),
+            ("parallel_cpu_threads", "ASR_PARALLEL_CPU_THREADS", int),
+            ("parallel_window_seconds", "ASR_PARALLEL_WINDOW_SECONDS", float),
+            ("parallel_overlap_seconds", "ASR_PARALLEL_OVERLAP_SECONDS", float),
+            ("engine_max_batch", "ASR_ENGINE_MAX_BATCH", int),
+            ("engine_max_wait_ms", "ASR_ENGINE_MAX_WAIT_MS", int),
+            ("worker_processes", "ASR_WORKER_PROCESSES", int),
+            ("worker_queue_size", "ASR_WORKER_QUEUE_SIZE", int),
+            ("model_memory_mb", "ASR_MODEL_MEMORY_MB", int),
+        ):
+            env_value = os.getenv(env_name)
+            if env_value:
+                try:
+                    setattr(self, attr, cast(env_value))
+                except ValueError:
+                    pass
+        
+        self.batch_engine = os.getenv("ASR_BATCH_ENGINE", "false").lower() == "true"
+        self.preload_models = os.getenv("ASR_PRELOAD_MODELS", "false").lower() == "true"
+        env_models = os.getenv("ASR_MODELS")
+        if env_models:
+            self.models = [m.strip() for m in env_models.split(",") if m.strip()]
+        
         if self.provider == "whisper":
             env_whisper_model = os.getenv("WHISPER_MODEL_SIZE")
             if env_whisper_model:
@@ -110,11 +176,64 @@ class ASRConfig:
             else:
                 self.model = "base"
         
+        self._apply_profile()
+        
         if self.provider == "whisper":
             self.whisper.model_size = self.model
             self.whisper.device = self.device
             self.whisper.compute_type = self.compute_type
 
+    def _apply_profile(self) -> None:
+        """
+        加载自动调优档案（ASR_PROFILE，默认项目根目录 asr_profile.json）
+
+        档案按 "provider:model" 记录该主机上测得的最佳参数；与当前 provider / model / device
+        匹配时覆盖 PROFILE_FIELDS 中的字段（包括 .env 中的值）。ASR_PROFILE=off 停用。
+        """
+        env_profile = os.getenv("ASR_PROFILE", "asr_profile.json").strip()
+        if not env_profile or env_profile.lower() in {"off", "none", "false"}:
+            return
+        path = Path(env_profile)
+        if not path.is_absolute():
+            path = PROJECT_ROOT / path
+        if not path.exists():
+            return
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"ASR调优档案读取失败，已忽略: {path}: {e}")
+            return
+        tuned = data.get("profiles", {}).get(f"{self.provider}:{self.model}")
+        if not tuned or tuned.get("device", self.device) != self.device:
+            return
+        for attr in PROFILE_FIELDS:
+            if attr in tuned:
+                try:
+                    setattr(self, attr, type(getattr(self, attr))(tuned[attr]))
+                except (TypeError, ValueError):
+                    pass
+        self.profile = str(path)
+
+    @property
+    def available_models(self) -> List[str]:
+        """可按请求选择的模型：默认模型 + ASR_MODELS"""
+        return [self.model] + [m for m in self.models if m != self.model]
+
+    def with_model(self, model: Optional[str]) -> "ASRConfig":
+        """
+        按请求覆盖模型名后的配置副本（同一 provider，其余参数不变）
+
+        model_dir 只对应默认模型，覆盖后不再使用；model 为空或等于默认模型时返回自身
+        """
+        if not model or model == self.model:
+            return self
+        config = copy.copy(self)
+        config.model = model
+        config.model_dir = None
+        config.whisper = copy.copy(self.whisper)
+        config.whisper.model_size = model
+        return config
+
 
 @dataclass
 class OpenAIConfig:
@@ -23,6 +23,12 @@ class Settings:
     # 临时文件子目录
     DOWNLOADS_DIR: Path = TEMP_DIR / "downloads"
     BACKUPS_DIR: Path = TEMP_DIR / "backups"
+    # 笔记文件分片存储目录（notes/{hash前缀}/{short_id}/）
+    NOTES_DIR: Path = TEMP_DIR / "notes"
+    # 任务临时目录（scratch/{task_id}/，存放转录检查点、字幕文件等，任务结束时删除）
+    TASK_SCRATCH_DIR: Path = TEMP_DIR / "scratch"
+    # 下载音频的共享缓存目录（按视频 ID 复用，见 AUDIO_CACHE_*）
+    AUDIO_CACHE_DIR: Path = TEMP_DIR / "audio_cache"
     
     # 任务持久化文件
     TASKS_FILE: Path = TEMP_DIR / "tasks.json"
@@ -53,17 +59,66 @@ class Settings:
     
     # ========== SSE配置 ==========
     SSE_HEARTBEAT_INTERVAL: float = 0.5
-    SSE_CLEANUP_INTERVAL: int = 300
-    SSE_STALE_THRESHOLD: int = 7200
+    # 每个 SSE 订阅者最多缓冲的进度帧数，浏览器读取过慢时丢弃最旧的进度帧（终态帧总会送达）
+    SSE_SUBSCRIBER_BUFFER: int = int(os.getenv("SSE_SUBSCRIBER_BUFFER", "8"))
+    # 每个任务保留最近多少帧用于断线重连（Last-Event-ID）补发
+    SSE_REPLAY_EVENTS: int = int(os.getenv("SSE_REPLAY_EVENTS", "64"))
     
     # ========== 任务配置 ==========
     TASK_BACKUP_COUNT: int = 3
+    # 任务日志（tasks.journal）累计多少条记录 / 多少字节后压缩为 tasks.json 快照
+    TASK_JOURNAL_COMPACT_RECORDS: int = int(os.getenv("TASK_JOURNAL_COMPACT_RECORDS", "500"))
+    TASK_JOURNAL_COMPACT_BYTES: int = int(os.getenv("TASK_JOURNAL_COMPACT_BYTES", str(8 * 1024 * 1024)))
+    # yt-dlp 视频信息缓存：预览、字幕探测、下载共用同一次提取结果（秒，0 表示不缓存，仅合并并发提取）
+    VIDEO_INFO_CACHE_TTL: float = float(os.getenv("VIDEO_INFO_CACHE_TTL", "300"))
+    VIDEO_INFO_CACHE_SIZE: int = int(os.getenv("VIDEO_INFO_CACHE_SIZE", "64"))
+    # ffprobe 探测 / ffmpeg 提取字幕的超时（秒），超时后终止子进程
+    MEDIA_PROBE_TIMEOUT: float = float(os.getenv("MEDIA_PROBE_TIMEOUT", "30"))
+    MEDIA_EXTRACT_TIMEOUT: float = float(os.getenv("MEDIA_EXTRACT_TIMEOUT", "300"))
+    # 音频下载：compact 选满足转录的最小纯音频流（opus/m4a 优先，码率不低于 AUDIO_DOWNLOAD_MIN_ABR kbps），
+    # 失败时回退为 best（最佳音频）；best 直接下载最佳音频
+    AUDIO_DOWNLOAD_MODE: str = os.getenv("AUDIO_DOWNLOAD_MODE", "compact").lower()
+    AUDIO_DOWNLOAD_MIN_ABR: int = int(os.getenv("AUDIO_DOWNLOAD_MIN_ABR", "48"))
+    # 下载音频缓存：同一视频（平台 + 视频 ID）再次处理时不重新下载；
+    # 总大小超过 AUDIO_CACHE_MAX_MB 时淘汰最久未用且未被使用中的条目
+    AUDIO_CACHE_ENABLED: bool = os.getenv("AUDIO_CACHE_ENABLED", "true").lower() == "true"
+    AUDIO_CACHE_MAX_MB: int = int(os.getenv("AUDIO_CACHE_MAX_MB", "2048"))
     # 批量任务同时处理数（默认5）。值越大同时跑的任务越多，占用更多内存和API并发
     BATCH_CONCURRENCY: int = int(os.getenv("BATCH_CONCURRENCY", "5"))
-    # ASR转录并发数（默认1）。模型共享单实例，并发不增加内存，但每个转录占1个CPU核。
-    # tiny/base可设3-5，small/medium设2-3，large设1-2
-    ASR_CONCURRENCY: int = int(os.getenv("ASR_CONCURRENCY", "1"))
+    # 转录前去掉长静音 / 非语音段（片段时间映射回原始媒体时间）
+    ASR_COMPACT_ENABLED: bool = os.getenv("ASR_COMPACT_ENABLED", "true").lower() == "true"
+    # 检测方式：vad（Silero，区分语音与音乐）或 energy（按帧能量，无需模型）
+    ASR_COMPACT_METHOD: str = os.getenv("ASR_COMPACT_METHOD", "vad").lower()
+    # 只去掉长于该值（秒）的非语音段；语音两侧各保留 ASR_COMPACT_PAD 秒
+    ASR_COMPACT_MIN_SILENCE: float = float(os.getenv("ASR_COMPACT_MIN_SILENCE", "2.0"))
+    ASR_COMPACT_PAD: float = float(os.getenv("ASR_COMPACT_PAD", "0.3"))
+    # 转录结果缓存：同一音频（按解码后的内容判断）+ 相同模型与解码参数时直接复用结果
+    ASR_CACHE_ENABLED: bool = os.getenv("ASR_CACHE_ENABLED", "true").lower() == "true"
+    ASR_CACHE_DIR: Path = TEMP_DIR / "asr_cache"
+    # 缓存总大小上限（MB），超出时淘汰最久未使用的条目
+    ASR_CACHE_MAX_MB: int = int(os.getenv("ASR_CACHE_MAX_MB", "512"))
+    # 音频解码为内存 PCM（16kHz float32，每小时约 230MB），超过该时长（秒）时落盘为 memmap，0 表示从不落盘
+    AUDIO_DECODE_SPILL_SECONDS: float = float(os.getenv("AUDIO_DECODE_SPILL_SECONDS", "3600"))
+    # 转录进度（RTF / ETA）推送到任务 SSE 的最小间隔（秒）
+    ASR_PROGRESS_INTERVAL: float = float(os.getenv("ASR_PROGRESS_INTERVAL", "1.0"))
+    # 是否输出逐段转录明细日志（backend.asr.segments，DEBUG 级别）
+    ASR_LOG_SEGMENTS: bool = os.getenv("ASR_LOG_SEGMENTS", "false").lower() == "true"
+    # 转录检查点：时长超过 ASR_CHECKPOINT_MIN_DURATION 秒的音频每隔 ASR_CHECKPOINT_INTERVAL 秒
+    # 把已完成的片段写入任务临时目录，服务重启后从断点继续转录
+    ASR_CHECKPOINT_ENABLED: bool = os.getenv("ASR_CHECKPOINT_ENABLED", "true").lower() == "true"
+    ASR_CHECKPOINT_INTERVAL: float = float(os.getenv("ASR_CHECKPOINT_INTERVAL", "30"))
+    ASR_CHECKPOINT_MIN_DURATION: float = float(os.getenv("ASR_CHECKPOINT_MIN_DURATION", "600"))
     
+    # ========== SQLite 配置 ==========
+    # 只读连接数（另有 1 个专用写连接）
+    DB_READ_POOL_SIZE: int = int(os.getenv("DB_READ_POOL_SIZE", "4"))
+    DB_MMAP_SIZE: int = int(os.getenv("DB_MMAP_SIZE", str(256 * 1024 * 1024)))
+    DB_CACHE_SIZE_KB: int = int(os.getenv("DB_CACHE_SIZE_KB", str(16 * 1024)))
+
+    # ========== 笔记文件索引 ==========
+    # 是否监听 temp 目录变化同步笔记文件索引（手动增删 .md 文件时开启；依赖 watchfiles）
+    ARTIFACT_INDEX_WATCH: bool = os.getenv("ARTIFACT_INDEX_WATCH", "false").lower() == "true"
+
     # ========== ANP服务配置 ==========
     ANP_SERVER_URL: str = os.getenv("ANP_SERVER_URL", "http://localhost:8000/ad.json")
 
@@ -78,6 +133,7 @@ class Settings:
         self.TEMP_DIR.mkdir(exist_ok=True)
         self.DOWNLOADS_DIR.mkdir(exist_ok=True)
         self.BACKUPS_DIR.mkdir(exist_ok=True)
+        self.NOTES_DIR.mkdir(exist_ok=True)
 
 
 # 创建全局配置实例
@@ -2,6 +2,8 @@
 核心基础设施模块
 """
 from .ai_client import (
+    asr_models,
+    asr_model_spec,
     get_asr_model,
     get_whisper_model,
     get_openai_client,
@@ -11,6 +13,8 @@ from .ai_client import (
 )
 
 __all__ = [
+    'asr_models',
+    'asr_model_spec',
     'get_asr_model',
     'get_whisper_model',
     'get_openai_client',
@@ -1,10 +1,18 @@
 """
 AI客户端单例管理
-确保全局只有一个ASR模型和OpenAI客户端实例
+ASR 模型由注册表统一管理（可同时常驻多个模型），OpenAI 客户端全局单例
 """
-from typing import Optional
+from collections import OrderedDict
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import Callable, List, Optional
 from pathlib import Path
+import asyncio
+import gc
 import logging
+import os
+import threading
+import time
 from openai import OpenAI, AsyncOpenAI
 from faster_whisper import WhisperModel
 
@@ -16,36 +24,6 @@ from backend.config.ai_config import get_asr_config, get_whisper_config, get_ope
 logger = logging.getLogger(__name__)
 
 
-class WhisperModelSingleton:
-    """Whisper模型单例"""
-    _instance: Optional[WhisperModel] = None
-    _model_size: Optional[str] = None
-    
-    @classmethod
-    def get_instance(cls) -> WhisperModel:
-        """获取Whisper模型实例（懒加载）"""
-        config = get_whisper_config()
-        
-        # 如果模型大小改变，重新加载
-        if cls._instance is None or cls._model_size != config.model_size:
-            logger.info(f"加载Whisper模型: {config.model_size}")
-            cls._instance = WhisperModel(
-                config.model_size,
-                device=config.device,
-                compute_type=config.compute_type
-            )
-            cls._model_size = config.model_size
-            logger.info("Whisper模型加载完成")
-        
-        return cls._instance
-    
-    @classmethod
-    def clear_instance(cls):
-        """清除实例（用于测试或重新加载）"""
-        cls._instance = None
-        cls._model_size = None
-
-
 def _normalize_source(source: str) -> str:
     if source in {"modelscope", "ms"}:
         return "modelscope"
@@ -82,81 +60,417 @@ def _download_model(model_id: str, source: str, cache_dir: Optional[str]) -> str
     return snapshot_download(repo_id=model_id, cache_dir=cache_dir)
 
 
-class ASRModelSingleton:
-    _instance = None
-    _key: Optional[str] = None
-    
-    @classmethod
-    def get_instance(cls):
+def _set_torch_threads(threads: int) -> None:
+    """FunASR / Qwen3 的 CPU 推理线程数（torch 全局设置）"""
+    if threads <= 0:
+        return
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+
+def _load_model(spec: "ASRModelSpec", config):
+    """按 spec 加载一个 ASR 模型（阻塞）；config 提供 spec 之外的加载参数"""
+    provider = spec.provider
+    if provider == "whisper":
+        logger.info(f"加载Whisper模型: {spec.model}")
+        model = WhisperModel(
+            spec.model,
+            device=spec.device,
+            compute_type=spec.compute_type,
+            cpu_threads=spec.cpu_threads,
+            num_workers=spec.num_workers
+        )
+        logger.info("Whisper模型加载完成")
+        return model
+
+    _set_torch_threads(spec.cpu_threads)
+
+    if provider == "funasr":
+        from funasr import AutoModel
+        model_id = spec.model_dir or _resolve_funasr_model_id(spec.model, spec.source)
+        hub = "ms" if spec.source == "modelscope" else "hf"
+
+        kwargs = {
+            "model": model_id,
+            "device": spec.device,
+            "hub": hub,
+            "vad_model": "fsmn-vad",
+            "vad_kwargs": {"max_single_segment_time": 30000},
+            "trust_remote_code": True,
+            "disable_update": True
+        }
+
+        model = AutoModel(**kwargs)
+        return model
+
+    if provider == "qwen3":
+        # Monkey patch MAX_ASR_INPUT_SECONDS to avoid OOM on long audio
+        try:
+            import qwen_asr.inference.utils
+            import qwen_asr.inference.qwen3_asr
+
+            # Reduce max chunk size (default is 1200s which causes OOM)
+            qwen_asr.inference.utils.MAX_ASR_INPUT_SECONDS = config.max_input_seconds
+            # Also patch the imported value in qwen3_asr module
+            qwen_asr.inference.qwen3_asr.MAX_ASR_INPUT_SECONDS = config.max_input_seconds
+
+            logger.info(f"Successfully patched MAX_ASR_INPUT_SECONDS to {config.max_input_seconds}s")
+        except (ImportError, AttributeError) as e:
+            logger.warning(f"Failed to patch MAX_ASR_INPUT_SECONDS: {e}")
+
+        from qwen_asr import Qwen3ASRModel
+        model_id = spec.model_dir or _resolve_qwen_model_id(spec.model)
+        if spec.model_dir:
+            model_path = model_id
+        else:
+            model_path = _download_model(model_id, spec.source, spec.model_dir)
+        model = Qwen3ASRModel.from_pretrained(
+            model_path,
+            device_map=spec.device,
+            trust_remote_code=True,
+            max_inference_batch_size=config.batch_size,  # Force batch size to avoid OOM
+        )
+        return model
+
+    raise ValueError(f"不支持的ASR提供方: {spec.provider}")
+
+
+# ── ASR 模型注册表 ────────────────────────────────────
+# 无法测得常驻内存增量时按模型名估算（MB，float32 权重；int8 约为一半）
+_WHISPER_SIZE_MB = {
+    "tiny": 150, "base": 290, "small": 970, "medium": 3000,
+    "large": 6200, "turbo": 3200, "distil": 3000,
+}
+# 低于该值的内存增量视为未测到
+_MIN_MEASURED_BYTES = 16 * 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ASRModelSpec:
+    """唯一确定一份已加载模型的参数"""
+    provider: str
+    model: str
+    source: str
+    model_dir: Optional[str]
+    device: str
+    compute_type: str
+    cpu_threads: int = 0
+    num_workers: int = 1
+
+    @property
+    def key(self) -> str:
+        return f"{self.provider}:{self.model}:{self.source}:{self.model_dir}:{self.device}:{self.compute_type}"
+
+
+def asr_model_spec(config=None) -> ASRModelSpec:
+    """由 ASRConfig（可为 ASRConfig.with_model 得到的副本）生成模型 spec"""
+    config = config or get_asr_config()
+    provider = config.provider.lower()
+    return ASRModelSpec(
+        provider=provider,
+        model=config.model,
+        source=_normalize_source(config.download_source),
+        # whisper 按模型名加载，不使用 model_dir
+        model_dir=None if provider == "whisper" else config.model_dir,
+        device=config.device,
+        compute_type=config.compute_type,
+        cpu_threads=config.cpu_threads,
+        num_workers=max(1, config.num_workers),
+    )
+
+
+def _rss_bytes() -> int:
+    """当前进程常驻内存（仅 Linux，其他平台返回 0）"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def _estimate_bytes(spec: ASRModelSpec) -> int:
+    name = spec.model.lower()
+    for prefix, size_mb in _WHISPER_SIZE_MB.items():
+        if name.startswith(prefix) or f"-{prefix}" in name:
+            if spec.compute_type.startswith("int8"):
+                size_mb //= 2
+            return size_mb * 1024 * 1024
+    return 1024 * 1024 * 1024
+
+
+class _ModelEntry:
+    __slots__ = ("spec", "state", "model", "error", "size_bytes", "loaded_at", "last_used", "in_use", "ready")
+
+    def __init__(self, spec: ASRModelSpec):
+        self.spec = spec
+        self.state = "loading"
+        self.model = None
+        self.error: Optional[str] = None
+        self.size_bytes = 0
+        self.loaded_at: Optional[float] = None
+        self.last_used = time.time()
+        self.in_use = 0
+        self.ready = threading.Event()
+
+
+class ASRModelRegistry:
+    """
+    同时常驻多个 ASR 模型的注册表（线程安全）
+
+    - 按 ASRModelSpec 区分模型，同一 spec 只加载一次；并发请求等待同一次加载
+    - 加载在调用线程（get）或后台线程（load_async / aget）中进行，不阻塞事件循环
+    - 总大小超过 memory_budget 时按最近最少使用卸载空闲（未被租用）的模型
+    """
+
+    def __init__(self, memory_budget: int = 0, loader: Optional[Callable] = None):
+        self.memory_budget = memory_budget
+        self._loader = loader or _load_model
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, _ModelEntry]" = OrderedDict()
+        self.loads = 0
+        self.failures = 0
+        self.evictions = 0
+
+    # ── 获取 ──────────────────────────────────────────
+    def get(self, spec: ASRModelSpec, lease: bool = False):
+        """获取模型，未加载时在当前线程加载（阻塞）；lease=True 时同时增加租用计数"""
+        while True:
+            entry, owner = self._claim(spec)
+            if owner:
+                self._load(entry)
+            entry.ready.wait()
+            model = self._result(entry, lease)
+            if model is not None:
+                return model
+            # 等待期间被其他加载淘汰或被卸载：重新加载
+            logger.info(f"ASR模型在获取前被卸载，重新加载: {spec.key}")
+
+    async def aget(self, spec: ASRModelSpec, lease: bool = False):
+        """异步获取模型，加载放到线程中进行"""
+        with self._lock:
+            entry = self._entries.get(spec.key)
+            if entry is not None and entry.state == "ready":
+                return self._touch_locked(entry, lease)
+        return await asyncio.to_thread(self.get, spec, lease)
+
+    def load_async(self, spec: ASRModelSpec) -> str:
+        """在后台线程加载模型，立即返回当前状态"""
+        entry, owner = self._claim(spec)
+        if owner:
+            threading.Thread(
+                target=self._load, args=(entry,), name=f"asr-model-load-{spec.model}", daemon=True
+            ).start()
+        return entry.state
+
+    def release(self, spec: ASRModelSpec) -> None:
+        with self._lock:
+            entry = self._entries.get(spec.key)
+            if entry is not None and entry.in_use > 0:
+                entry.in_use -= 1
+
+    @contextmanager
+    def lease(self, spec: ASRModelSpec):
+        """租用期间模型不会被淘汰"""
+        model = self.get(spec, lease=True)
+        try:
+            yield model
+        finally:
+            self.release(spec)
+
+    @asynccontextmanager
+    async def alease(self, spec: ASRModelSpec):
+        model = await self.aget(spec, lease=True)
+        try:
+            yield model
+        finally:
+            self.release(spec)
+
+    def is_ready(self, spec: ASRModelSpec) -> bool:
+        entry = self._entries.get(spec.key)
+        return entry is not None and entry.state == "ready"
+
+    # ── 加载与淘汰 ────────────────────────────────────
+    def _claim(self, spec: ASRModelSpec):
+        """返回 (entry, 是否由调用方负责加载)"""
+        with self._lock:
+            entry = self._entries.get(spec.key)
+            if entry is not None and entry.state != "failed":
+                self._entries.move_to_end(spec.key)
+                return entry, False
+            entry = _ModelEntry(spec)
+            self._entries[spec.key] = entry
+            return entry, True
+
+    def _load(self, entry: _ModelEntry) -> None:
+        spec = entry.spec
         config = get_asr_config()
-        source = _normalize_source(config.download_source)
-        key = f"{config.provider}:{config.model}:{source}:{config.model_dir}:{config.device}:{config.compute_type}"
-        if cls._instance is None or cls._key != key:
-            cls._instance = cls._load_model(config, source)
-            cls._key = key
-        return cls._instance
-    
+        before = _rss_bytes()
+        started = time.perf_counter()
+        try:
+            model = self._loader(spec, config)
+        except Exception as e:
+            logger.error(f"ASR模型加载失败 ({spec.key}): {e}")
+            with self._lock:
+                entry.state = "failed"
+                entry.error = str(e)
+                self.failures += 1
+            entry.ready.set()
+            return
+
+        delta = _rss_bytes() - before
+        evicted = []
+        with self._lock:
+            entry.model = model
+            # 与其他加载并发或非 Linux 时测不准，退回按模型名估算
+            entry.size_bytes = delta if delta > _MIN_MEASURED_BYTES else _estimate_bytes(spec)
+            entry.loaded_at = time.time()
+            entry.state = "ready"
+            self.loads += 1
+            evicted = self._evict_locked(keep=spec.key)
+        entry.ready.set()
+        logger.info(
+            f"ASR模型就绪: {spec.key} (约 {entry.size_bytes / 1024 / 1024:.0f}MB, "
+            f"用时 {time.perf_counter() - started:.1f}s)"
+        )
+        if evicted:
+            self._free_memory()
+
+    def _result(self, entry: _ModelEntry, lease: bool):
+        """已就绪返回模型；已被淘汰 / 卸载时返回 None（不租用）"""
+        with self._lock:
+            if entry.state == "failed":
+                raise RuntimeError(f"ASR模型加载失败 ({entry.spec.key}): {entry.error}")
+            if entry.state == "evicted":
+                return None
+            return self._touch_locked(entry, lease)
+
+    def _touch_locked(self, entry: _ModelEntry, lease: bool):
+        entry.last_used = time.time()
+        if lease:
+            entry.in_use += 1
+        if self._entries.get(entry.spec.key) is entry:
+            self._entries.move_to_end(entry.spec.key)
+        return entry.model
+
+    def _evict_locked(self, keep: str) -> List[str]:
+        if self.memory_budget <= 0:
+            return []
+        evicted = []
+        total = sum(e.size_bytes for e in self._entries.values() if e.state == "ready")
+        for key, entry in list(self._entries.items()):
+            if total <= self.memory_budget:
+                break
+            if key == keep or entry.state != "ready" or entry.in_use > 0:
+                continue
+            del self._entries[key]
+            total -= entry.size_bytes
+            entry.state = "evicted"
+            entry.model = None
+            evicted.append(key)
+            self.evictions += 1
+            logger.info(f"卸载 ASR 模型: {key} (约 {entry.size_bytes / 1024 / 1024:.0f}MB)")
+        if total > self.memory_budget:
+            logger.warning(
+                f"ASR模型占用约 {total / 1024 / 1024:.0f}MB，超出预算 "
+                f"{self.memory_budget / 1024 / 1024:.0f}MB（其余模型正在使用）"
+            )
+        return evicted
+
     @staticmethod
-    def _load_model(config, source: str):
-        provider = config.provider.lower()
-        if provider == "whisper":
-            logger.info(f"加载Whisper模型: {config.model}")
-            model = WhisperModel(
-                config.model,
-                device=config.device,
-                compute_type=config.compute_type
+    def _free_memory() -> None:
+        gc.collect()
+        torch = sys.modules.get("torch")
+        if torch is not None and torch.cuda.is_available():
+            torch.cuda.empty_cache()
+
+    # ── 管理 ──────────────────────────────────────────
+    def unload(self, spec: ASRModelSpec) -> bool:
+        with self._lock:
+            entry = self._entries.get(spec.key)
+            if entry is None or entry.state == "loading":
+                return False
+            del self._entries[spec.key]
+            entry.state = "evicted"
+            entry.model = None
+        self._free_memory()
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.state != "loading":
+                    entry.state = "evicted"
+                    entry.model = None
+            self._entries = OrderedDict(
+                (key, entry) for key, entry in self._entries.items() if entry.state == "loading"
             )
-            logger.info("Whisper模型加载完成")
-            return model
-        
-        if provider == "funasr":
-            from funasr import AutoModel
-            model_id = config.model_dir or _resolve_funasr_model_id(config.model, source)
-            hub = "ms" if source == "modelscope" else "hf"
-            
-            kwargs = {
-                "model": model_id,
-                "device": config.device,
-                "hub": hub,
-                "vad_model": "fsmn-vad",
-                "vad_kwargs": {"max_single_segment_time": 30000},
-                "trust_remote_code": True,
-                "disable_update": True
+        self._free_memory()
+
+    def stats(self) -> dict:
+        with self._lock:
+            models = [
+                {
+                    "key": key,
+                    "provider": entry.spec.provider,
+                    "model": entry.spec.model,
+                    "state": entry.state,
+                    "error": entry.error,
+                    "size_mb": round(entry.size_bytes / 1024 / 1024, 1),
+                    "in_use": entry.in_use,
+                    "last_used": entry.last_used,
+                }
+                for key, entry in reversed(self._entries.items())
+            ]
+            return {
+                "models": models,
+                "bytes": sum(e.size_bytes for e in self._entries.values() if e.state == "ready"),
+                "memory_budget": self.memory_budget,
+                "loads": self.loads,
+                "failures": self.failures,
+                "evictions": self.evictions,
             }
-            
-            model = AutoModel(**kwargs)
-            return model
-        
-        if provider == "qwen3":
-            # Monkey patch MAX_ASR_INPUT_SECONDS to avoid OOM on long audio
-            try:
-                import qwen_asr.inference.utils
-                import qwen_asr.inference.qwen3_asr
-                
-                # Reduce max chunk size (default is 1200s which causes OOM)
-                qwen_asr.inference.utils.MAX_ASR_INPUT_SECONDS = config.max_input_seconds
-                # Also patch the imported value in qwen3_asr module
-                qwen_asr.inference.qwen3_asr.MAX_ASR_INPUT_SECONDS = config.max_input_seconds
-                
-                logger.info(f"Successfully patched MAX_ASR_INPUT_SECONDS to {config.max_input_seconds}s")
-            except (ImportError, AttributeError) as e:
-                logger.warning(f"Failed to patch MAX_ASR_INPUT_SECONDS: {e}")
-
-            from qwen_asr import Qwen3ASRModel
-            model_id = config.model_dir or _resolve_qwen_model_id(config.model)
-            if config.model_dir:
-                model_path = model_id
-            else:
-                model_path = _download_model(model_id, source, config.model_dir)
-            model = Qwen3ASRModel.from_pretrained(
-                model_path,
-                device_map=config.device,
-                trust_remote_code=True,
-                max_inference_batch_size=config.batch_size,  # Force batch size to avoid OOM
-            )
-            return model
-        
-        raise ValueError(f"不支持的ASR提供方: {config.provider}")
+
+
+asr_models = ASRModelRegistry(get_asr_config().model_memory_mb * 1024 * 1024)
+
+
+def preload_asr_models() -> None:
+    """后台预加载默认模型与 ASR_MODELS 中的模型（不阻塞）"""
+    config = get_asr_config()
+    for model in config.available_models:
+        asr_models.load_async(asr_model_spec(config.with_model(model)))
+
+
+class WhisperModelSingleton:
+    """Whisper模型（与 get_asr_model 共用注册表中的同一份实例）"""
+
+    @staticmethod
+    def _spec() -> ASRModelSpec:
+        config = get_whisper_config()
+        asr_config = get_asr_config()
+        return ASRModelSpec(
+            provider="whisper",
+            model=config.model_size,
+            source=_normalize_source(asr_config.download_source),
+            model_dir=None,
+            device=config.device,
+            compute_type=config.compute_type,
+            cpu_threads=asr_config.cpu_threads,
+            num_workers=max(1, asr_config.num_workers),
+        )
+
+    @classmethod
+    def get_instance(cls) -> WhisperModel:
+        """获取Whisper模型实例（懒加载）"""
+        return asr_models.get(cls._spec())
+
+    @classmethod
+    def clear_instance(cls):
+        """清除实例（用于测试或重新加载）"""
+        asr_models.unload(cls._spec())
 
 
 class OpenAIClientSingleton:
@@ -230,8 +544,9 @@ def get_whisper_model() -> WhisperModel:
     return WhisperModelSingleton.get_instance()
 
 
-def get_asr_model():
-    return ASRModelSingleton.get_instance()
+def get_asr_model(model: Optional[str] = None):
+    """获取 ASR 模型（阻塞，未加载时在当前线程加载）；model 为按请求选择的模型名"""
+    return asr_models.get(asr_model_spec(get_asr_config().with_model(model)))
 
 
 def get_openai_client() -> Optional[OpenAI]:
@@ -0,0 +1,155 @@
+"""
+笔记文件索引 — short_id → 文件类型 → 路径
+
+启动时遍历一次笔记存储（artifact_store），之后由 artifact_store 写入/删除时增量维护，
+可选用 watchfiles（uvicorn[standard] 自带）监听存储目录，同步外部对文件的增删。
+所有按 short_id / safe_title 查找笔记文件的地方都走这里，避免每次请求扫描目录。
+"""
+import asyncio
+import logging
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 笔记展示文件名: {type}_{safe_title}_{short_id}.md
+NOTE_FILE_RE = re.compile(
+    r"^(summary|transcript|raw|mindmap|translation)_(.+)_([a-f0-9]{6})\.md$"
+)
+
+try:
+    from watchfiles import awatch
+    WATCHFILES_AVAILABLE = True
+except ImportError:
+    WATCHFILES_AVAILABLE = False
+
+
+class NoteEntry:
+    """单条笔记的文件集合"""
+
+    __slots__ = ("short_id", "safe_title", "files")
+
+    def __init__(self, short_id: str, safe_title: str):
+        self.short_id = short_id
+        self.safe_title = safe_title
+        self.files: Dict[str, str] = {}  # type -> 展示文件名
+
+
+class ArtifactIndex:
+    """内存中的笔记文件索引"""
+
+    def __init__(self):
+        self._notes: Dict[str, NoteEntry] = {}
+        self._titles: Dict[str, List[str]] = {}  # safe_title -> [short_id]（按发现顺序）
+        self._watch_task: Optional[asyncio.Task] = None
+
+    # ── 构建 / 增量维护 ───────────────────────────────
+    def build(self) -> int:
+        """从笔记存储全量构建，返回索引到的文件数"""
+        from backend.core.artifact_store import artifact_store
+
+        self._notes.clear()
+        self._titles.clear()
+        count = 0
+        for short_id, safe_title, files in artifact_store.iter_notes():
+            for file_type in files:
+                self.add(short_id, safe_title, file_type)
+                count += 1
+        logger.info(f"笔记文件索引完成: {len(self._notes)} 条笔记, {count} 个文件")
+        return count
+
+    def add(self, short_id: str, safe_title: str, file_type: str) -> None:
+        entry = self._notes.get(short_id)
+        if entry is None:
+            entry = self._notes[short_id] = NoteEntry(short_id, safe_title)
+        entry.files[file_type] = f"{file_type}_{entry.safe_title}_{short_id}.md"
+        ids = self._titles.setdefault(entry.safe_title, [])
+        if short_id not in ids:
+            ids.append(short_id)
+
+    def discard_note(self, short_id: str) -> None:
+        entry = self._notes.pop(short_id, None)
+        if entry is None:
+            return
+        ids = self._titles.get(entry.safe_title, [])
+        if short_id in ids:
+            ids.remove(short_id)
+        if not ids:
+            self._titles.pop(entry.safe_title, None)
+
+    def refresh(self, short_id: str) -> None:
+        """按存储中的实际目录重新登记一条笔记"""
+        from backend.core.artifact_store import artifact_store
+
+        self.discard_note(short_id)
+        info = artifact_store.read_note(artifact_store.note_dir(short_id))
+        if info:
+            safe_title, files = info
+            for file_type in files:
+                self.add(short_id, safe_title, file_type)
+
+    # ── 查询 ──────────────────────────────────────────
+    def get(self, short_id: str, file_type: str) -> Optional[Path]:
+        from backend.core.artifact_store import artifact_store
+
+        entry = self._notes.get(short_id)
+        if entry is None or file_type not in entry.files:
+            return None
+        return artifact_store.path(short_id, file_type)
+
+    def files(self, short_id: str) -> Dict[str, str]:
+        """返回 {type: 展示文件名}（副本）"""
+        entry = self._notes.get(short_id)
+        return dict(entry.files) if entry else {}
+
+    def short_ids_for_title(self, safe_title: str) -> List[str]:
+        return list(self._titles.get(safe_title, ()))
+
+    def has_title(self, safe_title: str) -> bool:
+        return safe_title in self._titles
+
+    def notes(self) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+        """遍历 (short_id, safe_title, {type: 展示文件名})"""
+        for entry in list(self._notes.values()):
+            yield entry.short_id, entry.safe_title, dict(entry.files)
+
+    def __len__(self) -> int:
+        return len(self._notes)
+
+    # ── 目录监听 ──────────────────────────────────────
+    def start_watcher(self) -> None:
+        if self._watch_task is not None:
+            return
+        if not WATCHFILES_AVAILABLE:
+            logger.warning("watchfiles 未安装，笔记文件索引不监听目录变化")
+            return
+        self._watch_task = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        from backend.core.artifact_store import artifact_store
+
+        root = artifact_store.root
+        logger.info(f"开始监听笔记目录: {root}")
+        try:
+            async for changes in awatch(root):
+                # 路径形如 root/{shard}/{short_id}/{file}，按笔记目录刷新
+                touched = set()
+                for _, raw_path in changes:
+                    parts = Path(raw_path).relative_to(root).parts
+                    if len(parts) >= 2:
+                        touched.add(parts[1])
+                for short_id in touched:
+                    self.refresh(short_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"笔记目录监听异常: {e}")
+
+    def stop_watcher(self) -> None:
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+
+
+artifact_index = ArtifactIndex()
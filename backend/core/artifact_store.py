@@ -0,0 +1,172 @@
+"""
+笔记文件存储 — 按 short_id 哈希前缀分片，每条笔记一个目录
+
+布局：
+    temp/notes/{sha1(short_id)[:2]}/{short_id}/
+        meta.json          {"safe_title": ...}
+        summary.md / transcript.md / raw.md / mindmap.md / translation.md
+
+对外（下载文件名、notes 表的 *_file 列）仍使用展示文件名
+`{type}_{safe_title}_{short_id}.md`，由 resolve() 映射回实际路径。
+列出、删除、统计某条笔记只访问它自己的目录。
+"""
+import hashlib
+import json
+import logging
+import shutil
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import aiofiles
+
+from backend.config.settings import get_settings
+from backend.core.artifact_index import NOTE_FILE_RE
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_TYPES = ("summary", "transcript", "raw", "mindmap", "translation")
+META_FILE = "meta.json"
+
+
+class ArtifactStore:
+    """分片的笔记文件存储"""
+
+    def __init__(self, root: Path, legacy_dir: Optional[Path] = None):
+        self.root = root
+        # 旧版平铺目录，resolve() 找不到分片文件时回退到这里
+        self.legacy_dir = legacy_dir
+
+    # ── 路径 ──────────────────────────────────────────
+    @staticmethod
+    def shard(short_id: str) -> str:
+        return hashlib.sha1(short_id.encode("utf-8")).hexdigest()[:2]
+
+    def note_dir(self, short_id: str) -> Path:
+        return self.root / self.shard(short_id) / short_id
+
+    def path(self, short_id: str, file_type: str) -> Path:
+        if file_type not in ARTIFACT_TYPES:
+            raise ValueError(f"未知的笔记文件类型: {file_type}")
+        return self.note_dir(short_id) / f"{file_type}.md"
+
+    @staticmethod
+    def display_name(file_type: str, safe_title: str, short_id: str) -> str:
+        return f"{file_type}_{safe_title}_{short_id}.md"
+
+    def resolve(self, filename: str) -> Optional[Path]:
+        """展示文件名 → 实际文件路径（不存在返回 None）"""
+        match = NOTE_FILE_RE.match(filename)
+        if match:
+            path = self.path(match.group(3), match.group(1))
+            if path.is_file():
+                return path
+        if self.legacy_dir is not None:
+            legacy = self.legacy_dir / filename
+            if legacy.is_file():
+                return legacy
+        return None
+
+    # ── 读写 ──────────────────────────────────────────
+    async def write(self, short_id: str, safe_title: str, file_type: str, content: str) -> Path:
+        """写入一个笔记文件并登记到索引，返回实际路径"""
+        from backend.core.artifact_index import artifact_index
+
+        path = self.path(short_id, file_type)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta_path = path.parent / META_FILE
+        if not meta_path.exists():
+            self._write_meta(path.parent, safe_title)
+        async with aiofiles.open(path, "w", encoding="utf-8") as f:
+            await f.write(content)
+        artifact_index.add(short_id, safe_title, file_type)
+        return path
+
+    @staticmethod
+    def _write_meta(note_dir: Path, safe_title: str) -> None:
+        with open(note_dir / META_FILE, "w", encoding="utf-8") as f:
+            json.dump({"safe_title": safe_title}, f, ensure_ascii=False)
+
+    def read_note(self, note_dir: Path) -> Optional[Tuple[str, Dict[str, str]]]:
+        """读取笔记目录，返回 (safe_title, {type: 展示文件名})；目录无效时返回 None"""
+        try:
+            with open(note_dir / META_FILE, "r", encoding="utf-8") as f:
+                safe_title = json.load(f).get("safe_title", "")
+        except (OSError, ValueError):
+            return None
+        short_id = note_dir.name
+        files = {
+            t: self.display_name(t, safe_title, short_id)
+            for t in ARTIFACT_TYPES
+            if (note_dir / f"{t}.md").is_file()
+        }
+        return safe_title, files
+
+    def iter_notes(self) -> Iterator[Tuple[str, str, Dict[str, str]]]:
+        """遍历所有笔记 (short_id, safe_title, {type: 展示文件名})"""
+        if not self.root.exists():
+            return
+        for shard_dir in self.root.iterdir():
+            if not shard_dir.is_dir():
+                continue
+            for note_dir in shard_dir.iterdir():
+                info = self.read_note(note_dir) if note_dir.is_dir() else None
+                if info and info[1]:
+                    yield note_dir.name, info[0], info[1]
+
+    # ── 删除 / 统计 ───────────────────────────────────
+    def note_size(self, short_id: str) -> int:
+        note_dir = self.note_dir(short_id)
+        if not note_dir.is_dir():
+            return 0
+        return sum(f.stat().st_size for f in note_dir.iterdir() if f.suffix == ".md")
+
+    def note_mtime(self, short_id: str) -> float:
+        note_dir = self.note_dir(short_id)
+        mtimes = [f.stat().st_mtime for f in note_dir.iterdir() if f.suffix == ".md"] if note_dir.is_dir() else []
+        return max(mtimes, default=0.0)
+
+    def delete(self, short_id: str) -> Tuple[list, int]:
+        """删除整条笔记目录，返回 (删除的展示文件名列表, 释放字节数)"""
+        from backend.core.artifact_index import artifact_index
+
+        note_dir = self.note_dir(short_id)
+        info = self.read_note(note_dir) if note_dir.is_dir() else None
+        deleted, freed = [], 0
+        if info:
+            freed = self.note_size(short_id)
+            deleted = list(info[1].values())
+        if note_dir.exists():
+            shutil.rmtree(note_dir)
+            try:
+                note_dir.parent.rmdir()  # 分片目录为空时一并删除
+            except OSError:
+                pass
+        artifact_index.discard_note(short_id)
+        return deleted, freed
+
+    # ── 旧版平铺目录迁移 ──────────────────────────────
+    def migrate_flat_layout(self, flat_dir: Path) -> int:
+        """把 flat_dir 下的 {type}_{safe_title}_{short_id}.md 移入分片目录，返回迁移文件数"""
+        moved = 0
+        for f in list(flat_dir.iterdir()):
+            if f.suffix != ".md" or not f.is_file():
+                continue
+            match = NOTE_FILE_RE.match(f.name)
+            if not match:
+                continue
+            file_type, safe_title, short_id = match.groups()
+            target = self.path(short_id, file_type)
+            if target.exists():
+                logger.warning(f"分片目录已存在同类型文件，保留旧文件: {f.name}")
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not (target.parent / META_FILE).exists():
+                self._write_meta(target.parent, safe_title)
+            f.replace(target)
+            moved += 1
+        if moved:
+            logger.info(f"笔记文件迁移到分片目录: {moved} 个文件")
+        return moved
+
+
+artifact_store = ArtifactStore(get_settings().NOTES_DIR, legacy_dir=get_settings().TEMP_DIR)
@@ -3,60 +3,10 @@
 """
 import asyncio
 import logging
-from datetime import datetime, timedelta
-
-from backend.core.state import (
-    sse_connections,
-    sse_connection_last_activity,
-    tasks,
-)
 
 logger = logging.getLogger(__name__)
 
 
-async def cleanup_stale_sse_connections():
-    """定期清理断开或过期的 SSE 连接（只清理已完成/失败的任务连接）"""
-    while True:
-        try:
-            await asyncio.sleep(300)
-
-            current_time = datetime.now()
-            stale_threshold = timedelta(hours=2)
-            tasks_to_cleanup = []
-
-            for task_id in list(sse_connections.keys()):
-                task = tasks.get(task_id)
-
-                if task:
-                    task_status = task.get("status")
-
-                    if task_status == "processing":
-                        logger.debug(f"任务 {task_id} 正在处理中，跳过清理")
-                        continue
-
-                    if task_status in ["completed", "error", "cancelled"]:
-                        last_activity = sse_connection_last_activity.get(task_id)
-                        if last_activity and (current_time - last_activity) > stale_threshold:
-                            tasks_to_cleanup.append(task_id)
-                        elif not last_activity:
-                            tasks_to_cleanup.append(task_id)
-                else:
-                    tasks_to_cleanup.append(task_id)
-
-            for task_id in tasks_to_cleanup:
-                if task_id in sse_connections:
-                    logger.info(f"清理已完成任务的SSE连接: {task_id}")
-                    del sse_connections[task_id]
-                if task_id in sse_connection_last_activity:
-                    del sse_connection_last_activity[task_id]
-
-            if tasks_to_cleanup:
-                logger.info(f"已清理 {len(tasks_to_cleanup)} 个已完成任务的SSE连接")
-
-        except Exception as e:
-            logger.error(f"清理SSE连接时出错: {e}")
-
-
 async def check_openai_connection():
     """检查 OpenAI API 连接性"""
     from backend.core.ai_client import get_openai_client
@@ -98,28 +48,10 @@ async def check_openai_connection():
 
 async def repair_note_file_links():
     """修复 notes 表中文件名字段为 NULL 的记录（short_id 不匹配导致的历史问题）"""
-    import re
     from backend.db.connection import get_db
-    from backend.core.state import TEMP_DIR
-
-    note_file_re = re.compile(
-        r"^(summary|transcript|raw|mindmap|translation)_(.+)_([a-f0-9]{6})\.md$"
-    )
-
-    # 扫描 temp 目录，建立 safe_title → {short_id, files} 索引
-    fs_index: dict[str, dict] = {}  # safe_title -> {short_id, files: {type: filename}}
-    for f in TEMP_DIR.iterdir():
-        if not f.is_file() or f.suffix != ".md":
-            continue
-        match = note_file_re.match(f.name)
-        if not match:
-            continue
-        file_type, safe_title, short_id = match.group(1), match.group(2), match.group(3)
-        if safe_title not in fs_index:
-            fs_index[safe_title] = {"short_id": short_id, "files": {}}
-        fs_index[safe_title]["files"][file_type] = f.name
-
-    if not fs_index:
+    from backend.core.artifact_index import artifact_index
+
+    if not artifact_index:
         return
 
     async with get_db() as db:
@@ -134,12 +66,12 @@ async def repair_note_file_links():
         for note_id, db_short_id, safe_title in broken_notes:
             if not safe_title:
                 continue
-            fs_info = fs_index.get(safe_title)
-            if not fs_info:
+            candidates = artifact_index.short_ids_for_title(safe_title)
+            if not candidates:
                 continue
 
-            real_short_id = fs_info["short_id"]
-            files = fs_info["files"]
+            real_short_id = candidates[0]
+            files = artifact_index.files(real_short_id)
 
             # 检查 real_short_id 是否已被其他 note 占用
             cursor = await db.execute(
@@ -176,22 +108,11 @@ async def repair_note_file_links():
 
 async def cleanup_orphan_notes():
     """删除没有文件且磁盘上已有同 safe_title 文件的孤立笔记"""
-    import re
     from backend.db.connection import get_db
-    from backend.core.state import TEMP_DIR
-
-    # 扫描磁盘，收集所有 safe_title（已有文件）
-    note_file_re = re.compile(
-        r"^(?:summary|transcript|raw|mindmap|translation)_(.+)_[a-f0-9]{6}\.md$"
-    )
-    titles_with_files: set[str] = set()
-    for f in TEMP_DIR.iterdir():
-        if f.is_file() and f.suffix == ".md":
-            match = note_file_re.match(f.name)
-            if match:
-                titles_with_files.add(match.group(1))
-
-    if not titles_with_files:
+    from backend.core.artifact_index import artifact_index
+    from backend.services.note_search import remove_notes
+
+    if not artifact_index:
         return
 
     async with get_db() as db:
@@ -205,7 +126,8 @@ async def cleanup_orphan_notes():
 
         deleted = 0
         for note_id, short_id, safe_title in orphans:
-            if safe_title and safe_title in titles_with_files:
+            if safe_title and artifact_index.has_title(safe_title):
+                await remove_notes(db, [note_id])
                 await db.execute("DELETE FROM notes WHERE id = ?", (note_id,))
                 deleted += 1
 
@@ -218,6 +140,16 @@ async def startup_event():
     # 初始化 SQLite 数据库 + 自动迁移 JSON 数据
     from backend.db.schema import init_db, migrate_from_json
     await init_db()
+
+    # 旧版平铺在 temp/ 下的笔记文件迁入分片存储，然后建立笔记文件索引（迁移与修复逻辑都依赖它）
+    from backend.config.settings import get_settings
+    from backend.core.artifact_index import artifact_index
+    from backend.core.artifact_store import artifact_store
+    artifact_store.migrate_flat_layout(get_settings().TEMP_DIR)
+    artifact_index.build()
+    if get_settings().ARTIFACT_INDEX_WATCH:
+        artifact_index.start_watcher()
+
     await migrate_from_json()
 
     # 修复历史数据中 short_id 不匹配导致的文件关联丢失
@@ -226,5 +158,54 @@ async def startup_event():
     # 清理无文件的重复笔记记录
     await cleanup_orphan_notes()
 
-    asyncio.create_task(cleanup_stale_sse_connections())
+    # 为升级前的笔记补建全文索引（读笔记文件，放到后台）
+    from backend.services.note_search import backfill
+    asyncio.create_task(backfill())
+
     asyncio.create_task(check_openai_connection())
+
+    # 后台预加载 ASR 模型（启用工作进程时由各工作进程自行加载）
+    from backend.config.ai_config import get_asr_config
+    asr_config = get_asr_config()
+    if asr_config.preload_models and asr_config.worker_processes <= 0:
+        from backend.core.ai_client import preload_asr_models
+        preload_asr_models()
+
+    # 上次关闭时中断的任务：有转录检查点的从断点继续
+    from backend.routers.tasks import resume_interrupted_tasks
+    resume_interrupted_tasks()
+
+
+async def stop_active_tasks(timeout: float = 10.0):
+    """取消进行中的任务并等待其写出转录检查点（任务保持 processing 状态，重启后继续）"""
+    from backend.core.single_flight import media_flights
+    from backend.core.state import active_tasks, mark_shutting_down
+
+    mark_shutting_down()
+    pending = [task for task in active_tasks.values() if not task.done()]
+    if pending:
+        for task in pending:
+            task.cancel()
+        await asyncio.wait(pending, timeout=timeout)
+        logger.info(f"已中断 {len(pending)} 个进行中的任务")
+    # 任务取消后立即返回，共享的下载 / 转录工作仍在收尾（等待解码线程、写出检查点）
+    await media_flights.drain(timeout)
+
+
+async def shutdown_event():
+    await stop_active_tasks()
+
+    # 停止任务日志压缩线程并写出最终快照
+    from backend.core.state import close_task_journal
+    from backend.core.artifact_index import artifact_index
+    from backend.db.connection import close_db
+    from backend.services.asr_engine import shutdown_engine
+    from backend.services.asr_parallel import shutdown_pool
+    from backend.services.asr_workers import shutdown_workers
+    artifact_index.stop_watcher()
+    close_task_journal()
+    # 释放并行转录进程池 / 批量推理线程 / ASR 工作进程（未启用过时为空操作）
+    shutdown_pool()
+    shutdown_engine()
+    shutdown_workers()
+    await close_db()
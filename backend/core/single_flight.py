@@ -0,0 +1,193 @@
+"""
+进行中工作合并（single-flight） — 同一媒体的下载、字幕提取、转录只做一次
+
+任务处理、仅转录、思维导图、问答、搜索生成笔记等入口都可能同时处理同一个视频。
+按规范化的媒体标识（URL / 文件）作为 key：第一个调用方发起工作，同一 key 的后续调用方
+等待同一个结果。工作过程中发布的事件（如转录片段）推送给所有等待方，中途加入的等待方
+先收到此前发布的事件。只有所有等待方都取消后工作才会取消，某个任务被用户取消不影响
+共享同一工作的其他任务；发起方取消导致工作中止时，仍在等待的调用方重新发起。
+等待方的取消检查只在事件循环中进行（发布事件时与定时轮询），工作线程通过 flight.cancelled()
+读取线程安全的标志。
+"""
+import asyncio
+import itertools
+import logging
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+# 事件循环中轮询等待方取消检查的间隔（秒）
+POLL_INTERVAL = 0.5
+
+
+async def _invoke(callback: Callable, *args) -> None:
+    result = callback(*args)
+    if asyncio.iscoroutine(result):
+        await result
+
+
+class _Waiter:
+    def __init__(self, cancel_check: Optional[Callable[[], bool]], on_event: Optional[Callable]):
+        self.cancel_check = cancel_check
+        self.on_event = on_event
+        # 该等待方已取消（由 publish 检查 cancel_check 后设置），run() 随即返回
+        self.dropped = asyncio.Event()
+
+    def cancelled(self) -> bool:
+        if not self.dropped.is_set() and self.cancel_check is not None and self.cancel_check():
+            self.dropped.set()
+        return self.dropped.is_set()
+
+
+class Flight:
+    """一次进行中的工作；传给工作函数，用于检查取消和向等待方发布事件"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Task] = None
+        self._waiters: Dict[int, _Waiter] = {}
+        self._history: List[tuple] = []
+        self._ids = itertools.count()
+        # 工作即将因无人需要而取消，新的调用方不再加入
+        self.closing = False
+        # closing 的线程安全副本，供在线程中运行的解码循环读取
+        self._stop = threading.Event()
+
+    def cancelled(self) -> bool:
+        """所有等待方都已取消；可在任意线程调用（只读取标志，不执行等待方的检查）"""
+        return self._stop.is_set()
+
+    def close(self) -> None:
+        self.closing = True
+        self._stop.set()
+
+    def poll(self) -> bool:
+        """
+        在事件循环中检查各等待方的 cancel_check，全部取消时标记 closing 并返回 True
+        （没有 cancel_check 的等待方视为一直需要结果）
+        """
+        if not self.closing and all([waiter.cancelled() for waiter in self._waiters.values()]):
+            self.close()
+        return self.closing
+
+    @property
+    def waiters(self) -> int:
+        return len(self._waiters)
+
+    async def publish(self, *event: Any, replay: bool = True) -> None:
+        """
+        推送事件给所有等待方；replay=True 的事件会补发给之后加入的等待方。
+        单个等待方的回调出错只记录告警，不影响工作本身和其他等待方。
+        """
+        if replay:
+            self._history.append(event)
+        for waiter in list(self._waiters.values()):
+            if waiter.on_event is None or waiter.cancelled():
+                continue
+            try:
+                await _invoke(waiter.on_event, *event)
+            except Exception as e:
+                logger.warning(f"事件回调失败: {e}")
+        self.poll()
+
+    async def join(self, cancel_check: Optional[Callable[[], bool]], on_event: Optional[Callable]) -> Tuple[int, _Waiter]:
+        # 先补发历史事件，追上后再登记（登记与最后一次检查之间没有 await，不会漏事件）
+        sent = 0
+        while on_event is not None and sent < len(self._history):
+            event = self._history[sent]
+            sent += 1
+            try:
+                await _invoke(on_event, *event)
+            except Exception as e:
+                logger.warning(f"事件回调失败: {e}")
+        waiter_id = next(self._ids)
+        waiter = self._waiters[waiter_id] = _Waiter(cancel_check, on_event)
+        return waiter_id, waiter
+
+    def leave(self, waiter_id: int) -> None:
+        self._waiters.pop(waiter_id, None)
+
+
+class SingleFlight:
+    """按 key 合并并发的同类工作"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self.started = 0
+        self.joined = 0
+
+    async def run(
+        self,
+        key: Hashable,
+        work: Callable[[Flight], Awaitable[T]],
+        cancel_check: Optional[Callable[[], bool]] = None,
+        on_event: Optional[Callable] = None,
+    ) -> T:
+        """
+        执行或加入 key 对应的工作，返回其结果（工作抛出的异常原样传给所有等待方）
+
+        Args:
+            key: 媒体标识与影响结果的参数
+            work: 工作函数 work(flight)，通过 flight.cancelled() 检查取消、flight.publish() 发布事件
+            cancel_check: 本调用方的取消检查，返回 True 表示不再需要结果
+            on_event: 接收 flight.publish 发布的事件，可为协程函数
+        """
+        while True:
+            flight = self._flights.get(key)
+            if flight is None or flight.closing or flight.task.done():
+                flight = Flight()
+                self._flights[key] = flight
+                flight.task = asyncio.create_task(self._execute(key, flight, work))
+                # 所有等待方都离开后结果无人读取，避免 "exception was never retrieved"
+                flight.task.add_done_callback(lambda t: t.cancelled() or t.exception())
+                self.started += 1
+            else:
+                self.joined += 1
+                logger.info(f"复用进行中的工作: {key[0] if isinstance(key, tuple) else key}")
+
+            waiter_id, waiter = await flight.join(cancel_check, on_event)
+            dropped = asyncio.ensure_future(waiter.dropped.wait())
+            try:
+                # asyncio.wait 不会取消 flight.task：本调用方被取消不影响其他等待方
+                await asyncio.wait({flight.task, dropped}, return_when=asyncio.FIRST_COMPLETED)
+                if waiter.cancelled():
+                    raise asyncio.CancelledError("任务已被取消")
+                if flight.task.cancelled():
+                    # 工作因其他等待方取消而中止，本调用方仍需要结果：重新发起
+                    continue
+                return flight.task.result()
+            finally:
+                dropped.cancel()
+                flight.leave(waiter_id)
+                if not flight.waiters and not flight.task.done():
+                    flight.close()
+                    flight.task.cancel()
+
+    async def _execute(self, key: Hashable, flight: Flight, work: Callable[[Flight], Awaitable[T]]) -> T:
+        watcher = asyncio.create_task(self._watch(flight))
+        try:
+            return await work(flight)
+        finally:
+            watcher.cancel()
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    @staticmethod
+    async def _watch(flight: Flight) -> None:
+        """定时检查等待方是否都已取消（工作长时间不发布事件时也能及时停止）"""
+        while not flight.poll():
+            await asyncio.sleep(POLL_INTERVAL)
+
+    async def drain(self, timeout: float) -> None:
+        """等待进行中的工作结束（服务关闭时，让被取消的工作完成清理、写出检查点）"""
+        pending = [flight.task for flight in self._flights.values() if not flight.task.done()]
+        if pending:
+            await asyncio.wait(pending, timeout=timeout)
+
+    def stats(self) -> dict:
+        return {"in_flight": len(self._flights), "started": self.started, "joined": self.joined}
+
+
+# 下载、字幕提取、转录共用，key 的第一项区分工作类型
+media_flights = SingleFlight()
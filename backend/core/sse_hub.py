@@ -0,0 +1,311 @@
+"""
+SSE 广播中心 — 每次更新只序列化一次，按订阅者有界缓冲分发
+
+协议（v2）：每帧带单调递增的 seq，SSE id 为 "<epoch>:<seq>"
+    {"v": 2, "seq": n, "type": "snapshot", "fields": {...}, "artifacts": {...}}
+    {"v": 2, "seq": n, "type": "delta", "fields": {...}, "removed": [...], "artifacts": {...}}
+- delta 只包含相对上一帧发生变化的字段
+- 大字段（转录稿、摘要、思维导图等）不直接推送，只在 artifacts 中给出引用（url + size），
+  客户端按需通过内容接口拉取一次
+- 客户端重连时带上 Last-Event-ID，从回放缓冲区补发之后的帧；无法补发时发送 snapshot
+- 临时事件（如转录中的部分片段）不写入任务状态：
+    {"v": 2, "seq": n, "type": "event", "event": "transcript_segment", "data": {...}}
+
+订阅者：
+- 每个订阅者一个小的有界缓冲区；缓冲满时优先丢弃最旧的临时事件帧，
+  否则把最旧的进度帧合并进下一帧（后来的状态覆盖先前的状态）
+- 终态帧（completed / error / cancelled）不受容量限制，一定会送达
+- publish 是同步的，不会因为某个卡住的浏览器标签页而阻塞任务协程
+- 订阅者在连接关闭时自行注销，无需定时清理
+- 没有订阅者时 publish 不生成帧也不新建通道；任务结束后由调用方 forget 释放通道
+"""
+import asyncio
+import json
+import logging
+import uuid
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+PROTOCOL_VERSION = 2
+TERMINAL_STATUSES = ("completed", "error", "cancelled")
+# 按引用下发的大字段
+ARTIFACT_FIELDS = ("script", "raw_script", "summary", "mindmap", "translation", "transcript")
+
+
+class Frame:
+    """一帧事件：创建时序列化一次，之后所有订阅者共享同一个字符串（不再引用任务状态中的对象）"""
+
+    __slots__ = ("seq", "type", "terminal", "message")
+
+    def __init__(self, seq: int, payload: dict, terminal: bool):
+        self.seq = seq
+        self.type = payload.get("type")
+        self.terminal = terminal
+        self.message = json.dumps(payload, ensure_ascii=False)
+
+    @property
+    def is_event(self) -> bool:
+        return self.type == "event"
+
+    def merged_into(self, newer: "Frame") -> "Frame":
+        """把本帧合并到更新的一帧之前，返回合并结果（newer 的值优先）"""
+        if newer.type == "snapshot":
+            return newer
+        # 只在慢订阅者的缓冲区满时发生：从已序列化的消息还原，合并的是发布当时的内容
+        older, latest = json.loads(self.message), json.loads(newer.message)
+        fields = {**older.get("fields", {}), **latest.get("fields", {})}
+        artifacts = {**older.get("artifacts", {}), **latest.get("artifacts", {})}
+        removed = [
+            k for k in dict.fromkeys(older.get("removed", []) + latest.get("removed", []))
+            if k not in fields and k not in artifacts
+        ]
+        for k in latest.get("removed", []):
+            fields.pop(k, None)
+            artifacts.pop(k, None)
+        payload = {**latest, "type": older.get("type", "delta"), "fields": fields}
+        if artifacts:
+            payload["artifacts"] = artifacts
+        if removed:
+            payload["removed"] = removed
+        else:
+            payload.pop("removed", None)
+        return Frame(newer.seq, payload, newer.terminal)
+
+
+class Subscriber:
+    """单个 SSE 连接的有界帧缓冲"""
+
+    def __init__(self, task_id: str, maxsize: int):
+        self.task_id = task_id
+        self.maxsize = max(1, maxsize)
+        self.dropped = 0
+        self._buffer: Deque[Frame] = deque()
+        self._ready = asyncio.Event()
+
+    def offer(self, frame: Frame) -> int:
+        """放入一帧，返回因合并而丢弃的旧帧数量"""
+        self._buffer.append(frame)
+        dropped = 0
+        while sum(1 for f in self._buffer if not f.terminal) > self.maxsize:
+            self._coalesce_oldest()
+            dropped += 1
+        self.dropped += dropped
+        self._ready.set()
+        return dropped
+
+    def _coalesce_oldest(self) -> None:
+        # 临时事件可以丢：最终结果会以 artifact 的形式随状态帧下发
+        for i, frame in enumerate(self._buffer):
+            if frame.is_event:
+                del self._buffer[i]
+                return
+        for i, frame in enumerate(self._buffer):
+            if not frame.terminal and i + 1 < len(self._buffer):
+                self._buffer[i + 1] = frame.merged_into(self._buffer[i + 1])
+                del self._buffer[i]
+                return
+
+    async def get(self, timeout: float) -> Optional[Frame]:
+        """取下一帧；超时返回 None（用于发送心跳）"""
+        if not self._buffer:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        return self._buffer.popleft()
+
+
+class Channel:
+    """单个任务的广播状态：序号、上一帧的字段版本号、回放缓冲区、订阅者"""
+
+    def __init__(self, replay_size: int, seq: int):
+        self.seq = seq
+        self.last: Dict[str, int] = {}
+        self.replay: Deque[Frame] = deque(maxlen=replay_size)
+        self.subscribers: Set[Subscriber] = set()
+        self.closed = False
+
+
+class SSEHub:
+    """按任务分组的广播通道 + 全局计数"""
+
+    def __init__(self, buffer_size: int = 8, replay_size: int = 64):
+        self.buffer_size = buffer_size
+        self.replay_size = replay_size
+        self.epoch = uuid.uuid4().hex[:8]
+        self._channels: Dict[str, Channel] = {}
+        # 已分配过的最大序号（所有通道）：新建的通道从更大的序号开始，
+        # 通道释放后重建时，旧连接带来的 Last-Event-ID 不会被误认为已是最新
+        self._issued = 0
+        self.published = 0
+        self.queued = 0
+        self.dropped = 0
+        self.total_subscriptions = 0
+
+    def _channel(self, task_id: str) -> Channel:
+        channel = self._channels.get(task_id)
+        if channel is None:
+            self._issued += 1
+            channel = self._channels[task_id] = Channel(self.replay_size, self._issued)
+        return channel
+
+    def _next_seq(self, channel: Channel) -> int:
+        channel.seq += 1
+        self._issued = max(self._issued, channel.seq)
+        return channel.seq
+
+    # ── 订阅 ──────────────────────────────────────────
+    def subscribe(self, task_id: str) -> Subscriber:
+        sub = Subscriber(task_id, self.buffer_size)
+        channel = self._channel(task_id)
+        channel.subscribers.add(sub)
+        self.total_subscriptions += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        channel = self._channels.get(sub.task_id)
+        if channel is None:
+            return
+        channel.subscribers.discard(sub)
+        if channel.closed and not channel.subscribers:
+            del self._channels[sub.task_id]
+
+    def forget(self, task_id: str) -> None:
+        """任务从内存移除后释放其广播状态（仍有连接时等最后一个连接关闭）"""
+        channel = self._channels.get(task_id)
+        if channel is None:
+            return
+        if channel.subscribers:
+            channel.closed = True
+        else:
+            del self._channels[task_id]
+
+    def subscriber_count(self, task_id: Optional[str] = None) -> int:
+        if task_id is not None:
+            channel = self._channels.get(task_id)
+            return len(channel.subscribers) if channel else 0
+        return sum(len(c.subscribers) for c in self._channels.values())
+
+    # ── 发布 ──────────────────────────────────────────
+    def publish(self, task_id: str, task_data: dict, versions: Dict[str, int]) -> int:
+        """
+        计算相对上一帧的增量，序列化一次并分发给所有订阅者，返回订阅者数
+
+        versions 为各字段的版本号（字段每次被写入时递增），按版本号判断字段是否变化，
+        不比较字段内容。没有订阅者时只推进序号和版本记录，不生成帧；
+        之后连接的客户端回放不到中间的帧，会收到 snapshot。
+        """
+        channel = self._channels.get(task_id)
+        if channel is None:
+            return 0
+        current = dict(versions)
+        if not channel.subscribers:
+            self._next_seq(channel)
+            channel.last = current
+            return 0
+
+        fields, artifacts, removed = {}, {}, []
+        for key, value in task_data.items():
+            version = current.get(key)
+            if version is not None and channel.last.get(key) == version:
+                continue
+            if key in ARTIFACT_FIELDS and isinstance(value, str) and value:
+                artifacts[key] = self.artifact_ref(task_id, key, value)
+            else:
+                fields[key] = value
+        for key in channel.last:
+            if key not in task_data:
+                removed.append(key)
+        channel.last = current
+
+        seq = self._next_seq(channel)
+        payload = {"v": PROTOCOL_VERSION, "seq": seq, "type": "delta", "fields": fields}
+        if artifacts:
+            payload["artifacts"] = artifacts
+        if removed:
+            payload["removed"] = removed
+        frame = Frame(seq, payload, task_data.get("status") in TERMINAL_STATUSES)
+        channel.replay.append(frame)
+        self.published += 1
+
+        for sub in channel.subscribers:
+            self.dropped += sub.offer(frame)
+            self.queued += 1
+        return len(channel.subscribers)
+
+    def publish_event(self, task_id: str, event: str, data: dict) -> int:
+        """发布一条临时事件（不进入任务状态、不参与增量计算），返回订阅者数"""
+        channel = self._channels.get(task_id)
+        if channel is None or not channel.subscribers:
+            return 0
+        # 事件同样占用序号并进入回放缓冲区，保证重连补发时序号连续
+        seq = self._next_seq(channel)
+        frame = Frame(seq, self._event_payload(seq, event, data), False)
+        channel.replay.append(frame)
+        self.published += 1
+        for sub in channel.subscribers:
+            self.dropped += sub.offer(frame)
+            self.queued += 1
+        return len(channel.subscribers)
+
+    @staticmethod
+    def _event_payload(seq: int, event: str, data: dict) -> dict:
+        return {"v": PROTOCOL_VERSION, "seq": seq, "type": "event", "event": event, "data": data}
+
+    def snapshot(self, task_id: str, task_data: dict, versions: Dict[str, int]) -> Frame:
+        """当前完整状态（大字段同样按引用），seq 为通道当前序号"""
+        channel = self._channel(task_id)
+        if not channel.last:
+            # 新建的通道：之后的增量相对这份完整状态计算
+            channel.last = dict(versions)
+        fields, artifacts = {}, {}
+        for key, value in task_data.items():
+            if key in ARTIFACT_FIELDS and isinstance(value, str) and value:
+                artifacts[key] = self.artifact_ref(task_id, key, value)
+            else:
+                fields[key] = value
+        payload = {
+            "v": PROTOCOL_VERSION, "seq": channel.seq, "type": "snapshot",
+            "fields": fields, "artifacts": artifacts,
+        }
+        return Frame(channel.seq, payload, task_data.get("status") in TERMINAL_STATUSES)
+
+    def replay_since(self, task_id: str, last_event_id: Optional[str]) -> Optional[List[Frame]]:
+        """返回 last_event_id 之后的帧；无法从回放缓冲区补齐时返回 None（应改发 snapshot）"""
+        seq = self.parse_event_id(last_event_id)
+        channel = self._channels.get(task_id)
+        if seq is None or channel is None or seq > channel.seq:
+            return None
+        frames = [f for f in channel.replay if f.seq > seq]
+        expected = channel.seq - seq
+        if len(frames) != expected:
+            return None
+        return frames
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        if not event_id:
+            return None
+        epoch, _, seq = event_id.partition(":")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def event_id(self, frame: Frame) -> str:
+        return f"{self.epoch}:{frame.seq}"
+
+    @staticmethod
+    def artifact_ref(task_id: str, field: str, value: str) -> dict:
+        return {"url": f"/api/tasks/{task_id}/content?field={field}", "size": len(value)}
+
+    def stats(self) -> dict:
+        return {
+            "channels": len(self._channels),
+            "subscribers": self.subscriber_count(),
+            "total_subscriptions": self.total_subscriptions,
+            "published": self.published,
+            "queued": self.queued,
+            "dropped": self.dropped,
+        }
@@ -1,15 +1,16 @@
 """
 应用状态管理 — 任务状态、SSE连接、全局服务实例（lazy init）
 """
-import json
+import itertools
 import re
 import logging
-import threading
 from pathlib import Path
-from typing import Dict, Set, List
-from datetime import datetime
+from typing import Dict, Set
 
 from backend.config.settings import get_settings
+from backend.core.task_journal import TaskJournal
+from backend.core.sse_hub import SSEHub, TERMINAL_STATUSES
+from backend.core.artifact_index import artifact_index
 
 logger = logging.getLogger(__name__)
 
@@ -19,14 +20,32 @@ TEMP_DIR = PROJECT_ROOT / "temp"
 TEMP_DIR.mkdir(exist_ok=True)
 
 TASKS_FILE = TEMP_DIR / "tasks.json"
-tasks_lock = threading.Lock()
+TASKS_JOURNAL_FILE = TEMP_DIR / "tasks.journal"
 
 # ── 全局状态 ──────────────────────────────────────────
 tasks: Dict = {}
 processing_urls: Set[str] = set()
 active_tasks: Dict = {}
-sse_connections: Dict[str, List] = {}
-sse_connection_last_activity: Dict[str, datetime] = {}
+_shutting_down = False
+sse_hub = SSEHub(
+    buffer_size=get_settings().SSE_SUBSCRIBER_BUFFER,
+    replay_size=get_settings().SSE_REPLAY_EVENTS,
+)
+# 任务各字段的版本号：字段被写入时递增，SSE 广播据此判断字段是否变化，不必比较或序列化字段内容
+_field_versions: Dict[str, Dict[str, int]] = {}
+_version_counter = itertools.count(1)
+
+
+
+def mark_shutting_down() -> None:
+    """服务关闭开始：此后被取消的任务视为中断（保留状态与转录检查点），而非用户取消"""
+    global _shutting_down
+    _shutting_down = True
+
+
+def is_shutting_down() -> bool:
+    return _shutting_down
+
 
 # ── 服务实例 (lazy init) ─────────────────────────────
 _video_preview_service = None
@@ -74,73 +93,88 @@ def get_video_search_agent():
 
 
 # ── 任务持久化 ────────────────────────────────────────
-def load_tasks() -> Dict:
-    try:
-        if TASKS_FILE.exists():
-            with open(TASKS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-    except Exception:
-        pass
-    return {}
+def _create_task_journal() -> TaskJournal:
+    settings = get_settings()
+    return TaskJournal(
+        TASKS_FILE,
+        TASKS_JOURNAL_FILE,
+        tasks,
+        backup_dir=TEMP_DIR / "backups",
+        backup_count=settings.TASK_BACKUP_COUNT,
+        compact_records=settings.TASK_JOURNAL_COMPACT_RECORDS,
+        compact_bytes=settings.TASK_JOURNAL_COMPACT_BYTES,
+    )
 
 
-_last_backup_time: datetime | None = None
+_task_journal = _create_task_journal()
 
 
-def save_tasks(tasks_data: Dict) -> None:
-    global _last_backup_time
-    try:
-        with tasks_lock:
-            temp_file = TASKS_FILE.with_suffix(".tmp")
-            with open(temp_file, "w", encoding="utf-8") as f:
-                json.dump(tasks_data, f, ensure_ascii=False, indent=2)
-            temp_file.replace(TASKS_FILE)
-
-            now = datetime.now()
-            if _last_backup_time and (now - _last_backup_time).total_seconds() < 30:
-                return
-            _last_backup_time = now
-
-            backup_dir = TEMP_DIR / "backups"
-            backup_dir.mkdir(exist_ok=True)
-            timestamp = now.strftime("%Y%m%d_%H%M%S")
-            backup_file = backup_dir / f"tasks_{timestamp}.json"
-
-            import shutil
-            shutil.copy2(TASKS_FILE, backup_file)
-
-            backups = sorted(
-                backup_dir.glob("tasks_*.json"),
-                key=lambda p: p.stat().st_mtime,
-                reverse=True,
-            )
-            for old_backup in backups[3:]:
-                old_backup.unlink()
+def put_task(task_id: str, task_data: dict) -> None:
+    """新建/整体替换任务（写入一条 put 日志）"""
+    _task_journal.put(task_id, task_data)
+    _field_versions[task_id] = {key: next(_version_counter) for key in task_data}
+
 
+def update_task(task_id: str, fields: dict) -> dict:
+    """更新任务字段（只记录本次变更的字段），返回更新后的任务 dict"""
+    previous = tasks.get(task_id, {})
+    task = _task_journal.update(task_id, fields)
+    versions = _field_versions.setdefault(task_id, {})
+    for key, value in fields.items():
+        # 同一个对象或相同的标量值（重复的进度消息等）不算变化
+        if key in previous and (
+            previous[key] is value
+            or (isinstance(value, (str, int, float, bool, type(None))) and previous[key] == value)
+        ):
+            continue
+        versions[key] = next(_version_counter)
+    return task
+
+
+def field_versions(task_id: str) -> Dict[str, int]:
+    """任务各字段的版本号（从日志恢复、尚未写入过的字段在此补上）"""
+    versions = _field_versions.setdefault(task_id, {})
+    for key in tasks.get(task_id, ()):
+        if key not in versions:
+            versions[key] = next(_version_counter)
+    return versions
+
+
+def remove_task(task_id: str) -> bool:
+    """从内存和持久化状态中删除任务"""
+    sse_hub.forget(task_id)
+    _field_versions.pop(task_id, None)
+    return _task_journal.delete(task_id)
+
+
+def compact_tasks() -> None:
+    """立即把内存任务状态压缩为 tasks.json 快照"""
+    try:
+        _task_journal.compact()
     except Exception as e:
         logger.error(f"保存任务状态失败: {e}")
 
 
+def close_task_journal() -> None:
+    """关闭时停止后台压缩线程并写出最终快照"""
+    _task_journal.close()
+
+
 # ── SSE 广播 ──────────────────────────────────────────
 async def broadcast_task_update(task_id: str, task_data: dict) -> None:
+    subscribers = sse_hub.publish(task_id, task_data, field_versions(task_id))
     logger.debug(
         f"广播任务更新: {task_id}, 状态: {task_data.get('status')}, "
-        f"连接数: {len(sse_connections.get(task_id, []))}"
+        f"连接数: {subscribers}"
     )
-    if task_id in sse_connections:
-        connections_to_remove = []
-        for queue in sse_connections[task_id]:
-            try:
-                await queue.put(json.dumps(task_data, ensure_ascii=False))
-            except Exception as e:
-                logger.warning(f"发送消息到队列失败: {e}")
-                connections_to_remove.append(queue)
+    if task_data.get("status") in TERMINAL_STATUSES:
+        # 任务结束（笔记、问答、思维导图等各类任务）后释放广播通道，之后连接的客户端收到 snapshot
+        sse_hub.forget(task_id)
 
-        for queue in connections_to_remove:
-            sse_connections[task_id].remove(queue)
 
-        if not sse_connections[task_id]:
-            del sse_connections[task_id]
+def publish_task_event(task_id: str, event: str, data: dict) -> None:
+    """推送临时事件（如部分转录片段），不修改任务状态，也不写任务日志"""
+    sse_hub.publish_event(task_id, event, data)
 
 
 # ── 工具函数 ──────────────────────────────────────────
@@ -179,13 +213,13 @@ def validate_download_filename(filename: str) -> bool:
 
 
 # ── 启动时加载 ────────────────────────────────────────
-tasks.update(load_tasks())
+_task_journal.load()
+_task_journal.start()
 
 
 # ── SQLite 持久化（已完成任务） ────────────────────────
 async def persist_completed_task(task_id: str, task_data: dict) -> None:
     """将已完成任务写入 SQLite，然后从内存 dict 中移除"""
-    import re
     from backend.services.note_repository import save_note
 
     short_id = task_data.get("short_id") or task_id.replace("-", "")[:6]
@@ -197,16 +231,8 @@ async def persist_completed_task(task_id: str, task_data: dict) -> None:
     has_transcript = bool(task_data.get("script") or task_data.get("raw_script") or task_data.get("transcript"))
     batch_id = task_data.get("batch_id")
 
-    # 扫描文件系统找对应的 .md 文件
-    note_file_re = re.compile(
-        r"^(summary|transcript|raw|mindmap|translation)_(.+)_" + re.escape(short_id) + r"\.md$"
-    )
-    files: dict[str, str] = {}
-    for f in TEMP_DIR.iterdir():
-        if f.is_file() and f.suffix == ".md":
-            match = note_file_re.match(f.name)
-            if match:
-                files[match.group(1)] = f.name
+    # 从笔记文件索引取对应的 .md 文件
+    files = artifact_index.files(short_id)
 
     try:
         await save_note(
@@ -224,10 +250,18 @@ async def persist_completed_task(task_id: str, task_data: dict) -> None:
             has_transcript=has_transcript,
             batch_id=batch_id,
         )
+        try:
+            from backend.services.note_search import index_note
+            await index_note(
+                short_id,
+                title=title,
+                summary=task_data.get("summary") or "",
+                transcript=task_data.get("script") or task_data.get("raw_script") or task_data.get("transcript") or "",
+            )
+        except Exception as e:
+            logger.warning(f"写入全文索引失败 {short_id}: {e}")
         # 从内存 dict 移除已持久化的任务
-        if task_id in tasks:
-            del tasks[task_id]
-            save_tasks(tasks)
+        remove_task(task_id)
         logger.info(f"任务 {short_id} 已持久化到 SQLite")
     except Exception as e:
         logger.error(f"持久化任务 {short_id} 失败: {e}")
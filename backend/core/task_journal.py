@@ -0,0 +1,263 @@
+"""
+任务状态日志 — 增量记录追加写入 + 后台线程压缩为快照
+
+每次进度更新只向 journal 追加一行增量记录（O(变更字段大小)），
+后台线程在记录数/字节数超过阈值时把内存状态写成 tasks.json 快照并丢弃旧日志。
+启动时按「快照 → 轮转日志 → 当前日志」顺序回放恢复状态。
+
+state 中的任务 dict 写入后不再原地修改：update 生成新的任务 dict 替换旧的，
+字段里的列表 / 字典也存一份浅拷贝。压缩时持锁只需浅拷贝一层 state，序列化在锁外进行。
+
+记录格式（每行一个 JSON）：
+    {"op": "put", "id": task_id, "data": {...}}     整条任务写入
+    {"op": "set", "id": task_id, "fields": {...}}   字段增量更新
+    {"op": "del", "id": task_id}                    删除任务
+"""
+import json
+import logging
+import shutil
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _own(fields: dict) -> dict:
+    """拷贝一层字段：调用方之后修改自己传入的列表 / 字典，不会影响 state 和快照"""
+    return {
+        key: value.copy() if isinstance(value, (list, dict)) else value
+        for key, value in fields.items()
+    }
+
+
+class TaskJournal:
+    """追加写入的任务状态日志，维护并持久化传入的 state dict"""
+
+    def __init__(
+        self,
+        snapshot_path: Path,
+        journal_path: Path,
+        state: Dict,
+        backup_dir: Optional[Path] = None,
+        backup_count: int = 3,
+        compact_records: int = 500,
+        compact_bytes: int = 8 * 1024 * 1024,
+        compact_interval: float = 60.0,
+    ):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.rotated_path = journal_path.with_name(journal_path.name + ".1")
+        self.state = state
+        self.backup_dir = backup_dir
+        self.backup_count = backup_count
+        self.compact_records = compact_records
+        self.compact_bytes = compact_bytes
+        self.compact_interval = compact_interval
+
+        self._lock = threading.Lock()
+        self._compact_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fh = None
+        self._pending_records = 0
+        self._pending_bytes = 0
+        self._last_backup_time: Optional[datetime] = None
+
+    # ── 启动恢复 ──────────────────────────────────────
+    def load(self) -> Dict:
+        """回放快照 + 日志到 state，返回 state"""
+        snapshot: Dict = {}
+        try:
+            if self.snapshot_path.exists():
+                with open(self.snapshot_path, "r", encoding="utf-8") as f:
+                    snapshot = json.load(f)
+        except Exception as e:
+            logger.error(f"读取任务快照失败: {e}")
+
+        replayed = 0
+        for path in (self.rotated_path, self.journal_path):
+            replayed += self._replay(path, snapshot)
+
+        self.state.clear()
+        self.state.update(snapshot)
+
+        if replayed:
+            logger.info(f"任务日志回放完成: {replayed} 条记录, {len(self.state)} 个任务")
+            self.compact()
+        return self.state
+
+    def _replay(self, path: Path, target: Dict) -> int:
+        if not path.exists():
+            return 0
+        count = 0
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # 崩溃时最后一行可能只写了一半
+                    logger.warning(f"跳过损坏的任务日志记录: {path.name}")
+                    continue
+                self._apply(target, record)
+                count += 1
+        return count
+
+    @staticmethod
+    def _apply(target: Dict, record: dict) -> None:
+        op = record.get("op")
+        task_id = record.get("id")
+        if not task_id:
+            return
+        if op == "put":
+            target[task_id] = record.get("data") or {}
+        elif op == "set":
+            target.setdefault(task_id, {}).update(record.get("fields") or {})
+        elif op == "del":
+            target.pop(task_id, None)
+
+    # ── 增量写入 ──────────────────────────────────────
+    def put(self, task_id: str, data: dict) -> None:
+        with self._lock:
+            self.state[task_id] = _own(data)
+            self._append({"op": "put", "id": task_id, "data": data})
+
+    def update(self, task_id: str, fields: dict) -> dict:
+        with self._lock:
+            # 写时复制：替换任务 dict 而不是原地修改，压缩线程持有的旧 dict 保持不变
+            task = {**self.state[task_id], **_own(fields)}
+            self.state[task_id] = task
+            self._append({"op": "set", "id": task_id, "fields": fields})
+            return task
+
+    def delete(self, task_id: str) -> bool:
+        with self._lock:
+            if task_id not in self.state:
+                return False
+            del self.state[task_id]
+            self._append({"op": "del", "id": task_id})
+            return True
+
+    def _append(self, record: dict) -> None:
+        try:
+            line = json.dumps(record, ensure_ascii=False) + "\n"
+            if self._fh is None:
+                self._fh = open(self.journal_path, "a", encoding="utf-8")
+            self._fh.write(line)
+            self._fh.flush()
+        except Exception as e:
+            logger.error(f"写入任务日志失败: {e}")
+            return
+
+        self._pending_records += 1
+        self._pending_bytes += len(line)
+        if self._pending_records >= self.compact_records or self._pending_bytes >= self.compact_bytes:
+            self._wake.set()
+
+    # ── 压缩 ──────────────────────────────────────────
+    def compact(self) -> None:
+        """把当前 state 写成快照并丢弃已包含在快照中的日志"""
+        with self._compact_lock:
+            with self._lock:
+                # 任务 dict 只会被整体替换（见 update），持锁浅拷贝一层即可，耗时只与任务数有关
+                snapshot = dict(self.state)
+                self._rotate()
+
+            try:
+                temp_file = self.snapshot_path.with_suffix(".tmp")
+                with open(temp_file, "w", encoding="utf-8") as f:
+                    # 逐个任务序列化：json.dumps 整体执行期间不释放 GIL，按任务切分让事件循环能插进来
+                    f.write("{")
+                    for index, (task_id, task) in enumerate(snapshot.items()):
+                        if index:
+                            f.write(",\n")
+                        f.write(json.dumps(task_id, ensure_ascii=False))
+                        f.write(": ")
+                        f.write(json.dumps(task, ensure_ascii=False))
+                    f.write("}")
+                temp_file.replace(self.snapshot_path)
+                self.rotated_path.unlink(missing_ok=True)
+            except Exception as e:
+                logger.error(f"保存任务快照失败: {e}")
+                return
+
+            self._backup()
+
+    def _rotate(self) -> None:
+        """（持锁调用）把当前日志移到轮转文件，后续记录写入新日志"""
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if self.journal_path.exists():
+            if self.rotated_path.exists():
+                # 上次压缩失败遗留的轮转日志：合并，保证快照写成功前记录不丢
+                with open(self.rotated_path, "a", encoding="utf-8") as dst, \
+                        open(self.journal_path, "r", encoding="utf-8") as src:
+                    shutil.copyfileobj(src, dst)
+                self.journal_path.unlink()
+            else:
+                self.journal_path.replace(self.rotated_path)
+        self._pending_records = 0
+        self._pending_bytes = 0
+
+    def _backup(self) -> None:
+        if self.backup_dir is None:
+            return
+        now = datetime.now()
+        if self._last_backup_time and (now - self._last_backup_time).total_seconds() < 30:
+            return
+        self._last_backup_time = now
+        try:
+            self.backup_dir.mkdir(exist_ok=True)
+            timestamp = now.strftime("%Y%m%d_%H%M%S")
+            shutil.copy2(self.snapshot_path, self.backup_dir / f"tasks_{timestamp}.json")
+
+            backups = sorted(
+                self.backup_dir.glob("tasks_*.json"),
+                key=lambda p: p.stat().st_mtime,
+                reverse=True,
+            )
+            for old_backup in backups[self.backup_count:]:
+                old_backup.unlink()
+        except Exception as e:
+            logger.warning(f"备份任务快照失败: {e}")
+
+    # ── 后台线程 ──────────────────────────────────────
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="task-journal-compactor", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wake.wait(timeout=self.compact_interval)
+            self._wake.clear()
+            if self._stopped.is_set():
+                break
+            if self._pending_records:
+                try:
+                    self.compact()
+                except Exception as e:
+                    logger.error(f"任务日志压缩失败: {e}")
+
+    def close(self) -> None:
+        """停止后台线程并写出最终快照"""
+        self._stopped.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+        if self._pending_records:
+            self.compact()
+        with self._lock:
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
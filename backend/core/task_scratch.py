@@ -0,0 +1,32 @@
+"""
+任务临时目录 — 每个任务的中间文件放在 temp/scratch/{task_id}/，任务结束时整体删除
+
+字幕下载文件、转录检查点，以及关闭音频缓存时下载的音频都写在任务自己的目录里，
+清理只影响本任务，不会误删其他正在运行的任务的文件。
+可在任务之间复用的音频放在共享的音频缓存中（见 audio_cache），不随任务删除。
+"""
+import shutil
+from pathlib import Path
+from typing import List
+
+from backend.config.settings import get_settings
+
+
+def scratch_dir(task_id: str, create: bool = False) -> Path:
+    path = get_settings().TASK_SCRATCH_DIR / task_id
+    if create:
+        path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def list_task_ids() -> List[str]:
+    """有临时目录的任务 ID"""
+    root = get_settings().TASK_SCRATCH_DIR
+    if not root.exists():
+        return []
+    return [d.name for d in root.iterdir() if d.is_dir()]
+
+
+def discard(task_id: str) -> None:
+    """删除任务临时目录（含检查点与任务自己下载的文件）"""
+    shutil.rmtree(scratch_dir(task_id), ignore_errors=True)
@@ -1,11 +1,18 @@
 """
 数据库连接管理 — aiosqlite 连接池
+
+- 1 个专用写连接（asyncio.Lock 串行化），get_db() 返回它
+- N 个只读连接（WAL 模式下可与写并发），get_read_db() 从池中借出
+- 每个连接只在创建时执行一次 PRAGMA，之后一直复用（每个 aiosqlite 连接占一个线程）
 """
+import asyncio
 import logging
 from contextlib import asynccontextmanager
+from typing import List, Optional
 
 import aiosqlite
 
+from backend.config.settings import get_settings
 from backend.core.state import TEMP_DIR
 
 logger = logging.getLogger(__name__)
@@ -13,14 +20,115 @@ logger = logging.getLogger(__name__)
 DB_PATH = TEMP_DIR / "vinote.db"
 
 
+class ConnectionPool:
+    """单写多读的 aiosqlite 连接池"""
+
+    def __init__(self, path, readers: int = 4, mmap_size: int = 256 * 1024 * 1024, cache_size_kb: int = 16 * 1024):
+        self.path = str(path)
+        self.max_readers = max(1, readers)
+        self.mmap_size = mmap_size
+        self.cache_size_kb = cache_size_kb
+
+        self._writer: Optional[aiosqlite.Connection] = None
+        # 写代数：每次写连接产生改动后 +1，供查询结果缓存判断是否失效
+        self.write_generation = 0
+        self._write_lock = asyncio.Lock()
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._readers: List[aiosqlite.Connection] = []
+        self._open_lock = asyncio.Lock()
+
+    async def _connect(self, read_only: bool) -> aiosqlite.Connection:
+        db = await aiosqlite.connect(self.path)
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA foreign_keys=ON")
+        await db.execute("PRAGMA synchronous=NORMAL")
+        await db.execute("PRAGMA busy_timeout=5000")
+        await db.execute(f"PRAGMA mmap_size={int(self.mmap_size)}")
+        await db.execute(f"PRAGMA cache_size=-{int(self.cache_size_kb)}")
+        if read_only:
+            await db.execute("PRAGMA query_only=ON")
+        return db
+
+    @asynccontextmanager
+    async def writer(self):
+        async with self._write_lock:
+            if self._writer is None:
+                self._writer = await self._connect(read_only=False)
+            db = self._writer
+            changes_before = db.total_changes
+            try:
+                yield db
+            finally:
+                # 调用方未提交（异常或遗漏）时回滚，避免把半截事务带给下一个使用者
+                if db.in_transaction:
+                    await db.rollback()
+                if db.total_changes != changes_before:
+                    self.write_generation += 1
+
+    @asynccontextmanager
+    async def reader(self):
+        db = await self._acquire_reader()
+        try:
+            yield db
+        finally:
+            if db.in_transaction:
+                await db.rollback()
+            self._idle.put_nowait(db)
+
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        if self._idle.empty() and len(self._readers) < self.max_readers:
+            async with self._open_lock:
+                if self._idle.empty() and len(self._readers) < self.max_readers:
+                    db = await self._connect(read_only=True)
+                    self._readers.append(db)
+                    return db
+        return await self._idle.get()
+
+    async def close(self) -> None:
+        async with self._write_lock:
+            if self._writer is not None:
+                await self._writer.close()
+                self._writer = None
+        for db in self._readers:
+            await db.close()
+        self._readers.clear()
+        self._idle = asyncio.Queue()
+
+
+_pool: Optional[ConnectionPool] = None
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        settings = get_settings()
+        _pool = ConnectionPool(
+            DB_PATH,
+            readers=settings.DB_READ_POOL_SIZE,
+            mmap_size=settings.DB_MMAP_SIZE,
+            cache_size_kb=settings.DB_CACHE_SIZE_KB,
+        )
+    return _pool
+
+
 @asynccontextmanager
 async def get_db():
-    """获取 aiosqlite 数据库连接（async context manager）"""
-    db = await aiosqlite.connect(str(DB_PATH))
-    db.row_factory = aiosqlite.Row
-    await db.execute("PRAGMA journal_mode=WAL")
-    await db.execute("PRAGMA foreign_keys=ON")
-    try:
+    """获取写连接（async context manager，同一时刻只有一个持有者）"""
+    async with get_pool().writer() as db:
+        yield db
+
+
+@asynccontextmanager
+async def get_read_db():
+    """获取只读连接（async context manager）"""
+    async with get_pool().reader() as db:
         yield db
-    finally:
-        await db.close()
+
+
+async def close_db() -> None:
+    """关闭连接池中的所有连接"""
+    global _pool
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
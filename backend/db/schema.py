@@ -3,7 +3,6 @@
 """
 import json
 import logging
-import re
 
 from backend.db.connection import get_db, DB_PATH
 from backend.core.state import TEMP_DIR
@@ -61,8 +60,12 @@ CREATE TABLE IF NOT EXISTS note_tags (
 
 CREATE INDEX IF NOT EXISTS idx_notes_short_id ON notes(short_id);
 CREATE INDEX IF NOT EXISTS idx_notes_category_id ON notes(category_id);
-CREATE INDEX IF NOT EXISTS idx_notes_created_at ON notes(created_at);
-CREATE INDEX IF NOT EXISTS idx_notes_title ON notes(title);
+-- keyset 分页：每种排序方式一个 (排序键, id) 复合索引
+DROP INDEX IF EXISTS idx_notes_created_at;
+DROP INDEX IF EXISTS idx_notes_title;
+CREATE INDEX IF NOT EXISTS idx_notes_created_at_id ON notes(created_at, id);
+CREATE INDEX IF NOT EXISTS idx_notes_title_id ON notes(title, id);
+CREATE INDEX IF NOT EXISTS idx_notes_completed_at_id ON notes(COALESCE(completed_at, ''), id);
 """
 
 
@@ -78,6 +81,9 @@ async def init_db():
                 (cat_name, i),
             )
         await db.commit()
+
+        from backend.services.note_search import ensure_fts
+        await ensure_fts(db)
     logger.info(f"数据库初始化完成: {DB_PATH}")
 
 
@@ -108,21 +114,12 @@ async def migrate_from_json():
         except Exception as e:
             logger.error(f"读取 tags.json 失败: {e}")
 
-    # 同时扫描 temp 目录中的 .md 文件，补充文件系统中的笔记
-    note_file_re = re.compile(
-        r"^(summary|transcript|raw|mindmap|translation)_(.+)_([a-f0-9]{6})\.md$"
-    )
-    fs_notes: dict[str, dict] = {}  # short_id -> {files, title}
-    for f in TEMP_DIR.iterdir():
-        if not f.is_file() or f.suffix != ".md":
-            continue
-        match = note_file_re.match(f.name)
-        if not match:
-            continue
-        file_type, title, short_id = match.group(1), match.group(2), match.group(3)
-        if short_id not in fs_notes:
-            fs_notes[short_id] = {"title": title.replace("_", " "), "files": {}}
-        fs_notes[short_id]["files"][file_type] = f.name
+    # 同时用笔记文件索引补充文件系统中的笔记
+    from backend.core.artifact_index import artifact_index
+    fs_notes: dict[str, dict] = {  # short_id -> {files, title}
+        short_id: {"title": safe_title.replace("_", " "), "files": files}
+        for short_id, safe_title, files in artifact_index.notes()
+    }
 
     async with get_db() as db:
         # 检查是否已迁移过（notes 表有数据就跳过）
@@ -249,6 +246,9 @@ async def migrate_from_json():
         backup = tasks_file.with_suffix(".json.migrated")
         tasks_file.rename(backup)
         logger.info(f"tasks.json → {backup.name}")
+        # tasks.json 同时是任务日志的快照，改名后立即按内存状态重写
+        from backend.core.state import compact_tasks
+        compact_tasks()
 
     if tags_file.exists():
         backup = tags_file.with_suffix(".json.migrated")
@@ -24,9 +24,10 @@ logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
 
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
-    from backend.core.lifecycle import startup_event
+    from backend.core.lifecycle import startup_event, shutdown_event
     await startup_event()
     yield
+    await shutdown_event()
 
 
 app = FastAPI(title="ViNote", version=VERSION, lifespan=lifespan)
@@ -46,7 +47,7 @@ SPA_DIR = PROJECT_ROOT / "static-build"
 if SPA_DIR.exists():
     app.mount("/assets", StaticFiles(directory=str(SPA_DIR / "assets")), name="spa-assets")
 
-from backend.routers import tasks, downloads, preview, qa, search_agent, proxy, dev_tools, mindmap, cards, storage, tags
+from backend.routers import tasks, downloads, preview, qa, search_agent, proxy, dev_tools, mindmap, cards, storage, tags, asr
 
 app.include_router(tasks.router)
 app.include_router(downloads.router)
@@ -59,17 +60,30 @@ app.include_router(mindmap.router)
 app.include_router(cards.router)
 app.include_router(storage.router)
 app.include_router(tags.router)
+app.include_router(asr.router)
 
 
 @app.get("/health")
 async def health_check():
-    from backend.core.state import tasks, active_tasks
-    from backend.core.ai_client import is_openai_available
+    from backend.core.state import tasks, active_tasks, sse_hub
+    from backend.core.ai_client import asr_models, is_openai_available
+    from backend.core.single_flight import media_flights
+    from backend.services.asr_engine import engine_stats
+    from backend.services.asr_cache import asr_cache
+    from backend.services.audio_cache import audio_cache
+    from backend.services.asr_workers import worker_stats
     return {
         "status": "ok",
         "active_tasks": len(active_tasks),
         "total_tasks": len(tasks),
         "openai_configured": is_openai_available(),
+        "sse": sse_hub.stats(),
+        "asr_engine": engine_stats(),
+        "asr_cache": asr_cache.stats(),
+        "audio_cache": audio_cache.stats(),
+        "asr_models": asr_models.stats(),
+        "asr_workers": worker_stats(),
+        "media_flights": media_flights.stats(),
     }
 
 
@@ -0,0 +1,43 @@
+"""
+ASR 运行指标 — 转录遥测（RTF / ETA）、结果缓存、模型注册表、批量引擎与工作进程状态
+"""
+import logging
+
+from fastapi import APIRouter
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api")
+
+
+@router.get("/asr/metrics")
+async def get_asr_metrics():
+    """返回进行中的转录进度与累计转录统计"""
+    from backend.core.ai_client import asr_models
+    from backend.services.asr_cache import asr_cache
+    from backend.services.asr_engine import engine_stats
+    from backend.services.asr_telemetry import asr_telemetry
+    from backend.services.asr_workers import worker_stats
+
+    return {
+        "transcriptions": asr_telemetry.snapshot(),
+        "cache": asr_cache.stats(),
+        "models": asr_models.stats(),
+        "engine": engine_stats(),
+        "workers": worker_stats(),
+    }
+
+
+@router.get("/asr/models")
+async def get_asr_models():
+    """可按请求选择的 ASR 模型及其加载状态（loading / ready / failed，未加载的不在 loaded 中）"""
+    from backend.config.ai_config import get_asr_config
+    from backend.core.ai_client import asr_models
+
+    config = get_asr_config()
+    return {
+        "provider": config.provider,
+        "default": config.model,
+        "available": config.available_models,
+        "profile": config.profile,
+        "loaded": asr_models.stats()["models"],
+    }
@@ -9,6 +9,7 @@ from fastapi.responses import FileResponse, StreamingResponse
 from backend.core.state import (
     get_video_download_service, validate_download_filename, TEMP_DIR,
 )
+from backend.core.artifact_store import artifact_store
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
@@ -111,18 +112,15 @@ async def download_file(filename: str):
             logger.warning(f"非法文件下载尝试: {filename}")
             raise HTTPException(status_code=400, detail="文件名格式无效或不安全")
 
-        file_path = (TEMP_DIR / filename).resolve()
-        temp_dir_resolved = TEMP_DIR.resolve()
+        file_path = artifact_store.resolve(filename)
+        if file_path is None:
+            raise HTTPException(status_code=404, detail="文件不存在")
 
-        if not str(file_path).startswith(str(temp_dir_resolved)):
+        temp_dir_resolved = TEMP_DIR.resolve()
+        if not str(file_path.resolve()).startswith(str(temp_dir_resolved)):
             logger.warning(f"路径遍历尝试: {filename} -> {file_path}")
             raise HTTPException(status_code=403, detail="访问被拒绝")
 
-        if not file_path.exists():
-            raise HTTPException(status_code=404, detail="文件不存在")
-        if not file_path.is_file():
-            raise HTTPException(status_code=400, detail="无效的文件")
-
         logger.info(f"文件下载: {filename}")
         return FileResponse(file_path, filename=filename, media_type="text/markdown")
     except HTTPException:
@@ -12,8 +12,9 @@ from backend.services.video_downloader import VideoDownloader
 from backend.services.audio_transcriber import AudioTranscriber
 from backend.core.state import (
     tasks, active_tasks,
-    save_tasks, broadcast_task_update, TEMP_DIR,
+    put_task, update_task, broadcast_task_update,
 )
+from backend.core import task_scratch
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
@@ -64,7 +65,7 @@ async def video_to_mindmap(
         file_ext = Path(url).suffix.lower()
         if file_ext in MEDIA_EXTENSIONS:
             task_id = str(uuid.uuid4())
-            tasks[task_id] = {
+            put_task(task_id, {
                 "status": "processing",
                 "progress": 0,
                 "message": "开始处理本地文件...",
@@ -72,23 +73,21 @@ async def video_to_mindmap(
                 "error": None,
                 "source": "local_path",
                 "file_path": url,
-            }
-            save_tasks(tasks)
+            })
             task = asyncio.create_task(_local_video_to_mindmap_task(task_id, url, language))
             active_tasks[task_id] = task
             return {"task_id": task_id}
 
     task_id = str(uuid.uuid4())
 
-    tasks[task_id] = {
+    put_task(task_id, {
         "status": "processing",
         "progress": 0,
         "message": "开始处理...",
         "mindmap": None,
         "error": None,
         "url": url,
-    }
-    save_tasks(tasks)
+    })
 
     task = asyncio.create_task(_video_to_mindmap_task(task_id, url, language))
     active_tasks[task_id] = task
@@ -99,18 +98,18 @@ async def video_to_mindmap(
 async def _video_to_mindmap_task(task_id: str, url: str, language: str):
     try:
         async def progress(pct: int, msg: str):
-            tasks[task_id].update({"progress": pct, "message": msg})
-            save_tasks(tasks)
+            update_task(task_id, {"progress": pct, "message": msg})
             await broadcast_task_update(task_id, tasks[task_id])
 
         downloader = VideoDownloader()
+        work_dir = task_scratch.scratch_dir(task_id, create=True)
         
         # 先尝试提取字幕（无需下载音频）
         await progress(5, "📄 正在检查视频字幕...")
         subtitle_text = None
         video_title = None
         try:
-            subtitle_text, video_title = await downloader.extract_subtitles(url, TEMP_DIR)
+            subtitle_text, video_title = await downloader.extract_subtitles(url)
         except Exception as e:
             logger.warning(f"字幕提取异常: {e}")
         
@@ -122,7 +121,7 @@ async def _video_to_mindmap_task(task_id: str, url: str, language: str):
         else:
             # 无字幕，下载音频并转录
             await progress(10, "🎬 无可用字幕，正在下载音频...")
-            audio_path, video_title = await downloader.download_video_audio(url, TEMP_DIR)
+            audio_path, video_title = await downloader.download_video_audio(url, work_dir)
 
             await progress(30, "🎤 正在转录音频...")
             transcriber = AudioTranscriber()
@@ -134,31 +133,29 @@ async def _video_to_mindmap_task(task_id: str, url: str, language: str):
         summarizer = ContentSummarizer()
         mindmap = await summarizer.generate_mindmap(transcript, language)
 
-        tasks[task_id].update({
+        update_task(task_id, {
             "status": "completed",
             "progress": 100,
             "message": "✨ 思维导图生成完成！",
             "mindmap": mindmap or "",
             "video_title": video_title,
         })
-        save_tasks(tasks)
         await broadcast_task_update(task_id, tasks[task_id])
 
     except asyncio.CancelledError:
         logger.info(f"思维导图任务 {task_id} 被取消")
         if task_id in tasks:
-            tasks[task_id].update({"status": "cancelled", "message": "已取消"})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "cancelled", "message": "已取消"})
             await broadcast_task_update(task_id, tasks[task_id])
 
     except Exception as e:
         logger.error(f"思维导图任务 {task_id} 失败: {e}")
-        tasks[task_id].update({"status": "error", "error": str(e), "message": f"失败: {e}"})
-        save_tasks(tasks)
+        update_task(task_id, {"status": "error", "error": str(e), "message": f"失败: {e}"})
         await broadcast_task_update(task_id, tasks[task_id])
 
     finally:
         active_tasks.pop(task_id, None)
+        task_scratch.discard(task_id)
 
 
 @router.post("/local-video-to-mindmap")
@@ -182,7 +179,7 @@ async def local_video_to_mindmap(request: Request):
             raise HTTPException(status_code=400, detail=f"不支持的文件格式: {file_ext}")
 
         task_id = str(uuid.uuid4())
-        tasks[task_id] = {
+        put_task(task_id, {
             "status": "processing",
             "progress": 0,
             "message": "开始处理本地文件...",
@@ -190,8 +187,7 @@ async def local_video_to_mindmap(request: Request):
             "error": None,
             "source": "local_path",
             "file_path": file_path,
-        }
-        save_tasks(tasks)
+        })
 
         task = asyncio.create_task(_local_video_to_mindmap_task(task_id, file_path, language))
         active_tasks[task_id] = task
@@ -205,12 +201,11 @@ async def local_video_to_mindmap(request: Request):
 
 
 async def _local_video_to_mindmap_task(task_id: str, file_path: str, language: str):
-    from backend.utils.file_handler import extract_audio_from_file, cleanup_temp_audio, extract_embedded_subtitles
+    from backend.utils.file_handler import extract_embedded_subtitles
 
     try:
         async def progress(pct: int, msg: str):
-            tasks[task_id].update({"progress": pct, "message": msg})
-            save_tasks(tasks)
+            update_task(task_id, {"progress": pct, "message": msg})
             await broadcast_task_update(task_id, tasks[task_id])
 
         video_title = Path(file_path).stem
@@ -228,43 +223,34 @@ async def _local_video_to_mindmap_task(task_id: str, file_path: str, language: s
             await progress(40, "✅ 发现内嵌字幕，跳过音频转录")
             transcript = subtitle_text
         else:
-            await progress(5, "正在提取音频...")
-            audio_path, needs_cleanup = await extract_audio_from_file(file_path, TEMP_DIR, task_id)
-
-            try:
-                await progress(30, "🎤 正在转录音频...")
-                transcriber = AudioTranscriber()
-                transcript = await transcriber.transcribe_audio(
-                    audio_path, video_title=video_title
-                )
-            finally:
-                cleanup_temp_audio(audio_path, needs_cleanup)
+            await progress(30, "🎤 正在转录音频...")
+            transcriber = AudioTranscriber()
+            transcript = await transcriber.transcribe_audio(
+                file_path, video_title=video_title
+            )
 
         await progress(80, "🧠 正在生成思维导图...")
         summarizer = ContentSummarizer()
         mindmap = await summarizer.generate_mindmap(transcript, language)
 
-        tasks[task_id].update({
+        update_task(task_id, {
             "status": "completed",
             "progress": 100,
             "message": "✨ 思维导图生成完成！",
             "mindmap": mindmap or "",
             "video_title": video_title,
         })
-        save_tasks(tasks)
         await broadcast_task_update(task_id, tasks[task_id])
 
     except asyncio.CancelledError:
         logger.info(f"本地思维导图任务 {task_id} 被取消")
         if task_id in tasks:
-            tasks[task_id].update({"status": "cancelled", "message": "已取消"})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "cancelled", "message": "已取消"})
             await broadcast_task_update(task_id, tasks[task_id])
 
     except Exception as e:
         logger.error(f"本地思维导图任务 {task_id} 失败: {e}")
-        tasks[task_id].update({"status": "error", "error": str(e), "message": f"失败: {e}"})
-        save_tasks(tasks)
+        update_task(task_id, {"status": "error", "error": str(e), "message": f"失败: {e}"})
         await broadcast_task_update(task_id, tasks[task_id])
 
     finally:
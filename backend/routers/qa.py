@@ -10,9 +10,10 @@ from fastapi import APIRouter, HTTPException, Form, Request
 from fastapi.responses import StreamingResponse
 
 from backend.core.state import (
-    tasks, active_tasks, save_tasks, broadcast_task_update, TEMP_DIR,
+    tasks, active_tasks, put_task, update_task, broadcast_task_update,
     get_video_qa_service,
 )
+from backend.core import task_scratch
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
@@ -42,23 +43,21 @@ async def transcribe_only(
             if not os.path.isfile(file_path):
                 raise HTTPException(status_code=400, detail="路径不是有效的文件")
 
-            tasks[task_id] = {
+            put_task(task_id, {
                 "status": "processing", "progress": 0,
                 "message": "开始转录本地文件...", "transcript": None,
                 "error": None, "source": "local_path", "file_path": file_path,
-            }
-            save_tasks(tasks)
+            })
             task = asyncio.create_task(_transcribe_local_file_task(task_id, file_path))
             active_tasks[task_id] = task
         else:
             assert url is not None
             video_url: str = url
-            tasks[task_id] = {
+            put_task(task_id, {
                 "status": "processing", "progress": 0,
                 "message": "开始转录视频...", "transcript": None,
                 "error": None, "url": video_url,
-            }
-            save_tasks(tasks)
+            })
             task = asyncio.create_task(_transcribe_only_task(task_id, video_url))
             active_tasks[task_id] = task
 
@@ -72,14 +71,13 @@ async def transcribe_only(
 
 async def _transcribe_local_file_task(task_id: str, file_path: str):
     from backend.services.audio_transcriber import AudioTranscriber
-    from backend.utils.file_handler import extract_audio_from_file, cleanup_temp_audio, extract_embedded_subtitles
+    from backend.utils.file_handler import extract_embedded_subtitles
 
     try:
         video_title = Path(file_path).stem
 
         # 先尝试提取内嵌字幕
-        tasks[task_id].update({"progress": 3, "message": "📄 正在检查内嵌字幕..."})
-        save_tasks(tasks)
+        update_task(task_id, {"progress": 3, "message": "📄 正在检查内嵌字幕..."})
         await broadcast_task_update(task_id, tasks[task_id])
 
         subtitle_text = None
@@ -92,28 +90,17 @@ async def _transcribe_local_file_task(task_id: str, file_path: str):
             logger.info(f"✅ 本地视频发现内嵌字幕，跳过音频提取和ASR")
             transcript = subtitle_text
         else:
-            tasks[task_id].update({"progress": 5, "message": "正在提取音频..."})
-            save_tasks(tasks)
-            await broadcast_task_update(task_id, tasks[task_id])
-
-            audio_path, needs_cleanup = await extract_audio_from_file(file_path, TEMP_DIR, task_id)
-
-            try:
-                audio_transcriber = AudioTranscriber()
+            audio_transcriber = AudioTranscriber()
 
-                tasks[task_id].update({"progress": 40, "message": "正在转录音频..."})
-                save_tasks(tasks)
-                await broadcast_task_update(task_id, tasks[task_id])
+            update_task(task_id, {"progress": 40, "message": "正在转录音频..."})
+            await broadcast_task_update(task_id, tasks[task_id])
 
-                transcript = await audio_transcriber.transcribe_audio(audio_path)
-            finally:
-                cleanup_temp_audio(audio_path, needs_cleanup)
+            transcript = await audio_transcriber.transcribe_audio(file_path)
 
-        tasks[task_id].update({
+        update_task(task_id, {
             "status": "completed", "progress": 100, "message": "",
             "transcript": transcript, "video_title": video_title,
         })
-        save_tasks(tasks)
         await broadcast_task_update(task_id, tasks[task_id])
         active_tasks.pop(task_id, None)
 
@@ -121,14 +108,12 @@ async def _transcribe_local_file_task(task_id: str, file_path: str):
         logger.info(f"本地文件转录任务 {task_id} 被取消")
         active_tasks.pop(task_id, None)
         if task_id in tasks:
-            tasks[task_id].update({"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
             await broadcast_task_update(task_id, tasks[task_id])
     except Exception as e:
         logger.error(f"本地文件转录任务 {task_id} 失败: {str(e)}")
         active_tasks.pop(task_id, None)
-        tasks[task_id].update({"status": "error", "error": str(e), "message": f"转录失败: {str(e)}"})
-        save_tasks(tasks)
+        update_task(task_id, {"status": "error", "error": str(e), "message": f"转录失败: {str(e)}"})
         await broadcast_task_update(task_id, tasks[task_id])
 
 
@@ -139,50 +124,42 @@ async def _transcribe_only_task(task_id: str, url: str):
     try:
         video_downloader = VideoDownloader()
         audio_transcriber = AudioTranscriber()
+        work_dir = task_scratch.scratch_dir(task_id, create=True)
 
         # 先尝试提取字幕（无需下载音频）
-        tasks[task_id].update({"progress": 5, "message": "📄 正在检查视频字幕..."})
-        save_tasks(tasks)
+        update_task(task_id, {"progress": 5, "message": "📄 正在检查视频字幕..."})
         await broadcast_task_update(task_id, tasks[task_id])
 
         subtitle_text = None
         video_title = None
         try:
-            subtitle_text, video_title = await video_downloader.extract_subtitles(url, TEMP_DIR)
+            subtitle_text, video_title = await video_downloader.extract_subtitles(url)
         except Exception as e:
             logger.warning(f"字幕提取异常: {e}")
 
         if subtitle_text:
             # 有字幕，跳过音频下载和转录
             logger.info(f"✅ 使用视频字幕替代转录，跳过音频下载")
-            tasks[task_id].update({"progress": 80, "message": "✅ 已从字幕中提取文本"})
-            save_tasks(tasks)
+            update_task(task_id, {"progress": 80, "message": "✅ 已从字幕中提取文本"})
             await broadcast_task_update(task_id, tasks[task_id])
             transcript = subtitle_text
         else:
             # 无字幕，下载音频并转录
-            tasks[task_id].update({"progress": 10, "message": "🎬 无可用字幕，正在下载音频..."})
-            save_tasks(tasks)
+            update_task(task_id, {"progress": 10, "message": "🎬 无可用字幕，正在下载音频..."})
             await broadcast_task_update(task_id, tasks[task_id])
 
-            audio_path, video_title = await video_downloader.download_video_audio(url, TEMP_DIR)
+            audio_path, video_title = await video_downloader.download_video_audio(url, work_dir)
 
-            tasks[task_id].update({"progress": 40, "message": "🎤 正在转录音频..."})
-            save_tasks(tasks)
+            update_task(task_id, {"progress": 40, "message": "🎤 正在转录音频..."})
             await broadcast_task_update(task_id, tasks[task_id])
 
+            # 音频在共享缓存中（或任务临时目录中，任务结束时删除），这里不删除
             transcript = await audio_transcriber.transcribe_audio(audio_path)
 
-            try:
-                Path(audio_path).unlink()
-            except Exception:
-                pass
-
-        tasks[task_id].update({
+        update_task(task_id, {
             "status": "completed", "progress": 100, "message": "",
             "transcript": transcript, "video_title": video_title,
         })
-        save_tasks(tasks)
         await broadcast_task_update(task_id, tasks[task_id])
         active_tasks.pop(task_id, None)
 
@@ -190,15 +167,15 @@ async def _transcribe_only_task(task_id: str, url: str):
         logger.info(f"转录任务 {task_id} 被取消")
         active_tasks.pop(task_id, None)
         if task_id in tasks:
-            tasks[task_id].update({"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
             await broadcast_task_update(task_id, tasks[task_id])
     except Exception as e:
         logger.error(f"转录任务 {task_id} 失败: {str(e)}")
         active_tasks.pop(task_id, None)
-        tasks[task_id].update({"status": "error", "error": str(e), "message": f"转录失败: {str(e)}"})
-        save_tasks(tasks)
+        update_task(task_id, {"status": "error", "error": str(e), "message": f"转录失败: {str(e)}"})
         await broadcast_task_update(task_id, tasks[task_id])
+    finally:
+        task_scratch.discard(task_id)
 
 
 @router.post("/video-qa-stream")
@@ -5,7 +5,8 @@ import uuid
 from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 
-from backend.core.state import get_video_search_agent, TEMP_DIR
+from backend.core import task_scratch
+from backend.core.state import get_video_search_agent
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
@@ -63,7 +64,7 @@ async def search_agent_generate_notes(request: Request):
                 yield f"data: {json.dumps({'type': 'generation_id', 'generation_id': generation_id}, ensure_ascii=False)}\n\n"
                 async for event in get_video_search_agent().generate_notes_for_video(
                     video_url=video_url,
-                    temp_dir=TEMP_DIR,
+                    temp_dir=task_scratch.scratch_dir(generation_id, create=True),
                     summary_language=summary_language,
                     generation_id=generation_id,
                 ):
@@ -71,6 +72,8 @@ async def search_agent_generate_notes(request: Request):
             except Exception as e:
                 logger.error(f"生成笔记异常: {e}")
                 yield f"data: {json.dumps({'type': 'error', 'content': str(e)}, ensure_ascii=False)}\n\n"
+            finally:
+                task_scratch.discard(generation_id)
 
         return StreamingResponse(
             event_generator(),
@@ -9,7 +9,10 @@ from pathlib import Path
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from backend.core.state import tasks, save_tasks, active_tasks, TEMP_DIR
+from backend.core.state import tasks, remove_task, active_tasks, TEMP_DIR
+from backend.core.artifact_index import artifact_index
+from backend.core.artifact_store import artifact_store
+from backend.services.audio_cache import audio_cache
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
@@ -20,11 +23,6 @@ BACKUPS_DIR = TEMP_DIR / "backups"
 # 音频文件扩展名
 AUDIO_EXTENSIONS = {".m4a", ".wav", ".webm", ".mp3", ".ogg", ".part"}
 
-# Markdown 笔记文件正则 (summary/transcript/raw/mindmap/translation)
-NOTE_FILE_RE = re.compile(
-    r"^(summary|transcript|raw|mindmap|translation)_(.+)_([a-f0-9]{6})\.md$"
-)
-
 
 def _file_age_days(path: Path) -> float:
     return (time.time() - path.stat().st_mtime) / 86400
@@ -58,10 +56,7 @@ async def get_storage_stats():
             size = f.stat().st_size
             suffix = f.suffix.lower()
 
-            if suffix == ".md" and NOTE_FILE_RE.match(f.name):
-                stats["notes"]["count"] += 1
-                stats["notes"]["size"] += size
-            elif suffix in AUDIO_EXTENSIONS or f.name.endswith(".m4a.part"):
+            if suffix in AUDIO_EXTENSIONS or f.name.endswith(".m4a.part"):
                 stats["audio"]["count"] += 1
                 stats["audio"]["size"] += size
                 stats["audio"]["files"].append({
@@ -73,6 +68,20 @@ async def get_storage_stats():
                 stats["other"]["count"] += 1
                 stats["other"]["size"] += size
 
+    # 共享的下载音频缓存（temp/audio_cache/）
+    for entry in audio_cache.list_entries():
+        stats["audio"]["count"] += 1
+        stats["audio"]["size"] += entry["size"]
+        stats["audio"]["files"].append({
+            "name": f"audio_cache/{entry['title']}{entry['path'].suffix}",
+            "size": _format_size(entry["size"]),
+            "age_days": round((time.time() - entry["last_used"]) / 86400, 1),
+        })
+
+    for short_id, _, files in artifact_index.notes():
+        stats["notes"]["count"] += len(files)
+        stats["notes"]["size"] += artifact_store.note_size(short_id)
+
     if DOWNLOADS_DIR.exists():
         for f in DOWNLOADS_DIR.iterdir():
             if not f.is_file():
@@ -174,6 +183,13 @@ async def cleanup_storage(req: CleanupRequest):
             except Exception as e:
                 logger.warning(f"删除文件失败 {f.name}: {e}")
 
+    if req.clean_audio:
+        # 音频缓存中正在使用的条目会保留
+        for title, size in audio_cache.clear(req.older_than_days):
+            deleted_files.append(f"audio_cache/{title}")
+            freed_bytes += size
+            logger.info(f"清理缓存音频: {title}")
+
     if req.clean_downloads and DOWNLOADS_DIR.exists():
         for f in DOWNLOADS_DIR.iterdir():
             if not f.is_file():
@@ -204,26 +220,22 @@ async def cleanup_storage(req: CleanupRequest):
             except Exception as e:
                 logger.warning(f"删除文件失败 {f.name}: {e}")
 
-    if req.clean_all_notes and TEMP_DIR.exists():
+    if req.clean_all_notes:
         active_short_ids_6 = {tid.replace("-", "")[:6] for tid in active_tasks}
-        for f in TEMP_DIR.iterdir():
-            if not f.is_file() or f.suffix != ".md":
-                continue
-            match = NOTE_FILE_RE.match(f.name)
-            if not match:
-                continue
-            if match.group(3) in active_short_ids_6:
-                continue
-            if req.older_than_days > 0 and _file_age_days(f) < req.older_than_days:
+        for short_id, _, _ in artifact_index.notes():
+            if short_id in active_short_ids_6:
                 continue
+            if req.older_than_days > 0:
+                age_days = (time.time() - artifact_store.note_mtime(short_id)) / 86400
+                if age_days < req.older_than_days:
+                    continue
             try:
-                size = f.stat().st_size
-                f.unlink()
-                deleted_files.append(f.name)
+                names, size = artifact_store.delete(short_id)
+                deleted_files.extend(names)
                 freed_bytes += size
-                logger.info(f"清理笔记文件: {f.name}")
+                logger.info(f"清理笔记: {short_id}")
             except Exception as e:
-                logger.warning(f"删除文件失败 {f.name}: {e}")
+                logger.warning(f"删除笔记失败 {short_id}: {e}")
 
         # 清除内存中对应的已完成任务
         completed_tids = [
@@ -232,9 +244,7 @@ async def cleanup_storage(req: CleanupRequest):
             and tid.replace("-", "")[:6] not in active_short_ids_6
         ]
         for tid in completed_tids:
-            del tasks[tid]
-        if completed_tids:
-            save_tasks(tasks)
+            remove_task(tid)
 
         # 清除 SQLite 中所有笔记
         try:
@@ -265,20 +275,12 @@ async def delete_task_files(short_id: str):
     deleted_files = []
     freed_bytes = 0
 
-    if TEMP_DIR.exists():
-        for f in TEMP_DIR.iterdir():
-            if not f.is_file() or f.suffix != ".md":
-                continue
-            match = NOTE_FILE_RE.match(f.name)
-            if match and match.group(3) == short_id:
-                try:
-                    size = f.stat().st_size
-                    f.unlink()
-                    deleted_files.append(f.name)
-                    freed_bytes += size
-                    logger.info(f"删除任务文件: {f.name}")
-                except Exception as e:
-                    logger.warning(f"删除文件失败 {f.name}: {e}")
+    try:
+        deleted_files, freed_bytes = artifact_store.delete(short_id)
+        if deleted_files:
+            logger.info(f"删除任务文件: {short_id} ({len(deleted_files)} 个)")
+    except Exception as e:
+        logger.warning(f"删除任务文件失败 {short_id}: {e}")
 
     # 从内存 tasks dict 中移除（兼容未迁移的）
     task_ids_to_remove = [
@@ -286,9 +288,7 @@ async def delete_task_files(short_id: str):
         if tid.replace("-", "")[:6] == short_id
     ]
     for tid in task_ids_to_remove:
-        del tasks[tid]
-    if task_ids_to_remove:
-        save_tasks(tasks)
+        remove_task(tid)
 
     # 从 SQLite 删除
     db_deleted = False
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 import os
 import uuid
@@ -11,17 +10,35 @@ from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
 from backend.core.state import (
-    tasks, processing_urls, active_tasks, sse_connections,
-    save_tasks, broadcast_task_update, persist_completed_task,
-    TEMP_DIR,
+    tasks, processing_urls, active_tasks, sse_hub,
+    put_task, update_task, remove_task, broadcast_task_update, persist_completed_task,
+    field_versions, publish_task_event, is_shutting_down,
 )
+from backend.core.sse_hub import ARTIFACT_FIELDS, TERMINAL_STATUSES
+from backend.core.artifact_index import artifact_index
+from backend.core.artifact_store import artifact_store
+from backend.core import task_scratch
+from backend.services import asr_checkpoint
 from backend.services.note_generator import NoteGenerator
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api")
 
 
-def _create_single_task(url: str, summary_language: str, batch_id: Optional[str] = None) -> str:
+def _check_asr_model(asr_model: Optional[str]) -> Optional[str]:
+    """校验按请求选择的 ASR 模型，空值表示使用默认模型"""
+    if not asr_model:
+        return None
+    from backend.config.ai_config import get_asr_config
+    available = get_asr_config().available_models
+    if asr_model not in available:
+        raise HTTPException(status_code=400, detail=f"不支持的ASR模型: {asr_model}（可选: {', '.join(available)}）")
+    return asr_model
+
+
+def _create_single_task(
+    url: str, summary_language: str, batch_id: Optional[str] = None, asr_model: Optional[str] = None
+) -> str:
     """Create a single task entry in tasks dict and start processing. Returns task_id."""
     is_local = os.path.exists(url) and os.path.isfile(url)
 
@@ -39,6 +56,8 @@ def _create_single_task(url: str, summary_language: str, batch_id: Optional[str]
         "script": None,
         "summary": None,
         "error": None,
+        "summary_language": summary_language,
+        "asr_model": asr_model,
     }
 
     if is_local:
@@ -50,13 +69,12 @@ def _create_single_task(url: str, summary_language: str, batch_id: Optional[str]
     if batch_id:
         task_data["batch_id"] = batch_id
 
-    tasks[task_id] = task_data
-    save_tasks(tasks)
+    put_task(task_id, task_data)
 
     if is_local:
-        coro = _process_local_path_task(task_id, url, summary_language)
+        coro = _process_local_path_task(task_id, url, summary_language, asr_model)
     else:
-        coro = _process_video_task(task_id, url, summary_language)
+        coro = _process_video_task(task_id, url, summary_language, asr_model)
 
     task = asyncio.create_task(coro)
     active_tasks[task_id] = task
@@ -67,14 +85,16 @@ def _create_single_task(url: str, summary_language: str, batch_id: Optional[str]
 async def process_video(
     url: str = Form(...),
     summary_language: str = Form(default="zh"),
+    asr_model: Optional[str] = Form(default=None),
 ):
+    asr_model = _check_asr_model(asr_model)
     try:
         # 防御：如果收到本地文件路径，自动走本地处理流程
         if os.path.exists(url) and os.path.isfile(url):
             from backend.utils.file_handler import MEDIA_EXTENSIONS
             file_ext = Path(url).suffix.lower()
             if file_ext in MEDIA_EXTENSIONS:
-                task_id = _create_single_task(url, summary_language)
+                task_id = _create_single_task(url, summary_language, asr_model=asr_model)
                 return {"task_id": task_id, "message": "检测到本地文件，已自动切换本地处理模式"}
 
         if url in processing_urls:
@@ -82,33 +102,43 @@ async def process_video(
                 if task.get("url") == url:
                     return {"task_id": tid, "message": "该视频正在处理中，请等待..."}
 
-        task_id = _create_single_task(url, summary_language)
+        task_id = _create_single_task(url, summary_language, asr_model=asr_model)
         return {"task_id": task_id, "message": "任务已创建，正在处理中..."}
     except Exception as e:
         logger.error(f"处理视频时出错: {str(e)}")
         raise HTTPException(status_code=500, detail=f"处理失败: {str(e)}")
 
 
-async def _process_video_task(task_id: str, url: str, summary_language: str):
+async def _process_video_task(task_id: str, url: str, summary_language: str, asr_model: Optional[str] = None):
     try:
         note_gen = NoteGenerator()
 
         async def progress_callback(progress: int, message: str):
-            tasks[task_id].update({"status": "processing", "progress": progress, "message": message})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "processing", "progress": progress, "message": message})
             await broadcast_task_update(task_id, tasks[task_id])
 
+        def transcript_callback(segment: dict):
+            publish_task_event(task_id, "transcript_segment", segment)
+
+        def asr_progress_callback(stats: dict):
+            publish_task_event(task_id, "asr_progress", stats)
+
         def cancel_check() -> bool:
             return task_id not in active_tasks or (
                 task_id in active_tasks and active_tasks[task_id].cancelled()
             )
 
+        # 字幕等中间文件写在任务自己的临时目录，任务结束时只删除本任务的文件
         result = await note_gen.generate_note(
             video_url=url,
-            temp_dir=TEMP_DIR,
+            temp_dir=task_scratch.scratch_dir(task_id, create=True),
             summary_language=summary_language,
             progress_callback=progress_callback,
+            transcript_callback=transcript_callback,
+            asr_progress_callback=asr_progress_callback,
             cancel_check=cancel_check,
+            asr_model=asr_model,
+            checkpoint_id=task_id,
         )
 
         short_id = result["short_id"]
@@ -140,12 +170,12 @@ async def _process_video_task(task_id: str, url: str, summary_language: str):
                 "translation_filename": result["files"]["translation_filename"],
             })
 
-        tasks[task_id].update(task_result)
-        save_tasks(tasks)
+        update_task(task_id, task_result)
         await broadcast_task_update(task_id, tasks[task_id])
 
         processing_urls.discard(url)
         active_tasks.pop(task_id, None)
+        task_scratch.discard(task_id)
 
         # 先持久化到 SQLite（auto_tag 需要 note 已存在）
         await persist_completed_task(task_id, tasks.get(task_id, task_result))
@@ -159,31 +189,26 @@ async def _process_video_task(task_id: str, url: str, summary_language: str):
         except Exception as e:
             logger.warning(f"自动标签失败: {e}")
 
-        # 清理本次生成产生的音频缓存文件
-        try:
-            for f in TEMP_DIR.iterdir():
-                if f.is_file() and f.suffix.lower() in (".m4a", ".wav", ".webm", ".mp3", ".ogg"):
-                    if "audio_" in f.name:
-                        f.unlink()
-                        logger.info(f"自动清理音频缓存: {f.name}")
-        except Exception as e:
-            logger.warning(f"清理音频缓存时出错: {e}")
 
     except asyncio.CancelledError:
-        logger.info(f"任务 {task_id} 被取消")
         processing_urls.discard(url)
         active_tasks.pop(task_id, None)
+        if is_shutting_down():
+            # 服务关闭：保留 processing 状态和转录检查点，重启后继续
+            logger.info(f"服务关闭，任务 {task_id} 中断，重启后继续")
+            raise
+        logger.info(f"任务 {task_id} 被取消")
+        task_scratch.discard(task_id)
         if task_id in tasks:
-            tasks[task_id].update({"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
             await broadcast_task_update(task_id, tasks[task_id])
 
     except Exception as e:
         logger.error(f"任务 {task_id} 处理失败: {str(e)}")
         processing_urls.discard(url)
         active_tasks.pop(task_id, None)
-        tasks[task_id].update({"status": "error", "error": str(e), "message": f"处理失败: {str(e)}"})
-        save_tasks(tasks)
+        task_scratch.discard(task_id)
+        update_task(task_id, {"status": "error", "error": str(e), "message": f"处理失败: {str(e)}"})
         await broadcast_task_update(task_id, tasks[task_id])
 
 
@@ -203,7 +228,6 @@ async def get_task_status(task_id: str):
     if note:
         short_id = note["short_id"]
         # 尝试从文件系统读取内容
-        import re
         result = {
             "status": "completed",
             "progress": 100,
@@ -219,8 +243,8 @@ async def get_task_status(task_id: str):
         if not note.get("summary_file") and not note.get("transcript_file"):
             note_title = note.get("title", "")
             if note_title:
-                from backend.db.connection import get_db
-                async with get_db() as db:
+                from backend.db.connection import get_read_db
+                async with get_read_db() as db:
                     cursor = await db.execute(
                         """SELECT short_id FROM notes
                            WHERE title = ? AND short_id != ?
@@ -234,52 +258,56 @@ async def get_task_status(task_id: str):
 
         for sid in short_ids_to_try:
             for field, prefix in [("summary", "summary"), ("script", "transcript"), ("raw_script", "raw"), ("translation", "translation"), ("mindmap", "mindmap")]:
-                if field in result and field not in ("status", "progress", "message", "video_title", "short_id", "safe_title"):
+                if field in result:
                     continue  # 已找到则跳过
-                for f in TEMP_DIR.iterdir():
-                    if f.is_file() and f.suffix == ".md":
-                        if re.match(rf"^{re.escape(prefix)}_.+_{re.escape(sid)}\.md$", f.name):
-                            result[field] = f.read_text(encoding="utf-8")
-                            break
+                path = artifact_index.get(sid, prefix)
+                if path is not None and path.exists():
+                    result[field] = path.read_text(encoding="utf-8")
         return result
 
     raise HTTPException(status_code=404, detail="任务不存在")
 
 
 @router.get("/task-stream/{task_id}")
-async def task_stream(task_id: str):
+async def task_stream(task_id: str, request: Request, last_event_id: Optional[str] = None):
     if task_id not in tasks:
         raise HTTPException(status_code=404, detail="任务不存在")
 
+    # 浏览器自动重连时带 Last-Event-ID 头；前端手动重连时用查询参数
+    resume_from = request.headers.get("last-event-id") or last_event_id
+
     async def event_generator():
-        queue = asyncio.Queue()
-        if task_id not in sse_connections:
-            sse_connections[task_id] = []
-        sse_connections[task_id].append(queue)
+        subscriber = sse_hub.subscribe(task_id)
 
         try:
-            current_task = tasks.get(task_id, {})
-            yield f"data: {json.dumps(current_task, ensure_ascii=False)}\n\n"
+            # subscribe 与生成首帧之间没有 await，不会漏帧；已补发的帧从缓冲区跳过
+            frames = sse_hub.replay_since(task_id, resume_from)
+            if frames is None:
+                frames = [sse_hub.snapshot(task_id, tasks.get(task_id, {}), field_versions(task_id))]
+            sent_seq = frames[-1].seq if frames else sse_hub.parse_event_id(resume_from)
+            for frame in frames:
+                yield f"id: {sse_hub.event_id(frame)}\ndata: {frame.message}\n\n"
+            if any(frame.terminal for frame in frames) or (
+                not frames and tasks.get(task_id, {}).get("status") in TERMINAL_STATUSES
+            ):
+                return
 
             while True:
-                try:
-                    data = await asyncio.wait_for(queue.get(), timeout=15)
-                    yield f"data: {data}\n\n"
-                    task_data = json.loads(data)
-                    if task_data.get("status") in ["completed", "error"]:
-                        break
-                except asyncio.TimeoutError:
+                frame = await subscriber.get(timeout=15)
+                if frame is None:
                     yield ": heartbeat\n\n"
                     continue
+                if frame.seq <= sent_seq:
+                    continue
+                yield f"id: {sse_hub.event_id(frame)}\ndata: {frame.message}\n\n"
+                if frame.terminal:
+                    break
         except asyncio.CancelledError:
             logger.info(f"SSE连接被取消: {task_id}")
         except Exception as e:
             logger.error(f"SSE流异常: {e}")
         finally:
-            if task_id in sse_connections and queue in sse_connections[task_id]:
-                sse_connections[task_id].remove(queue)
-                if not sse_connections[task_id]:
-                    del sse_connections[task_id]
+            sse_hub.unsubscribe(subscriber)
 
     return StreamingResponse(
         event_generator(),
@@ -310,7 +338,8 @@ async def delete_task(task_id: str):
     if task_url:
         processing_urls.discard(task_url)
 
-    del tasks[task_id]
+    task_scratch.discard(task_id)
+    remove_task(task_id)
     return {"message": "任务已取消并删除"}
 
 
@@ -332,38 +361,53 @@ async def get_completed_tasks(
     page_size: int = 50,
     sort_by: str = "created_at",
     sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ):
     from backend.services.note_repository import list_notes
-    return await list_notes(
-        category=category,
-        tag=tag,
-        search=search,
-        page=page,
-        page_size=page_size,
-        sort_by=sort_by,
-        sort_order=sort_order,
-    )
+    try:
+        return await list_notes(
+            category=category,
+            tag=tag,
+            search=search,
+            page=page,
+            page_size=page_size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            include_total=include_total,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/tasks/{task_id}/content")
 async def get_task_content(task_id: str, field: str = "summary"):
-    import re
-
     field_to_prefix = {
         "summary": "summary",
         "script": "transcript",
         "transcript": "raw",
+        "raw_script": "raw",
     }
     prefix = field_to_prefix.get(field, field)
 
-    # 1. 从 temp 目录按 short_id 查找文件
-    for f in TEMP_DIR.iterdir():
-        if not f.is_file() or f.suffix != ".md":
-            continue
-        if re.match(rf"^{re.escape(prefix)}_.+_{re.escape(task_id)}\.md$", f.name):
-            content = f.read_text(encoding="utf-8")
-            if content.strip():
-                return {"content": content}
+    # 0. 内存中的任务（SSE 按引用下发的大字段由此拉取，task_id 为完整任务 ID）
+    if task_id in tasks and field in ARTIFACT_FIELDS:
+        content = tasks[task_id].get(field)
+        if isinstance(content, str) and content:
+            return {"content": content}
+
+    def _read_indexed(short_id: str) -> Optional[str]:
+        path = artifact_index.get(short_id, prefix)
+        if path is None or not path.exists():
+            return None
+        content = path.read_text(encoding="utf-8")
+        return content if content.strip() else None
+
+    # 1. 从笔记文件索引按 short_id 查找
+    content = _read_indexed(task_id)
+    if content:
+        return {"content": content}
 
     # 2. 从内存中查找
     for tid, t in tasks.items():
@@ -388,34 +432,32 @@ async def get_task_content(task_id: str, field: str = "summary"):
             "summary": "summary_file",
             "script": "transcript_file",
             "transcript": "transcript_file",
+            "mindmap": "mindmap_file",
+            "translation": "translation_file",
         }
         db_filename = None
         col = field_to_db_col.get(field)
         if col:
             db_filename = note.get(col)
         if db_filename:
-            fpath = TEMP_DIR / db_filename
-            if fpath.exists():
+            fpath = artifact_store.resolve(db_filename)
+            if fpath is not None:
                 content = fpath.read_text(encoding="utf-8")
                 if content.strip():
                     return {"content": content}
 
-        # 用 note 中的 short_id 再扫一遍文件系统
+        # 用 note 中的 short_id 再查一次索引
         note_short_id = note.get("short_id", "")
         if note_short_id and note_short_id != task_id:
-            for f in TEMP_DIR.iterdir():
-                if not f.is_file() or f.suffix != ".md":
-                    continue
-                if re.match(rf"^{re.escape(prefix)}_.+_{re.escape(note_short_id)}\.md$", f.name):
-                    content = f.read_text(encoding="utf-8")
-                    if content.strip():
-                        return {"content": content}
+            content = _read_indexed(note_short_id)
+            if content:
+                return {"content": content}
 
         # 5. 同标题的其他笔记可能有文件（历史重复记录场景）
         note_title = note.get("title", "")
         if note_title:
-            from backend.db.connection import get_db
-            async with get_db() as db:
+            from backend.db.connection import get_read_db
+            async with get_read_db() as db:
                 cursor = await db.execute(
                     """SELECT short_id, summary_file, transcript_file, mindmap_file, translation_file
                        FROM notes
@@ -434,19 +476,15 @@ async def get_task_content(task_id: str, field: str = "summary"):
                 }
                 db_filename = sibling_file_map.get(field)
                 if db_filename:
-                    fpath = TEMP_DIR / db_filename
-                    if fpath.exists():
+                    fpath = artifact_store.resolve(db_filename)
+                    if fpath is not None:
                         content = fpath.read_text(encoding="utf-8")
                         if content.strip():
                             return {"content": content}
-                # 用 sibling 的 short_id 扫文件系统
-                for f in TEMP_DIR.iterdir():
-                    if not f.is_file() or f.suffix != ".md":
-                        continue
-                    if re.match(rf"^{re.escape(prefix)}_.+_{re.escape(sibling_short_id)}\.md$", f.name):
-                        content = f.read_text(encoding="utf-8")
-                        if content.strip():
-                            return {"content": content}
+                # 用 sibling 的 short_id 查索引
+                content = _read_indexed(sibling_short_id)
+                if content:
+                    return {"content": content}
 
     raise HTTPException(status_code=404, detail=f"未找到 {field} 内容")
 
@@ -457,6 +495,7 @@ async def process_local_path(request: Request):
         data = await request.json()
         file_path = data.get("file_path", "").strip()
         summary_language = data.get("language", "zh")
+        asr_model = _check_asr_model(data.get("asr_model"))
 
         if not file_path:
             raise HTTPException(status_code=400, detail="文件路径不能为空")
@@ -471,7 +510,7 @@ async def process_local_path(request: Request):
             raise HTTPException(status_code=400, detail=f"不支持的文件格式: {file_ext}")
 
         task_id = str(uuid.uuid4())
-        tasks[task_id] = {
+        put_task(task_id, {
             "status": "processing",
             "progress": 0,
             "message": "开始处理本地文件...",
@@ -480,10 +519,11 @@ async def process_local_path(request: Request):
             "error": None,
             "source": "local_path",
             "file_path": file_path,
-        }
-        save_tasks(tasks)
+            "summary_language": summary_language,
+            "asr_model": asr_model,
+        })
 
-        task = asyncio.create_task(_process_local_path_task(task_id, file_path, summary_language))
+        task = asyncio.create_task(_process_local_path_task(task_id, file_path, summary_language, asr_model))
         active_tasks[task_id] = task
 
         return {"task_id": task_id, "message": "本地文件处理任务已创建"}
@@ -494,17 +534,24 @@ async def process_local_path(request: Request):
         raise HTTPException(status_code=500, detail=f"处理失败: {str(e)}")
 
 
-async def _process_local_path_task(task_id: str, file_path: str, summary_language: str):
-    from backend.utils.file_handler import extract_audio_from_file, cleanup_temp_audio, extract_embedded_subtitles
+async def _process_local_path_task(
+    task_id: str, file_path: str, summary_language: str, asr_model: Optional[str] = None
+):
+    from backend.utils.file_handler import extract_embedded_subtitles
 
     try:
         video_title = Path(file_path).stem
 
         async def progress_callback(progress: int, message: str):
-            tasks[task_id].update({"status": "processing", "progress": progress, "message": message})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "processing", "progress": progress, "message": message})
             await broadcast_task_update(task_id, tasks[task_id])
 
+        def transcript_callback(segment: dict):
+            publish_task_event(task_id, "transcript_segment", segment)
+
+        def asr_progress_callback(stats: dict):
+            publish_task_event(task_id, "asr_progress", stats)
+
         # 先尝试提取内嵌字幕
         await progress_callback(3, "📄 正在检查内嵌字幕...")
         subtitle_text = None
@@ -527,37 +574,37 @@ async def _process_local_path_task(task_id: str, file_path: str, summary_languag
 
             result = await note_gen.generate_note(
                 video_url=f"file://{file_path}",
-                temp_dir=TEMP_DIR,
+                temp_dir=task_scratch.scratch_dir(task_id, create=True),
                 summary_language=summary_language,
                 progress_callback=progress_callback,
+                transcript_callback=transcript_callback,
+                asr_progress_callback=asr_progress_callback,
                 cancel_check=cancel_check,
                 subtitle_text_override=subtitle_text,
                 video_title_override=video_title,
             )
         else:
-            # 无字幕：提取音频走 ASR
-            await progress_callback(5, "正在提取音频...")
-            audio_path, needs_cleanup = await extract_audio_from_file(file_path, TEMP_DIR, task_id)
-
-            try:
-                note_gen = NoteGenerator()
-
-                def cancel_check() -> bool:
-                    return task_id not in active_tasks or (
-                        task_id in active_tasks and active_tasks[task_id].cancelled()
-                    )
+            # 无字幕：走 ASR（转录服务直接从媒体文件解码音频，不生成临时 WAV）
+            note_gen = NoteGenerator()
 
-                result = await note_gen.generate_note(
-                    video_url=f"file://{file_path}",
-                    temp_dir=TEMP_DIR,
-                    summary_language=summary_language,
-                    progress_callback=progress_callback,
-                    cancel_check=cancel_check,
-                    audio_path_override=audio_path,
-                    video_title_override=video_title,
+            def cancel_check() -> bool:
+                return task_id not in active_tasks or (
+                    task_id in active_tasks and active_tasks[task_id].cancelled()
                 )
-            finally:
-                cleanup_temp_audio(audio_path, needs_cleanup)
+
+            result = await note_gen.generate_note(
+                video_url=f"file://{file_path}",
+                temp_dir=task_scratch.scratch_dir(task_id, create=True),
+                summary_language=summary_language,
+                progress_callback=progress_callback,
+                transcript_callback=transcript_callback,
+                asr_progress_callback=asr_progress_callback,
+                cancel_check=cancel_check,
+                audio_path_override=file_path,
+                video_title_override=video_title,
+                asr_model=asr_model,
+                checkpoint_id=task_id,
+            )
 
         short_id = result["short_id"]
         safe_title = result["safe_title"]
@@ -588,10 +635,10 @@ async def _process_local_path_task(task_id: str, file_path: str, summary_languag
                 "translation_filename": result["files"]["translation_filename"],
             })
 
-        tasks[task_id].update(task_result)
-        save_tasks(tasks)
+        update_task(task_id, task_result)
         await broadcast_task_update(task_id, tasks[task_id])
         active_tasks.pop(task_id, None)
+        task_scratch.discard(task_id)
 
         # 先持久化到 SQLite（auto_tag 需要 note 已存在）
         await persist_completed_task(task_id, tasks.get(task_id, task_result))
@@ -606,20 +653,63 @@ async def _process_local_path_task(task_id: str, file_path: str, summary_languag
             logger.warning(f"自动标签失败: {e}")
 
     except asyncio.CancelledError:
-        logger.info(f"本地文件处理任务 {task_id} 被取消")
         active_tasks.pop(task_id, None)
+        if is_shutting_down():
+            logger.info(f"服务关闭，本地文件处理任务 {task_id} 中断，重启后继续")
+            raise
+        logger.info(f"本地文件处理任务 {task_id} 被取消")
+        task_scratch.discard(task_id)
         if task_id in tasks:
-            tasks[task_id].update({"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
-            save_tasks(tasks)
+            update_task(task_id, {"status": "cancelled", "error": "用户取消任务", "message": "❌ 任务已取消"})
             await broadcast_task_update(task_id, tasks[task_id])
     except Exception as e:
         logger.error(f"本地文件处理任务 {task_id} 失败: {str(e)}")
         active_tasks.pop(task_id, None)
-        tasks[task_id].update({"status": "error", "error": str(e), "message": f"处理失败: {str(e)}"})
-        save_tasks(tasks)
+        task_scratch.discard(task_id)
+        update_task(task_id, {"status": "error", "error": str(e), "message": f"处理失败: {str(e)}"})
         await broadcast_task_update(task_id, tasks[task_id])
 
 
+def resume_interrupted_tasks() -> None:
+    """
+    服务启动时处理上次中断（仍为 processing）的任务：有转录检查点的任务重新调度，
+    已转录的部分直接复用；其余标记为中断，需要用户重新提交
+    """
+    from backend.config.ai_config import get_asr_config
+
+    available = get_asr_config().available_models
+    resumed = 0
+    for task_id, task in list(tasks.items()):
+        if task.get("status") != "processing" or task_id in active_tasks:
+            continue
+        url, file_path = task.get("url"), task.get("file_path")
+        if asr_checkpoint.has_checkpoint(task_id) and (url or (file_path and os.path.isfile(file_path))):
+            summary_language = task.get("summary_language") or "zh"
+            asr_model = task.get("asr_model") if task.get("asr_model") in available else None
+            update_task(task_id, {"message": "🔄 服务重启，从转录检查点继续..."})
+            if file_path:
+                coro = _process_local_path_task(task_id, file_path, summary_language, asr_model)
+            else:
+                processing_urls.add(url)
+                coro = _process_video_task(task_id, url, summary_language, asr_model)
+            active_tasks[task_id] = asyncio.create_task(coro)
+            resumed += 1
+        else:
+            update_task(task_id, {
+                "status": "error",
+                "error": "服务重启，任务中断",
+                "message": "❌ 服务重启导致任务中断，请重新提交",
+            })
+
+    # 清理不再对应进行中任务的临时目录（含检查点）
+    for task_id in task_scratch.list_task_ids():
+        if task_id not in active_tasks:
+            task_scratch.discard(task_id)
+
+    if resumed:
+        logger.info(f"从转录检查点恢复了 {resumed} 个中断的任务")
+
+
 # ── Batch processing ──────────────────────────────────────────────
 
 class BatchRequest(BaseModel):
@@ -657,15 +747,15 @@ async def batch_process(req: BatchRequest):
             "summary": None,
             "error": None,
             "batch_id": batch_id,
+            "summary_language": lang,
         }
         if is_local:
             task_data.update({"source": "local_path", "file_path": url})
         else:
             task_data["url"] = url
-        tasks[task_id] = task_data
+        put_task(task_id, task_data)
         task_ids.append(task_id)
 
-    save_tasks(tasks)
     asyncio.create_task(_batch_process(batch_id, task_ids, task_entries, semaphore))
 
     return {"batch_id": batch_id, "task_ids": task_ids, "total": len(task_ids)}
@@ -0,0 +1,208 @@
+"""
+ASR 结果缓存 — 按解码后音频内容 + 模型与解码参数做键，避免同一音频重复转录
+
+- 键：解码后 16kHz 单声道 PCM（media_decode）的哈希 + provider / model /
+  语言 / 解码参数；安装了 xxhash 时用 xxh3_128，否则用 blake2b
+- 值：gzip 压缩的 JSON {language, language_probability, duration, segments: [[start, end, text]]}
+- 存放在 temp/asr_cache/{key[:2]}/{key}.json.gz，按最近使用时间（mtime）做 LRU，
+  总大小超过 ASR_CACHE_MAX_MB 时淘汰最久未用的条目
+"""
+import gzip
+import hashlib
+import json
+import logging
+import os
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式或键的组成变化时递增，旧条目自然失效
+CACHE_VERSION = 2
+SAMPLE_RATE = 16000
+
+
+def _new_hasher():
+    return xxhash.xxh3_128() if XXHASH_AVAILABLE else hashlib.blake2b(digest_size=16)
+
+
+def audio_digest(samples: np.ndarray) -> str:
+    """16kHz 单声道 PCM 的哈希（与原始容器格式、码率无关），分块计算避免复制整段 memmap"""
+    hasher = _new_hasher()
+    step = SAMPLE_RATE * 60
+    for start in range(0, len(samples), step):
+        hasher.update(np.ascontiguousarray(samples[start:start + step], dtype=np.float32).tobytes())
+    return hasher.hexdigest()
+
+
+def decoding_params(config, language: Optional[str]) -> dict:
+    """参与缓存键的模型与解码参数"""
+    params = {
+        "v": CACHE_VERSION,
+        "provider": config.provider.lower(),
+        "model": config.model,
+        "model_dir": config.model_dir,
+        "compute_type": config.compute_type,
+        "language": language or "auto",
+    }
+    settings = get_settings()
+    if settings.ASR_COMPACT_ENABLED:
+        # 压缩后送入模型的音频不同，结果也可能不同
+        params["compact"] = [
+            settings.ASR_COMPACT_METHOD, settings.ASR_COMPACT_MIN_SILENCE, settings.ASR_COMPACT_PAD
+        ]
+    if params["provider"] == "whisper":
+        w = config.whisper
+        params.update({
+            "beam_size": w.beam_size, "best_of": w.best_of, "temperature": w.temperature,
+            "vad_filter": w.vad_filter, "min_silence_duration_ms": w.min_silence_duration_ms,
+            "speech_pad_ms": w.speech_pad_ms, "no_speech_threshold": w.no_speech_threshold,
+            "compression_ratio_threshold": w.compression_ratio_threshold,
+            "log_prob_threshold": w.log_prob_threshold,
+            "condition_on_previous_text": w.condition_on_previous_text,
+        })
+    return params
+
+
+class ASRCache:
+    """磁盘上的转录结果缓存（线程安全）"""
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Tuple[int, float]]] = None  # key -> (size, last_used)
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # ── 键 ────────────────────────────────────────────
+    def key_for(self, samples: np.ndarray, config, language: Optional[str]) -> str:
+        params = json.dumps(decoding_params(config, language), sort_keys=True, ensure_ascii=False)
+        hasher = _new_hasher()
+        hasher.update(audio_digest(samples).encode("ascii"))
+        hasher.update(params.encode("utf-8"))
+        return hasher.hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json.gz"
+
+    def _load_entries(self) -> Dict[str, Tuple[int, float]]:
+        if self._entries is None:
+            entries = {}
+            if self.root.exists():
+                for f in self.root.glob("*/*.json.gz"):
+                    st = f.stat()
+                    entries[f.name[:-len(".json.gz")]] = (st.st_size, st.st_mtime)
+            self._entries = entries
+            self._total = sum(size for size, _ in entries.values())
+        return self._entries
+
+    # ── 读写 ──────────────────────────────────────────
+    def get(self, key: str) -> Optional[Tuple[List[SimpleNamespace], SimpleNamespace]]:
+        """命中返回 (segments, info)，未命中返回 None"""
+        path = self._path(key)
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                self._load_entries().pop(key, None)
+            return None
+
+        now = os.path.getmtime(path)
+        try:
+            os.utime(path)  # 刷新最近使用时间
+            now = os.path.getmtime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            entries = self._load_entries()
+            if key in entries:
+                entries[key] = (entries[key][0], now)
+
+        segments = [SimpleNamespace(start=s, end=e, text=t) for s, e, t in data["segments"]]
+        info = SimpleNamespace(
+            language=data.get("language"),
+            language_probability=data.get("language_probability", 0.0),
+            duration=data.get("duration", 0.0),
+        )
+        return segments, info
+
+    def put(self, key: str, segments: list, info) -> None:
+        data = {
+            "language": getattr(info, "language", None),
+            "language_probability": round(float(getattr(info, "language_probability", 0.0) or 0.0), 4),
+            "duration": round(float(getattr(info, "duration", 0.0) or 0.0), 2),
+            "segments": [
+                [round(float(s.start), 2), round(float(s.end), 2), s.text] for s in segments
+            ],
+        }
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(".tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        tmp.replace(path)
+        st = path.stat()
+
+        with self._lock:
+            entries = self._load_entries()
+            old = entries.get(key)
+            if old:
+                self._total -= old[0]
+            entries[key] = (st.st_size, st.st_mtime)
+            self._total += st.st_size
+            self.stores += 1
+            self._evict_locked()
+
+    def _evict_locked(self) -> None:
+        if self._total <= self.max_bytes:
+            return
+        entries = self._entries
+        for key, (size, _) in sorted(entries.items(), key=lambda kv: kv[1][1]):
+            if self._total <= self.max_bytes:
+                break
+            try:
+                self._path(key).unlink()
+            except OSError:
+                pass
+            del entries[key]
+            self._total -= size
+            self.evictions += 1
+            logger.debug(f"淘汰转录缓存: {key} ({size} 字节)")
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._load_entries()
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+_settings = get_settings()
+asr_cache = ASRCache(_settings.ASR_CACHE_DIR, _settings.ASR_CACHE_MAX_MB * 1024 * 1024)
@@ -0,0 +1,113 @@
+"""
+转录检查点 — 长音频转录中途服务重启时从断点继续
+
+转录过程中每隔 ASR_CHECKPOINT_INTERVAL 秒把已完成的片段与音频偏移写入任务临时目录
+temp/scratch/{task_id}/asr_checkpoint.json。startup_event 发现上次中断、且有检查点的任务
+后重新调度：已完成的片段直接复用，转录从检查点的偏移处继续。
+转录完成后检查点标记 complete（任务后续的摘要等步骤中断时无需再转录），
+任务结束（完成 / 失败 / 用户取消）时随任务临时目录（task_scratch）一起删除。
+"""
+import json
+import logging
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from backend.config.settings import get_settings
+from backend.core.task_scratch import scratch_dir
+
+logger = logging.getLogger(__name__)
+
+# 检查点格式变化时递增，旧检查点视为无效
+CHECKPOINT_VERSION = 1
+CHECKPOINT_FILE = "asr_checkpoint.json"
+
+
+def has_checkpoint(task_id: str) -> bool:
+    return (scratch_dir(task_id) / CHECKPOINT_FILE).exists()
+
+
+class ASRCheckpoint:
+    """一个任务的转录进度"""
+
+    def __init__(self, task_id: str, fingerprint: dict, interval: float):
+        self.path = scratch_dir(task_id) / CHECKPOINT_FILE
+        self.fingerprint = fingerprint
+        self.interval = interval
+        self.segments: List[list] = []
+        # 已转录到的原始媒体时间（秒）
+        self.offset = 0.0
+        self.language: Optional[str] = None
+        self.language_probability = 0.0
+        self.complete = False
+        self._dirty = False
+        self._last_save = time.monotonic()
+
+    @classmethod
+    def open(cls, task_id: str, fingerprint: dict) -> "ASRCheckpoint":
+        """读取已有检查点；音频或解码参数与检查点不一致时从头开始"""
+        checkpoint = cls(task_id, fingerprint, get_settings().ASR_CHECKPOINT_INTERVAL)
+        # 临时目录在转录开始时创建；之后被删除（任务已结束）时 save 不再写入
+        scratch_dir(task_id, create=True)
+        try:
+            data = json.loads(checkpoint.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return checkpoint
+        except (OSError, ValueError) as e:
+            logger.warning(f"转录检查点损坏，从头转录: {checkpoint.path}: {e}")
+            return checkpoint
+        if data.get("version") != CHECKPOINT_VERSION or data.get("fingerprint") != fingerprint:
+            logger.info(f"转录检查点与当前音频或参数不一致，从头转录: {task_id}")
+            return checkpoint
+        checkpoint.segments = data.get("segments", [])
+        checkpoint.offset = float(data.get("offset", 0.0))
+        checkpoint.language = data.get("language")
+        checkpoint.language_probability = float(data.get("language_probability") or 0.0)
+        checkpoint.complete = bool(data.get("complete"))
+        return checkpoint
+
+    @property
+    def resumable(self) -> bool:
+        return self.complete or self.offset > 0
+
+    def restored_segments(self) -> List[SimpleNamespace]:
+        return [SimpleNamespace(start=s, end=e, text=t) for s, e, t in self.segments]
+
+    def restored_info(self, duration: float) -> SimpleNamespace:
+        return SimpleNamespace(
+            language=self.language, language_probability=self.language_probability, duration=duration
+        )
+
+    def add(self, segment, info) -> None:
+        self.segments.append([round(float(segment.start), 3), round(float(segment.end), 3), segment.text])
+        self.offset = max(self.offset, float(segment.end))
+        if info is not None and getattr(info, "language", None):
+            self.language = info.language
+            self.language_probability = float(getattr(info, "language_probability", 0.0) or 0.0)
+        self._dirty = True
+
+    def due(self) -> bool:
+        return self._dirty and time.monotonic() - self._last_save >= self.interval
+
+    def save(self, complete: bool = False) -> None:
+        """原子写入（写临时文件后替换）"""
+        if not self._dirty and complete == self.complete:
+            return
+        self.complete = complete
+        data = {
+            "version": CHECKPOINT_VERSION,
+            "fingerprint": self.fingerprint,
+            "offset": round(self.offset, 3),
+            "language": self.language,
+            "language_probability": round(self.language_probability, 4),
+            "complete": complete,
+            "segments": self.segments,
+        }
+        if not self.path.parent.is_dir():
+            # 任务已结束、临时目录已删除（如共享转录的发起任务被用户取消），检查点不再有归属
+            return
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(data, ensure_ascii=False, separators=(",", ":")), encoding="utf-8")
+        tmp.replace(self.path)
+        self._dirty = False
+        self._last_save = time.monotonic()
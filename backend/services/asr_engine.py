@@ -0,0 +1,308 @@
+"""
+跨任务批量 ASR 引擎（ASR_BATCH_ENGINE=true 时启用）
+
+每个转录任务先做 VAD，把语音切成不超过 30 秒的片段提交给引擎；引擎线程把所有
+并发任务的片段攒成微批（最多 max_batch 个，或等待 max_wait_ms），走后端的批量推理：
+- whisper: faster-whisper BatchedInferencePipeline（多个片段拼接后以 clip_timestamps 划分）
+- funasr:  AutoModel.generate(input=[...], batch_size=N)
+- qwen3:   Qwen3ASRModel.transcribe(audio=[...])
+结果按片段路由回各自的任务。使用同一模型的任务共用注册表中的同一份模型，不增加模型副本；
+按请求选择了不同模型的片段分开成批。
+"""
+import bisect
+import concurrent.futures
+import logging
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# Whisper 的输入窗口；FunASR / Qwen3 同样用这个长度切片
+CHUNK_SECONDS = 30
+
+
+class _Item:
+    __slots__ = ("audio", "language", "model", "future")
+
+    def __init__(self, audio: np.ndarray, language: Optional[str], model: Optional[str]):
+        self.audio = audio
+        self.language = language
+        self.model = model
+        self.future: concurrent.futures.Future = concurrent.futures.Future()
+
+
+class ASRBatchEngine:
+    """收集各任务的语音片段并批量推理的后台线程"""
+
+    def __init__(self, max_batch: int = 8, max_wait_ms: int = 50):
+        self.max_batch = max(1, max_batch)
+        self.max_wait = max(0, max_wait_ms) / 1000
+        self._queue: "queue.Queue[Optional[_Item]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._pipeline = None
+        self._pipeline_model = None
+        self._parser = None
+        self.batches = 0
+        self.items = 0
+        self.busy_seconds = 0.0
+
+    # ── 对外接口 ──────────────────────────────────────
+    def submit(
+        self, audio: np.ndarray, language: Optional[str], model: Optional[str] = None
+    ) -> concurrent.futures.Future:
+        """
+        提交一个语音片段，Future 的结果为 ([(start, end, text)], language)：
+        时间为相对片段起点的秒数，language 为识别出的语言（未识别出时为 None）
+        """
+        self._ensure_started()
+        item = _Item(audio, language, model)
+        self._queue.put(item)
+        return item.future
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._thread is not None:
+                self._queue.put(None)
+                self._thread.join(timeout=5)
+                self._thread = None
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "items": self.items,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+            "busy_seconds": round(self.busy_seconds, 1),
+            "queued": self._queue.qsize(),
+        }
+
+    # ── 引擎线程 ──────────────────────────────────────
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="asr-batch-engine", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+
+            # 已被任务取消的片段直接跳过
+            batch = [item for item in batch if item.future.set_running_or_notify_cancel()]
+            # 同一批必须是同一种语言、同一个模型（whisper 批量推理只接受一个 language）
+            groups: Dict[Tuple[Optional[str], Optional[str]], List[_Item]] = {}
+            for item in batch:
+                groups.setdefault((item.language, item.model), []).append(item)
+            for (language, model), items in groups.items():
+                started = time.perf_counter()
+                try:
+                    results = self._infer([item.audio for item in items], language, model)
+                except Exception as e:
+                    logger.error(f"批量转录失败（{len(items)} 个片段）: {e}")
+                    for item in items:
+                        item.future.set_exception(e)
+                    continue
+                finally:
+                    self.busy_seconds += time.perf_counter() - started
+                self.batches += 1
+                self.items += len(items)
+                logger.debug(f"批量转录: {len(items)} 个片段, 语言 {language}")
+                for item, result in zip(items, results):
+                    item.future.set_result(result)
+
+    # ── 后端批量推理 ──────────────────────────────────
+    def _infer(
+        self, audios: List[np.ndarray], language: Optional[str], model: Optional[str] = None
+    ) -> List[Tuple[List[Tuple[float, float, str]], Optional[str]]]:
+        from backend.config.ai_config import get_asr_config
+        from backend.core.ai_client import get_asr_model
+
+        provider = get_asr_config().provider.lower()
+        if provider == "whisper":
+            return self._infer_whisper(get_asr_model(model), audios, language)
+        if provider == "funasr":
+            return self._infer_funasr(get_asr_model(model), audios, language)
+        if provider == "qwen3":
+            return self._infer_qwen(get_asr_model(model), audios, language)
+        raise ValueError(f"不支持的ASR提供方: {provider}")
+
+    def _get_parser(self):
+        if self._parser is None:
+            from backend.services.audio_transcriber import AudioTranscriber
+            self._parser = AudioTranscriber()
+        return self._parser
+
+    def _infer_whisper(self, model, audios, language):
+        from faster_whisper import BatchedInferencePipeline
+        from backend.config.ai_config import get_whisper_config
+
+        if self._pipeline is None or self._pipeline_model is not model:
+            self._pipeline = BatchedInferencePipeline(model=model)
+            self._pipeline_model = model
+
+        # 多个片段首尾拼接，用 clip_timestamps 告诉 pipeline 每段的边界，一次批量解码
+        offsets = np.cumsum([0] + [len(a) for a in audios]) / SAMPLE_RATE
+        clips = [{"start": float(offsets[i]), "end": float(offsets[i + 1])} for i in range(len(audios))]
+        whisper_config = get_whisper_config()
+        segments, _ = self._pipeline.transcribe(
+            np.concatenate(audios),
+            language=language,
+            clip_timestamps=clips,
+            batch_size=len(audios),
+            vad_filter=False,
+            without_timestamps=False,
+            beam_size=whisper_config.beam_size,
+            best_of=whisper_config.best_of,
+            temperature=whisper_config.temperature,
+            no_speech_threshold=whisper_config.no_speech_threshold,
+            compression_ratio_threshold=whisper_config.compression_ratio_threshold,
+            log_prob_threshold=whisper_config.log_prob_threshold,
+        )
+        results: List[List[Tuple[float, float, str]]] = [[] for _ in audios]
+        starts = [float(o) for o in offsets[:-1]]
+        for seg in segments:
+            index = max(0, bisect.bisect_right(starts, seg.start + 1e-3) - 1)
+            base = starts[index]
+            results[index].append((float(seg.start) - base, float(seg.end) - base, seg.text))
+        # whisper 批量推理按传入的语言解码（未指定时由 iter_segments 事先检测）
+        return [(segments, language) for segments in results]
+
+    def _infer_funasr(self, model, audios, language):
+        parser = self._get_parser()
+        outputs = model.generate(
+            input=audios,
+            cache={},
+            language=language or "auto",
+            batch_size=len(audios),
+        )
+        results = []
+        for output in outputs:
+            segments, detected = parser._parse_funasr_result([output], language)
+            results.append(([(s.start, s.end, s.text) for s in segments if s.text], _known(detected)))
+        return results
+
+    def _infer_qwen(self, model, audios, language):
+        parser = self._get_parser()
+        outputs = model.transcribe(
+            audio=[(a, SAMPLE_RATE) for a in audios],
+            language=language,
+        )
+        results = []
+        for output in outputs:
+            segments, detected = parser._parse_qwen_result([output], language)
+            results.append(([(s.start, s.end, s.text) for s in segments if s.text], _known(detected)))
+        return results
+
+
+def _known(language: Optional[str]) -> Optional[str]:
+    return None if not language or language == "unknown" else language
+
+
+def group_speech(speech: List[dict], max_samples: int) -> List[Tuple[int, int]]:
+    """把相邻的 VAD 语音区间（采样点）合并成不超过 max_samples 的连续片段"""
+    chunks: List[Tuple[int, int]] = []
+    for ts in speech:
+        if chunks and ts["end"] - chunks[-1][0] <= max_samples:
+            chunks[-1] = (chunks[-1][0], ts["end"])
+        else:
+            chunks.append((ts["start"], ts["end"]))
+    return chunks
+
+
+def iter_segments(
+    engine: "ASRBatchEngine",
+    config,
+    pcm,
+    language: Optional[str],
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[SimpleNamespace, SimpleNamespace]]:
+    """
+    通过批量引擎转录一个音频（在线程中调用），按时间顺序产出 (segment, info)
+
+    pcm 为 media_decode.PCMAudio
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    whisper_config = config.whisper
+    audio = pcm.samples
+    duration = pcm.duration
+    speech = get_speech_timestamps(audio, VadOptions(
+        max_speech_duration_s=CHUNK_SECONDS,
+        min_silence_duration_ms=whisper_config.min_silence_duration_ms,
+        speech_pad_ms=whisper_config.speech_pad_ms,
+    ))
+    chunks = group_speech(speech, CHUNK_SECONDS * SAMPLE_RATE)
+
+    language_probability = 0.0
+    if not language and config.provider.lower() == "whisper" and chunks:
+        # 批量推理要求整批同一语言：每个任务先用共享模型检测一次
+        from backend.core.ai_client import get_asr_model
+        first = chunks[0][0]
+        language, language_probability, _ = get_asr_model(config.model).detect_language(
+            np.array(audio[first:first + CHUNK_SECONDS * SAMPLE_RATE])
+        )
+    info = SimpleNamespace(language=language, language_probability=language_probability, duration=duration)
+    logger.info(f"批量引擎转录: 时长 {duration:.0f}s, {len(chunks)} 个语音片段")
+
+    futures = [engine.submit(np.array(audio[start:end]), language, config.model) for start, end in chunks]
+    try:
+        for (start, _), future in zip(chunks, futures):
+            while True:
+                try:
+                    results, detected = future.result(timeout=0.5)
+                    break
+                except concurrent.futures.TimeoutError:
+                    if should_stop and should_stop():
+                        return
+            if info.language is None and detected:
+                # FunASR / Qwen3 在推理时识别语言：取第一个识别出语言的片段（与非批量路径一致）
+                info.language = detected
+            offset = start / SAMPLE_RATE
+            for seg_start, seg_end, text in results:
+                yield SimpleNamespace(start=seg_start + offset, end=seg_end + offset, text=text), info
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+_engine: Optional[ASRBatchEngine] = None
+
+
+def get_engine() -> ASRBatchEngine:
+    global _engine
+    if _engine is None:
+        from backend.config.ai_config import get_asr_config
+        config = get_asr_config()
+        _engine = ASRBatchEngine(config.engine_max_batch, config.engine_max_wait_ms)
+    return _engine
+
+
+def engine_stats() -> Optional[dict]:
+    return _engine.stats() if _engine is not None else None
+
+
+def shutdown_engine() -> None:
+    global _engine
+    if _engine is not None:
+        _engine.shutdown()
+        _engine = None
@@ -0,0 +1,316 @@
+"""
+长音频并行转录（Whisper / CTranslate2）
+
+流程：
+1. 解码后的 16kHz 单声道 float32 PCM 写入临时文件（已落盘的 memmap 直接复用），各进程用 memmap 只读共享
+2. 用 Silero VAD 找出静音段，在最接近目标窗口长度的静音中点切分，窗口两端各延伸一段重叠
+3. 进程池中每个进程持有一份自己的 WhisperModel（cpu_threads 按进程数分配），并行解码各窗口
+4. 片段时间戳加上窗口偏移；重叠区内的片段按中点归属到唯一一个窗口，避免重复
+
+进程池按配置懒创建并常驻（模型只加载一次），任务通过 acquire_pool() 使用，应用关闭时由 shutdown_pool() 释放。
+"""
+import bisect
+import concurrent.futures
+import contextlib
+import logging
+import multiprocessing
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# 语言检测只看开头这么多秒
+LANGUAGE_DETECT_SECONDS = 30
+
+
+@dataclass
+class Window:
+    """一个转录窗口：[start, end) 送入模型，片段中点落在 [keep_start, keep_end) 才保留"""
+    index: int
+    start: float
+    end: float
+    keep_start: float
+    keep_end: float
+
+
+def plan_windows(
+    speech: List[Tuple[float, float]],
+    duration: float,
+    window_seconds: float,
+    overlap_seconds: float,
+) -> List[Window]:
+    """
+    在静音处切分音频
+
+    Args:
+        speech: VAD 语音区间 [(start, end)]（秒，按时间排序）
+        duration: 音频总时长（秒）
+        window_seconds: 目标窗口长度
+        overlap_seconds: 窗口两端各向外延伸的重叠长度
+
+    Returns:
+        窗口列表；找不到合适静音时在目标位置硬切
+    """
+    # 候选切点：相邻语音区间之间静音的中点
+    cuts = [(speech[i][1] + speech[i + 1][0]) / 2 for i in range(len(speech) - 1)]
+    boundaries = [0.0]
+    while duration - boundaries[-1] > window_seconds * 1.5:
+        target = boundaries[-1] + window_seconds
+        lo = bisect.bisect_right(cuts, boundaries[-1] + window_seconds * 0.5)
+        hi = bisect.bisect_left(cuts, boundaries[-1] + window_seconds * 1.5)
+        candidates = cuts[lo:hi]
+        boundaries.append(min(candidates, key=lambda c: abs(c - target)) if candidates else target)
+    boundaries.append(duration)
+
+    windows = []
+    for i in range(len(boundaries) - 1):
+        keep_start, keep_end = boundaries[i], boundaries[i + 1]
+        windows.append(Window(
+            index=i,
+            start=max(0.0, keep_start - overlap_seconds),
+            end=min(duration, keep_end + overlap_seconds),
+            keep_start=keep_start,
+            # 最后一个窗口不设上限，时间戳略超出总时长的片段也保留
+            keep_end=keep_end if i < len(boundaries) - 2 else float("inf"),
+        ))
+    return windows
+
+
+def resolve_workers(config) -> int:
+    if config.parallel_workers > 0:
+        return config.parallel_workers
+    return max(1, (os.cpu_count() or 1) // max(1, config.parallel_cpu_threads))
+
+
+def should_use_parallel(config, duration: float) -> bool:
+    """是否对该音频启用并行转录"""
+    return (
+        config.provider.lower() == "whisper"
+        and config.parallel_min_duration > 0
+        and duration >= config.parallel_min_duration
+        and resolve_workers(config) > 1
+    )
+
+
+# ── 工作进程 ──────────────────────────────────────────
+_worker_model = None
+
+
+def _init_worker(model: str, device: str, compute_type: str, cpu_threads: int) -> None:
+    global _worker_model
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(
+        model, device=device, compute_type=compute_type, cpu_threads=cpu_threads, num_workers=1
+    )
+
+
+def _open_pcm(pcm_path: str) -> np.ndarray:
+    return np.memmap(pcm_path, dtype=np.float32, mode="r")
+
+
+def _detect_language(pcm_path: str) -> Tuple[str, float]:
+    audio = np.array(_open_pcm(pcm_path)[: LANGUAGE_DETECT_SECONDS * SAMPLE_RATE])
+    language, probability, _ = _worker_model.detect_language(audio)
+    return language, probability
+
+
+def _transcribe_window(
+    pcm_path: str, start: float, end: float, language: str, options: dict
+) -> List[Tuple[float, float, str]]:
+    audio = np.array(_open_pcm(pcm_path)[int(start * SAMPLE_RATE):int(end * SAMPLE_RATE)])
+    segments, _ = _worker_model.transcribe(audio, language=language, **options)
+    return [(seg.start + start, seg.end + start, seg.text) for seg in segments]
+
+
+# ── 进程池 ────────────────────────────────────────────
+# 按配置（模型、设备、计算类型、线程数、进程数）各保留一个进程池；正在使用的进程池不会被关闭，
+# 配置切换后旧配置的进程池在最后一个任务结束时才释放，不会取消其他任务的窗口
+_pool_lock = threading.Lock()
+_pools: Dict[tuple, concurrent.futures.ProcessPoolExecutor] = {}
+_pool_jobs: Dict[tuple, int] = {}
+_current_key: Optional[tuple] = None
+
+
+def _pool_key(config) -> tuple:
+    workers = resolve_workers(config)
+    return (config.model, config.device, config.compute_type, config.parallel_cpu_threads, workers)
+
+
+def _retire_idle_locked() -> None:
+    """关闭不是当前配置、且没有任务在用的进程池（空闲进程池没有待执行的窗口）"""
+    for key in list(_pools):
+        if key != _current_key and not _pool_jobs.get(key):
+            _pools.pop(key).shutdown(wait=False)
+            _pool_jobs.pop(key, None)
+            logger.info(f"释放并行转录进程池: 模型 {key[0]}")
+
+
+@contextlib.contextmanager
+def acquire_pool(config) -> Iterator[concurrent.futures.ProcessPoolExecutor]:
+    """使用配置对应的常驻进程池（不存在时创建），使用期间不会被关闭"""
+    global _current_key
+    key = _pool_key(config)
+    with _pool_lock:
+        _current_key = key
+        pool = _pools.get(key)
+        if pool is None:
+            logger.info(
+                f"启动并行转录进程池: {key[4]} 个进程 × {config.parallel_cpu_threads} 线程, 模型 {config.model}"
+            )
+            # CTranslate2 不能安全地 fork，使用 spawn
+            pool = _pools[key] = concurrent.futures.ProcessPoolExecutor(
+                max_workers=key[4],
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(config.model, config.device, config.compute_type, config.parallel_cpu_threads),
+            )
+        _pool_jobs[key] = _pool_jobs.get(key, 0) + 1
+        _retire_idle_locked()
+    try:
+        yield pool
+    finally:
+        with _pool_lock:
+            _pool_jobs[key] -= 1
+            _retire_idle_locked()
+
+
+def shutdown_pool() -> None:
+    """应用关闭时释放所有进程池"""
+    global _current_key
+    with _pool_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
+        _pool_jobs.clear()
+        _current_key = None
+
+
+# ── 主流程 ────────────────────────────────────────────
+def _whisper_options(whisper_config) -> dict:
+    return {
+        "beam_size": whisper_config.beam_size,
+        "best_of": whisper_config.best_of,
+        "temperature": whisper_config.temperature,
+        "vad_filter": whisper_config.vad_filter,
+        "vad_parameters": {
+            "min_silence_duration_ms": whisper_config.min_silence_duration_ms,
+            "speech_pad_ms": whisper_config.speech_pad_ms,
+        },
+        "no_speech_threshold": whisper_config.no_speech_threshold,
+        "compression_ratio_threshold": whisper_config.compression_ratio_threshold,
+        "log_prob_threshold": whisper_config.log_prob_threshold,
+        "condition_on_previous_text": whisper_config.condition_on_previous_text,
+    }
+
+
+def _wait(future: concurrent.futures.Future, should_stop: Optional[Callable[[], bool]]):
+    while True:
+        try:
+            return future.result(timeout=0.5)
+        except concurrent.futures.TimeoutError:
+            if should_stop and should_stop():
+                return None
+
+
+def iter_segments(
+    config,
+    audio,
+    language: Optional[str],
+    scratch_dir: Path,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> Iterator[Tuple[SimpleNamespace, SimpleNamespace]]:
+    """
+    并行转录（在线程中调用），按时间顺序产出 (segment, info)
+
+    窗口之间并行解码，但按顺序产出：前面的窗口完成后立即产出，
+    不必等待整段音频结束。should_stop 返回 True 时停止并取消尚未开始的窗口。
+    audio 为 media_decode.PCMAudio。
+    """
+    with acquire_pool(config) as pool:
+        yield from _iter_pool_segments(config, pool, audio, language, scratch_dir, should_stop)
+
+
+def _iter_pool_segments(
+    config,
+    pool: concurrent.futures.ProcessPoolExecutor,
+    audio,
+    language: Optional[str],
+    scratch_dir: Path,
+    should_stop: Optional[Callable[[], bool]],
+) -> Iterator[Tuple[SimpleNamespace, SimpleNamespace]]:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    from backend.services.media_decode import unlink_when_done
+
+    whisper_config = config.whisper
+    samples = audio.samples
+    duration = audio.duration
+    owns_pcm = audio.spill_path is None
+    if owns_pcm:
+        scratch_dir.mkdir(parents=True, exist_ok=True)
+        pcm_path = scratch_dir / f"asr_{uuid.uuid4().hex[:8]}.pcm"
+    else:
+        pcm_path = audio.spill_path
+    futures: List[concurrent.futures.Future] = []
+    try:
+        if owns_pcm:
+            pcm = np.memmap(pcm_path, dtype=np.float32, mode="w+", shape=samples.shape)
+            pcm[:] = samples
+            pcm.flush()
+            del pcm
+
+        speech = [
+            (ts["start"] / SAMPLE_RATE, ts["end"] / SAMPLE_RATE)
+            for ts in get_speech_timestamps(samples, VadOptions(
+                min_silence_duration_ms=whisper_config.min_silence_duration_ms,
+                speech_pad_ms=whisper_config.speech_pad_ms,
+            ))
+        ]
+        del samples
+        windows = plan_windows(
+            speech, duration, config.parallel_window_seconds, config.parallel_overlap_seconds
+        )
+        logger.info(f"并行转录: 时长 {duration:.0f}s, {len(windows)} 个窗口")
+
+        # 各窗口单独检测语言可能不一致，先统一检测一次
+        language_probability = 1.0
+        if not language:
+            futures.append(pool.submit(_detect_language, str(pcm_path)))
+            detected = _wait(futures[-1], should_stop)
+            if detected is None:
+                return
+            language, language_probability = detected
+            logger.info(f"并行转录检测语言: {language} ({language_probability:.2f})")
+
+        info = SimpleNamespace(
+            language=language, language_probability=language_probability, duration=duration
+        )
+        options = _whisper_options(whisper_config)
+        window_futures = [
+            pool.submit(_transcribe_window, str(pcm_path), w.start, w.end, language, options)
+            for w in windows
+        ]
+        futures.extend(window_futures)
+
+        for window, future in zip(windows, window_futures):
+            results = _wait(future, should_stop)
+            if results is None:
+                return
+            for start, end, text in results:
+                if window.keep_start <= (start + end) / 2 < window.keep_end:
+                    yield SimpleNamespace(start=start, end=end, text=text), info
+    finally:
+        for future in futures:
+            future.cancel()
+        # 已开始的窗口取消不了，仍在读 PCM 文件；Windows 上不能删除打开中的文件，等它们结束再删
+        if owns_pcm:
+            unlink_when_done(pcm_path, futures)
+        else:
+            audio.keep_spill_until(futures)
@@ -0,0 +1,149 @@
+"""
+ASR 转录遥测 — 已处理音频时长、实时率（RTF）、片段速率与剩余时间估计
+
+每次转录对应一个 TranscriptionProgress，进度按 ASR_PROGRESS_INTERVAL 节流后推送到任务 SSE；
+全局 asr_telemetry 汇总进行中与已结束的转录，供 /api/asr/metrics 查询。
+逐段明细只写入 backend.asr.segments 日志（DEBUG），ASR_LOG_SEGMENTS=true 时输出。
+"""
+import itertools
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 逐段明细的调试通道（默认不输出）
+segment_logger = logging.getLogger("backend.asr.segments")
+if get_settings().ASR_LOG_SEGMENTS:
+    segment_logger.setLevel(logging.DEBUG)
+
+# 最近多少次转录参与平均 RTF
+RECENT_WINDOW = 50
+
+
+class TranscriptionProgress:
+    """一次转录的进度（计时从真正开始解码算起，不含排队等待）"""
+
+    def __init__(self, progress_id: int, label: str, duration: float):
+        self.id = progress_id
+        self.label = label
+        self.duration = duration
+        self.created = time.monotonic()
+        self.started: Optional[float] = None
+        self.audio_seconds = 0.0
+        self.segments = 0
+        # 转录前去掉的静音时长（audio_compaction）
+        self.silence_removed = 0.0
+        # 从检查点续传时已完成的音频时长（不计入本次 RTF）
+        self.resumed = 0.0
+        self._last_emit = 0.0
+
+    def start(self) -> None:
+        if self.started is None:
+            self.started = time.monotonic()
+
+    def update(self, segment) -> None:
+        self.start()
+        self.segments += 1
+        self.audio_seconds = max(self.audio_seconds, float(segment.end))
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started if self.started is not None else 0.0
+
+    def should_emit(self, interval: float) -> bool:
+        """节流：距上次推送超过 interval 秒才推送"""
+        now = time.monotonic()
+        if now - self._last_emit < interval:
+            return False
+        self._last_emit = now
+        return True
+
+    def snapshot(self) -> dict:
+        elapsed = self.elapsed
+        processed = min(self.audio_seconds, self.duration) if self.duration else self.audio_seconds
+        done = processed - self.resumed
+        rtf = elapsed / done if done > 0 else None
+        eta = max(0.0, self.duration - processed) * rtf if rtf is not None and self.duration else None
+        return {
+            "audio_seconds": round(processed, 1),
+            "duration": round(self.duration, 1),
+            "percent": round(processed / self.duration * 100, 1) if self.duration else None,
+            "elapsed": round(elapsed, 1),
+            "queued": self.started is None,
+            "rtf": round(rtf, 3) if rtf is not None else None,
+            "segments": self.segments,
+            "segments_per_second": round(self.segments / elapsed, 2) if elapsed > 0 else 0.0,
+            "eta_seconds": round(eta) if eta is not None else None,
+            "silence_removed_seconds": round(self.silence_removed, 1),
+            "resumed_seconds": round(self.resumed, 1),
+        }
+
+
+class ASRTelemetry:
+    """全局转录统计"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self._active: Dict[int, TranscriptionProgress] = {}
+        self._recent_rtf: deque = deque(maxlen=RECENT_WINDOW)
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.audio_seconds_total = 0.0
+        self.processing_seconds_total = 0.0
+        self.segments_total = 0
+        self.silence_removed_total = 0.0
+
+    def begin(self, label: str, duration: float) -> TranscriptionProgress:
+        with self._lock:
+            progress = TranscriptionProgress(next(self._ids), label, duration)
+            self._active[progress.id] = progress
+        return progress
+
+    def finish(self, progress: TranscriptionProgress, status: str) -> dict:
+        """结束一次转录，status 为 completed / failed / cancelled，返回最终快照"""
+        snapshot = progress.snapshot()
+        with self._lock:
+            self._active.pop(progress.id, None)
+            if status == "completed":
+                self.completed += 1
+                self.audio_seconds_total += max(progress.audio_seconds - progress.resumed, 0.0)
+                self.processing_seconds_total += progress.elapsed
+                self.segments_total += progress.segments
+                self.silence_removed_total += progress.silence_removed
+                if snapshot["rtf"] is not None:
+                    self._recent_rtf.append(snapshot["rtf"])
+            elif status == "cancelled":
+                self.cancelled += 1
+            else:
+                self.failed += 1
+        return snapshot
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            active = [dict(p.snapshot(), id=p.id, label=p.label) for p in self._active.values()]
+            recent = list(self._recent_rtf)
+            return {
+                "active": active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "audio_seconds_total": round(self.audio_seconds_total, 1),
+                "processing_seconds_total": round(self.processing_seconds_total, 1),
+                "segments_total": self.segments_total,
+                "silence_removed_seconds_total": round(self.silence_removed_total, 1),
+                "rtf_overall": (
+                    round(self.processing_seconds_total / self.audio_seconds_total, 3)
+                    if self.audio_seconds_total > 0 else None
+                ),
+                "rtf_recent_avg": round(sum(recent) / len(recent), 3) if recent else None,
+            }
+
+
+asr_telemetry = ASRTelemetry()
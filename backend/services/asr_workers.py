@@ -0,0 +1,352 @@
+"""
+独立 ASR 工作进程（ASR_WORKER_PROCESSES > 0 时启用）
+
+API 进程只负责提交任务和接收结果，转录在单独的进程中进行，不与请求处理争抢 GIL：
+- N 个 spawn 出来的工作进程，各自加载一份模型；音频由 API 进程解码并落盘为 PCM，
+  工作进程 memmap 读取，通过 Pipe 逐段回传片段
+- API 进程中每个工作进程对应一个 IO 线程，从有界队列取任务（队列满时提交方等待）
+- 取消：提交方停止读取后设置共享的取消标记，工作进程在下一个片段处停止
+- 工作进程崩溃或被 OOM 杀掉时，当前任务失败，进程在下一个任务前重新拉起
+"""
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import queue
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 提交方 / IO 线程轮询取消状态的间隔（秒）
+POLL_INTERVAL = 0.5
+# 等待工作进程加载模型的上限（秒）
+READY_TIMEOUT = 600
+_END = object()
+_STARTED = object()
+
+
+# ── 工作进程 ──────────────────────────────────────────
+def _worker_main(index: int, conn, cancel) -> None:
+    """工作进程入口：加载默认模型后循环处理 (job_id, pcm_path, language, model)"""
+    logging.basicConfig(level=logging.INFO, format=f"%(levelname)s | [asr-worker-{index}] %(message)s")
+    logging.getLogger("faster_whisper").setLevel(logging.WARNING)
+    try:
+        from backend.core.ai_client import asr_model_spec, asr_models
+        from backend.services.audio_transcriber import AudioTranscriber
+        from backend.services.media_decode import PCMAudio
+
+        transcriber = AudioTranscriber()
+        # 每个工作进程本身就是一路并发，不再在进程内开并行转录进程池
+        transcriber.config.parallel_min_duration = 0
+        asr_models.get(asr_model_spec(transcriber.config))
+    except Exception as e:
+        conn.send(("error", f"ASR工作进程初始化失败: {e}"))
+        return
+    conn.send(("ready", None))
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            return
+        if job is None:
+            return
+        job_id, pcm_path, language, model_name = job
+
+        def should_stop() -> bool:
+            return cancel.value == job_id
+
+        try:
+            target = transcriber.with_model(model_name)
+            iter_backend = target._select_backend(use_engine=False)
+            # 进程内同样由注册表管理模型（ASR_MODEL_MEMORY_MB 对每个工作进程分别生效）
+            model = asr_models.get(asr_model_spec(target.config))
+            audio = PCMAudio.open_spill(pcm_path)
+            for segment, info in iter_backend(model, audio, language, should_stop):
+                if should_stop():
+                    break
+                conn.send((
+                    "segment",
+                    (float(segment.start), float(segment.end), segment.text),
+                    (getattr(info, "language", None),
+                     float(getattr(info, "language_probability", 0.0) or 0.0),
+                     float(getattr(info, "duration", 0.0) or 0.0)),
+                ))
+            conn.send(("done", None))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+# ── API 进程侧 ────────────────────────────────────────
+class _Job:
+    __slots__ = ("id", "pcm_path", "language", "model", "loop", "queue", "cancelled")
+
+    def __init__(self, job_id: int, pcm_path: str, language: Optional[str], model: Optional[str], loop):
+        self.id = job_id
+        self.pcm_path = pcm_path
+        self.language = language
+        self.model = model
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self.cancelled = threading.Event()
+
+    def emit(self, item: Any) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, item)
+        except RuntimeError:
+            # 事件循环已关闭（应用退出中）
+            pass
+
+
+class _Worker:
+    """一个工作进程及其连接"""
+
+    def __init__(self, ctx, index: int):
+        self.conn, child_conn = ctx.Pipe()
+        self.cancel = ctx.Value("q", 0)
+        self.process = ctx.Process(
+            target=_worker_main, args=(index, child_conn, self.cancel),
+            name=f"asr-worker-{index}", daemon=True,
+        )
+        self.process.start()
+        child_conn.close()
+
+    def wait_ready(self) -> None:
+        deadline = time.monotonic() + READY_TIMEOUT
+        while not self.conn.poll(POLL_INTERVAL):
+            if not self.process.is_alive():
+                raise RuntimeError(f"ASR工作进程启动失败 (exitcode={self.process.exitcode})")
+            if time.monotonic() > deadline:
+                raise RuntimeError("ASR工作进程加载模型超时")
+        kind, payload = self.conn.recv()
+        if kind != "ready":
+            raise RuntimeError(payload)
+
+    def stop(self) -> None:
+        try:
+            self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+
+
+class ASRWorkerPool:
+    """固定数量的 ASR 工作进程 + 有界任务队列"""
+
+    def __init__(self, processes: int, queue_size: int):
+        self.processes = max(1, processes)
+        self.queue_size = max(1, queue_size)
+        self._ctx = multiprocessing.get_context("spawn")
+        self._pending: "queue.Queue[Optional[_Job]]" = queue.Queue(maxsize=self.queue_size)
+        self._workers: List[Optional[_Worker]] = [None] * self.processes
+        self._threads: List[threading.Thread] = []
+        self._ids = itertools.count(1)
+        self._closed = False
+        self.busy = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.restarts = 0
+        for index in range(self.processes):
+            thread = threading.Thread(target=self._serve, args=(index,), name=f"asr-worker-io-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f"启动 ASR 工作进程池: {self.processes} 个进程, 队列上限 {self.queue_size}")
+
+    # ── 提交 ──────────────────────────────────────────
+    async def stream(
+        self,
+        pcm_path: str,
+        language: Optional[str],
+        cancel_check: Optional[Callable[[], bool]] = None,
+        on_start: Optional[Callable[[], None]] = None,
+        model: Optional[str] = None,
+    ) -> AsyncIterator[Tuple[SimpleNamespace, SimpleNamespace]]:
+        """
+        提交转录任务并逐段产出 (segment, info)；cancel_check 返回 True 时停止，
+        on_start 在任务被工作进程接手时调用，model 为本次使用的模型名（默认 ASR_MODEL）
+
+        pcm_path 为 media_decode 落盘的 float32 PCM 文件，由调用方在任务结束后删除
+        """
+        if self._closed:
+            raise RuntimeError("ASR工作进程池已关闭")
+        job = _Job(next(self._ids), pcm_path, language, model, asyncio.get_running_loop())
+
+        # 背压：队列满时在事件循环里等待，不占用线程
+        while True:
+            try:
+                self._pending.put_nowait(job)
+                break
+            except queue.Full:
+                if cancel_check and cancel_check():
+                    return
+                await asyncio.sleep(POLL_INTERVAL)
+
+        try:
+            while True:
+                if cancel_check and cancel_check():
+                    break
+                try:
+                    item = await asyncio.wait_for(job.queue.get(), timeout=POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    continue
+                if item is _END:
+                    break
+                if item is _STARTED:
+                    if on_start:
+                        on_start()
+                    continue
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # 提前退出（取消 / 消费方关闭）时通知工作进程停止；已完成的任务上为空操作
+            job.cancelled.set()
+
+    # ── IO 线程 ───────────────────────────────────────
+    def _ensure_worker(self, index: int) -> _Worker:
+        worker = self._workers[index]
+        if worker is not None and worker.process.is_alive():
+            return worker
+        if worker is not None:
+            self.restarts += 1
+            logger.warning(f"ASR工作进程 {index} 已退出 (exitcode={worker.process.exitcode})，重新启动")
+            worker.conn.close()
+        self._workers[index] = None
+        worker = _Worker(self._ctx, index)
+        try:
+            worker.wait_ready()
+        except Exception:
+            worker.process.terminate()
+            worker.conn.close()
+            raise
+        self._workers[index] = worker
+        return worker
+
+    def _serve(self, index: int) -> None:
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            if job.cancelled.is_set():
+                self.cancelled += 1
+                continue
+            try:
+                worker = self._ensure_worker(index)
+            except Exception as e:
+                logger.error(f"ASR工作进程 {index} 不可用: {e}")
+                self.failed += 1
+                job.emit(Exception(str(e)))
+                continue
+
+            self.busy += 1
+            try:
+                self._run_job(index, worker, job)
+            finally:
+                self.busy -= 1
+
+    def _run_job(self, index: int, worker: _Worker, job: _Job) -> None:
+        info: Optional[SimpleNamespace] = None
+        info_key = None
+        try:
+            worker.conn.send((job.id, job.pcm_path, job.language, job.model))
+            job.emit(_STARTED)
+            while True:
+                if not worker.conn.poll(POLL_INTERVAL):
+                    if (job.cancelled.is_set() or self._closed) and worker.cancel.value != job.id:
+                        worker.cancel.value = job.id
+                    if not worker.process.is_alive():
+                        raise EOFError
+                    continue
+                kind, *payload = worker.conn.recv()
+                if kind == "segment":
+                    (start, end, text), key = payload
+                    if key != info_key:
+                        info_key = key
+                        info = SimpleNamespace(language=key[0], language_probability=key[1], duration=key[2])
+                    job.emit((SimpleNamespace(start=start, end=end, text=text), info))
+                elif kind == "done":
+                    if job.cancelled.is_set():
+                        self.cancelled += 1
+                    else:
+                        self.completed += 1
+                    job.emit(_END)
+                    return
+                else:
+                    self.failed += 1
+                    job.emit(Exception(payload[0]))
+                    return
+        except (EOFError, OSError):
+            # 工作进程崩溃 / 被 OOM 杀掉：当前任务失败，下一个任务前重启
+            worker.process.join(timeout=1)
+            self.failed += 1
+            job.emit(Exception(f"ASR工作进程异常退出 (exitcode={worker.process.exitcode})"))
+            logger.error(f"ASR工作进程 {index} 在转录中退出 (exitcode={worker.process.exitcode})")
+            try:
+                self._ensure_worker(index)
+            except Exception as e:
+                logger.error(f"ASR工作进程 {index} 重启失败: {e}")
+
+    # ── 管理 ──────────────────────────────────────────
+    def shutdown(self) -> None:
+        self._closed = True
+        # 丢弃尚未开始的任务
+        while True:
+            try:
+                job = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.emit(Exception("ASR工作进程池已关闭"))
+        for _ in self._threads:
+            try:
+                self._pending.put(None, timeout=1)
+            except queue.Full:
+                break
+        for thread in self._threads:
+            thread.join(timeout=5)
+        for worker in self._workers:
+            if worker is not None:
+                worker.stop()
+
+    def stats(self) -> dict:
+        return {
+            "processes": self.processes,
+            "alive": sum(1 for w in self._workers if w is not None and w.process.is_alive()),
+            "busy": self.busy,
+            "queued": self._pending.qsize(),
+            "max_queue": self.queue_size,
+            "completed": self.completed,
+            "failed": self.failed,
+            "cancelled": self.cancelled,
+            "restarts": self.restarts,
+        }
+
+
+_pool: Optional[ASRWorkerPool] = None
+
+
+def get_worker_pool() -> ASRWorkerPool:
+    global _pool
+    if _pool is None:
+        from backend.config.ai_config import get_asr_config
+        config = get_asr_config()
+        _pool = ASRWorkerPool(config.worker_processes, config.worker_queue_size)
+    return _pool
+
+
+def worker_stats() -> Optional[dict]:
+    return _pool.stats() if _pool is not None else None
+
+
+def shutdown_workers() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
@@ -0,0 +1,282 @@
+"""
+下载音频缓存 — 同一视频的音频只下载一次，之后生成笔记、思维导图、仅转录都直接复用
+
+- 键：yt-dlp 提取结果的 extractor_key + id + 下载方式（compact / best），
+  分享参数不同、短链与长链等指向同一视频的 URL 共用一个条目
+- 条目：temp/audio_cache/{key[:2]}/{key}/ 下的音频文件（源编码）与 meta.json
+  {audio, title, urls}；urls 记录命中过的规范化 URL，再次请求同一 URL 时不必提取视频信息
+- 按最近使用时间（meta.json 的 mtime）做 LRU，总大小超过 AUDIO_CACHE_MAX_MB 时淘汰最久未用的条目；
+  正在解码的条目（pinned）和刚交给调用方、还没开始解码的条目（LEASE_SECONDS 内）不淘汰
+"""
+import hashlib
+import json
+import logging
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from backend.config.settings import get_settings
+from backend.services.video_metadata import canonical_url
+
+logger = logging.getLogger(__name__)
+
+# 缓存格式或键的组成变化时递增，旧条目自然失效
+CACHE_VERSION = 1
+META_FILE = "meta.json"
+# 命中或写入后的保留时间（秒）：下载返回到转录开始解码之间不会被淘汰
+LEASE_SECONDS = 600
+
+
+class _Entry:
+    __slots__ = ("audio", "size", "last_used", "title", "urls")
+
+    def __init__(self, audio: Path, size: int, last_used: float, title: str, urls: List[Tuple[str, str]]):
+        self.audio = audio
+        self.size = size
+        self.last_used = last_used
+        self.title = title
+        self.urls = urls
+
+
+class AudioCache:
+    """磁盘上的下载音频缓存（线程安全）"""
+
+    def __init__(self, root: Path, max_bytes: int, enabled: bool = True):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, _Entry]] = None
+        # (规范化 URL, 下载方式) -> key
+        self._urls: Dict[Tuple[str, str], str] = {}
+        self._pins: Dict[str, int] = {}
+        self._leases: Dict[str, float] = {}
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.evictions = 0
+
+    # ── 键 ────────────────────────────────────────────
+    def accepts(self, url: str) -> bool:
+        """是否缓存该 URL 的音频（本地 file:// 文件不缓存）"""
+        return self.enabled and not url.startswith("file://")
+
+    @staticmethod
+    def key_for(info: dict, mode: str) -> Optional[str]:
+        """视频信息对应的缓存键；提取结果没有视频 ID 时返回 None（不缓存）"""
+        extractor, video_id = info.get("extractor_key"), info.get("id")
+        if not extractor or not video_id:
+            return None
+        raw = f"{CACHE_VERSION}:{extractor}:{video_id}:{mode}"
+        return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def staging_dir(self) -> Path:
+        """下载中的文件先写到这里，完成后由 put 移入条目目录"""
+        with self._lock:
+            self._load_entries()  # 先清理上次运行留下的未完成下载
+        path = self.root / ".incoming"
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def _load_entries(self) -> Dict[str, _Entry]:
+        if self._entries is None:
+            entries = {}
+            if self.root.exists():
+                for meta_path in self.root.glob(f"*/*/{META_FILE}"):
+                    entry = self._read_entry(meta_path)
+                    if entry is None:
+                        shutil.rmtree(meta_path.parent, ignore_errors=True)
+                        continue
+                    key = meta_path.parent.name
+                    entries[key] = entry
+                    for url, mode in entry.urls:
+                        self._urls[(url, mode)] = key
+                # 上次运行中断留下的未完成下载（本进程的下载在 staging_dir 加载条目之后才开始）
+                shutil.rmtree(self.root / ".incoming", ignore_errors=True)
+            self._entries = entries
+            self._total = sum(entry.size for entry in entries.values())
+        return self._entries
+
+    @staticmethod
+    def _read_entry(meta_path: Path) -> Optional[_Entry]:
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            audio = meta_path.parent / meta["audio"]
+            size = audio.stat().st_size
+            last_used = meta_path.stat().st_mtime
+        except (OSError, ValueError, KeyError):
+            return None
+        urls = [tuple(u) for u in meta.get("urls", [])]
+        return _Entry(audio, size, last_used, meta.get("title", "unknown"), urls)
+
+    def _write_meta(self, key: str, entry: _Entry) -> None:
+        meta = {"audio": entry.audio.name, "title": entry.title, "urls": [list(u) for u in entry.urls]}
+        path = self._entry_dir(key) / META_FILE
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        tmp.replace(path)
+        entry.last_used = path.stat().st_mtime
+
+    # ── 读写 ──────────────────────────────────────────
+    def lookup_url(self, url: str, mode: str) -> Optional[Tuple[str, str]]:
+        """按之前命中过的 URL 查找（不需要视频信息），命中返回 (音频路径, 视频标题)"""
+        with self._lock:
+            self._load_entries()
+            key = self._urls.get((canonical_url(url), mode))
+            if key is None:
+                return None
+        return self.lookup(key, url, mode)
+
+    def lookup(self, key: str, url: str, mode: str) -> Optional[Tuple[str, str]]:
+        """按缓存键查找，命中返回 (音频路径, 视频标题)，并记录该 URL 以便下次直接命中"""
+        with self._lock:
+            entries = self._load_entries()
+            entry = entries.get(key)
+            if entry is None or not entry.audio.exists():
+                if entry is not None:
+                    self._drop_locked(key)
+                self.misses += 1
+                return None
+            alias = (canonical_url(url), mode)
+            if alias not in entry.urls:
+                entry.urls.append(alias)
+                self._urls[alias] = key
+            try:
+                self._write_meta(key, entry)  # 刷新最近使用时间
+            except OSError:
+                entry.last_used = time.time()
+            self._leases[key] = time.monotonic() + LEASE_SECONDS
+            self.hits += 1
+            return str(entry.audio), entry.title
+
+    def put(self, key: str, audio_file: str, info: dict, url: str, mode: str) -> str:
+        """把下载完成的音频移入缓存，返回缓存中的路径（其他调用方已写入同一条目时复用已有的）"""
+        source = Path(audio_file)
+        with self._lock:
+            entries = self._load_entries()
+            existing = entries.get(key)
+            if existing is not None and existing.audio.exists():
+                source.unlink(missing_ok=True)
+                self._leases[key] = time.monotonic() + LEASE_SECONDS
+                return str(existing.audio)
+
+            entry_dir = self._entry_dir(key)
+            entry_dir.mkdir(parents=True, exist_ok=True)
+            audio = entry_dir / f"audio{source.suffix}"
+            source.replace(audio)
+            alias = (canonical_url(url), mode)
+            entry = _Entry(audio, audio.stat().st_size, time.time(), info.get("title", "unknown"), [alias])
+            self._write_meta(key, entry)
+
+            entries[key] = entry
+            self._urls[alias] = key
+            self._total += entry.size
+            self._leases[key] = time.monotonic() + LEASE_SECONDS
+            self.stores += 1
+            self._evict_locked()
+            return str(audio)
+
+    # ── 使用中保护 ────────────────────────────────────
+    def _key_of(self, path: str) -> Optional[str]:
+        parent = Path(path).absolute().parent
+        key = parent.name
+        return key if self._entry_dir(key).absolute() == parent else None
+
+    @contextmanager
+    def pinned(self, path: str) -> Iterator[None]:
+        """读取缓存中的音频期间不淘汰该条目（不在缓存中的路径不做处理）"""
+        key = self._key_of(path)
+        if key is None:
+            yield
+            return
+        with self._lock:
+            self._pins[key] = self._pins.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                count = self._pins.pop(key, 1) - 1
+                if count > 0:
+                    self._pins[key] = count
+
+    def _in_use(self, key: str, now: float) -> bool:
+        return self._pins.get(key, 0) > 0 or self._leases.get(key, 0) > now
+
+    # ── 淘汰与清理 ────────────────────────────────────
+    def _drop_locked(self, key: str) -> int:
+        entry = self._entries.pop(key)
+        shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+        for alias in entry.urls:
+            if self._urls.get(alias) == key:
+                del self._urls[alias]
+        self._leases.pop(key, None)
+        self._total -= entry.size
+        return entry.size
+
+    def _evict_locked(self) -> None:
+        if self._total <= self.max_bytes:
+            return
+        now = time.monotonic()
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1].last_used):
+            if self._total <= self.max_bytes:
+                break
+            if self._in_use(key, now):
+                continue
+            self._drop_locked(key)
+            self.evictions += 1
+            logger.debug(f"淘汰音频缓存: {entry.title} ({entry.size} 字节)")
+        if self._total > self.max_bytes:
+            logger.info(f"音频缓存超出上限，剩余条目均在使用中: {self._total / 1024 / 1024:.0f}MB")
+
+    def list_entries(self) -> List[dict]:
+        """缓存条目（供存储统计）：path / title / size / last_used"""
+        with self._lock:
+            return [
+                {"path": entry.audio, "title": entry.title, "size": entry.size, "last_used": entry.last_used}
+                for entry in self._load_entries().values()
+            ]
+
+    def clear(self, older_than_days: float = 0) -> List[Tuple[str, int]]:
+        """删除未在使用中的条目（可只删超过指定天数未使用的），返回删除的 [(标题, 字节数)]"""
+        cutoff = time.time() - older_than_days * 86400
+        removed = []
+        with self._lock:
+            now = time.monotonic()
+            for key, entry in list(self._load_entries().items()):
+                if self._in_use(key, now) or (older_than_days > 0 and entry.last_used > cutoff):
+                    continue
+                removed.append((entry.title, self._drop_locked(key)))
+        return removed
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = self._load_entries()
+            lookups = self.hits + self.misses
+            now = time.monotonic()
+            return {
+                "enabled": self.enabled,
+                "entries": len(entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "in_use": sum(1 for key in entries if self._in_use(key, now)),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "stores": self.stores,
+                "evictions": self.evictions,
+            }
+
+
+_settings = get_settings()
+audio_cache = AudioCache(
+    _settings.AUDIO_CACHE_DIR, _settings.AUDIO_CACHE_MAX_MB * 1024 * 1024, _settings.AUDIO_CACHE_ENABLED
+)
@@ -0,0 +1,159 @@
+"""
+转录前音频压缩 — 去掉长静音 / 非语音段，只把语音部分送入 ASR
+
+讲座、播客里常有长时间停顿、片头音乐和广告间隙，全部送进模型会白白消耗转录时间。
+这里在解码后的 PCM 上做一次快速的语音检测：
+- vad:    Silero VAD（faster-whisper 自带），能区分语音与音乐，默认
+- energy: 按帧计算 RMS 能量（numpy 向量化），以噪声底 + 阈值判定，无需模型
+只有长度超过 ASR_COMPACT_MIN_SILENCE 的非语音段会被去掉，语音两侧各保留
+ASR_COMPACT_PAD 秒。压缩后的片段时间通过 OffsetMap 映射回原始媒体时间。
+"""
+import bisect
+import logging
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from backend.config.settings import get_settings
+from backend.services.media_decode import PCMAudio, spill_regions
+
+logger = logging.getLogger(__name__)
+
+# 能量检测的帧长（秒）与判定阈值（高于噪声底多少 dB 视为有声）
+ENERGY_FRAME_SECONDS = 0.03
+ENERGY_MARGIN_DB = 12.0
+ENERGY_FLOOR_DB = -60.0
+# 分块计算能量，避免对超长 memmap 一次性生成整段副本
+ENERGY_BLOCK_FRAMES = 2000
+# Silero VAD 同样分块运行（秒）；跨块的语音在 keep_regions 中合并
+VAD_BLOCK_SECONDS = 600
+
+
+class OffsetMap:
+    """压缩后时间 → 原始媒体时间的分段线性映射"""
+
+    def __init__(self, pieces: List[Tuple[int, int]], sample_rate: int):
+        self.compact_starts: List[float] = []
+        self.original_starts: List[float] = []
+        self.lengths: List[float] = []
+        position = 0
+        for start, end in pieces:
+            self.compact_starts.append(position / sample_rate)
+            self.original_starts.append(start / sample_rate)
+            self.lengths.append((end - start) / sample_rate)
+            position += end - start
+
+    def to_original(self, t: float, end: bool = False) -> float:
+        """
+        映射一个时间点；end=True 时恰好落在两段交界处的时间归前一段
+        （片段结束时间不跨到被去掉的静音之后）
+        """
+        if not self.compact_starts:
+            return t
+        find = bisect.bisect_left if end else bisect.bisect_right
+        index = max(0, find(self.compact_starts, t) - 1)
+        offset = min(max(t - self.compact_starts[index], 0.0), self.lengths[index])
+        return self.original_starts[index] + offset
+
+
+@dataclass
+class CompactedAudio:
+    """压缩结果：audio 为只含语音的 PCM（由调用方关闭），removed_seconds 为去掉的时长"""
+    audio: PCMAudio
+    offsets: OffsetMap
+    removed_seconds: float
+    original_duration: float
+
+
+def _energy_regions(samples: np.ndarray, sample_rate: int) -> List[Tuple[int, int]]:
+    frame = max(1, int(sample_rate * ENERGY_FRAME_SECONDS))
+    frames = len(samples) // frame
+    if frames == 0:
+        return [(0, len(samples))]
+    levels = np.empty(frames, dtype=np.float32)
+    for first in range(0, frames, ENERGY_BLOCK_FRAMES):
+        last = min(frames, first + ENERGY_BLOCK_FRAMES)
+        block = np.asarray(samples[first * frame:last * frame], dtype=np.float32).reshape(last - first, frame)
+        levels[first:last] = 10 * np.log10(np.mean(block * block, axis=1) + 1e-10)
+    threshold = max(float(np.percentile(levels, 10)) + ENERGY_MARGIN_DB, ENERGY_FLOOR_DB)
+    voiced = np.concatenate(([False], levels > threshold, [False]))
+    edges = np.flatnonzero(np.diff(voiced.astype(np.int8)))
+    return [(int(s) * frame, min(int(e) * frame, len(samples))) for s, e in zip(edges[::2], edges[1::2])]
+
+
+def _vad_regions(samples: np.ndarray, sample_rate: int, min_silence: float) -> List[Tuple[int, int]]:
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    # 两侧留白统一由 keep_regions 处理
+    options = VadOptions(min_silence_duration_ms=int(min_silence * 1000), speech_pad_ms=0)
+    block = VAD_BLOCK_SECONDS * sample_rate
+    regions: List[Tuple[int, int]] = []
+    for first in range(0, len(samples), block):
+        chunk = np.asarray(samples[first:first + block], dtype=np.float32)
+        regions.extend((first + ts["start"], first + ts["end"]) for ts in get_speech_timestamps(chunk, options))
+    return regions
+
+
+def keep_regions(
+    speech: List[Tuple[int, int]], total: int, sample_rate: int, min_silence: float, pad: float
+) -> List[Tuple[int, int]]:
+    """由语音区间得到要保留的区间：语音两侧加 pad，间隔短于 min_silence 的相邻区间合并"""
+    pad_samples = int(pad * sample_rate)
+    gap_samples = int(min_silence * sample_rate)
+    kept: List[Tuple[int, int]] = []
+    for start, end in sorted(speech):
+        start, end = max(0, start - pad_samples), min(total, end + pad_samples)
+        if kept and start - kept[-1][1] < gap_samples:
+            kept[-1] = (kept[-1][0], max(kept[-1][1], end))
+        else:
+            kept.append((start, end))
+    return kept
+
+
+def compact_audio(audio: PCMAudio, spill: bool = False) -> Optional[CompactedAudio]:
+    """
+    去掉音频中的长静音（阻塞，在线程中调用）
+
+    Args:
+        audio: 解码后的 PCM
+        spill: 压缩结果落盘为 memmap（需要交给 ASR 工作进程时；输入已落盘时总是落盘）
+
+    Returns:
+        CompactedAudio；未检测到语音或可去掉的时长不足 ASR_COMPACT_MIN_SILENCE 时返回 None
+    """
+    settings = get_settings()
+    min_silence = settings.ASR_COMPACT_MIN_SILENCE
+    pad = settings.ASR_COMPACT_PAD
+    sample_rate = audio.sample_rate
+    total = len(audio.samples)
+
+    if settings.ASR_COMPACT_METHOD == "energy":
+        speech = _energy_regions(audio.samples, sample_rate)
+    else:
+        try:
+            speech = _vad_regions(audio.samples, sample_rate, min_silence)
+        except ImportError:
+            speech = _energy_regions(audio.samples, sample_rate)
+
+    kept = keep_regions(speech, total, sample_rate, min_silence, pad)
+    kept_samples = sum(end - start for start, end in kept)
+    removed = (total - kept_samples) / sample_rate
+    if not kept or removed < min_silence:
+        return None
+
+    if spill or audio.spill_path is not None:
+        # 落盘的长音频：语音段直接分块写入新的落盘文件，不在内存中拼接
+        compacted = spill_regions(audio.samples, kept)
+    else:
+        samples = np.empty(kept_samples, dtype=np.float32)
+        position = 0
+        for start, end in kept:
+            samples[position:position + end - start] = audio.samples[start:end]
+            position += end - start
+        compacted = PCMAudio(samples, sample_rate)
+    logger.info(
+        f"音频压缩: 去掉 {removed:.0f}s 非语音（{removed / audio.duration:.0%}），"
+        f"{len(kept)} 段语音共 {kept_samples / sample_rate:.0f}s"
+    )
+    return CompactedAudio(compacted, OffsetMap(kept, sample_rate), removed, audio.duration)
@@ -3,18 +3,33 @@
 使用多模型进行语音转文字
 """
 import os
+import copy
 import logging
 import asyncio
-from typing import Optional
+import threading
+import contextlib
+from contextlib import aclosing
+from typing import Any, AsyncIterator, Callable, Optional, Tuple
 from types import SimpleNamespace
 
-from backend.core.ai_client import get_asr_model
+import numpy as np
+
+from backend.core.ai_client import asr_model_spec, asr_models
 from backend.config.ai_config import get_asr_config
+from backend.config.settings import get_settings
+from backend.core.single_flight import Flight, media_flights
+from backend.services import media_probe
+from backend.services.asr_cache import asr_cache, decoding_params
+from backend.services.audio_cache import audio_cache
+from backend.services.asr_checkpoint import ASRCheckpoint
+from backend.services.asr_telemetry import asr_telemetry, segment_logger
+from backend.services.audio_compaction import CompactedAudio, compact_audio
+from backend.services.media_decode import SAMPLE_RATE, PCMAudio, decode_pcm, spill_pcm
 
 logger = logging.getLogger(__name__)
 
-from backend.config.settings import get_settings
-_transcribe_semaphore = asyncio.Semaphore(get_settings().ASR_CONCURRENCY)
+_transcribe_semaphore = asyncio.Semaphore(max(1, get_asr_config().concurrency))
+_STREAM_END = object()
 
 
 class AudioTranscriber:
@@ -24,6 +39,15 @@ class AudioTranscriber:
         """初始化转录服务"""
         self.config = get_asr_config()
         self.last_detected_language: Optional[str] = None
+
+    def with_model(self, model: Optional[str]) -> "AudioTranscriber":
+        """使用指定模型（同一 provider）的转录服务副本；model 为空或为默认模型时返回自身"""
+        config = self.config.with_model(model)
+        if config is self.config:
+            return self
+        transcriber = copy.copy(self)
+        transcriber.config = config
+        return transcriber
     
     async def transcribe_audio(
         self,
@@ -31,7 +55,11 @@ class AudioTranscriber:
         language: Optional[str] = None,
         video_title: str = "",
         video_url: str = "",
-        cancel_check: Optional[callable] = None
+        cancel_check: Optional[callable] = None,
+        on_segment: Optional[Callable] = None,
+        on_progress: Optional[Callable] = None,
+        model: Optional[str] = None,
+        checkpoint_id: Optional[str] = None
     ) -> str:
         """
         转录音频文件
@@ -41,6 +69,14 @@ class AudioTranscriber:
             language: 指定语言（可选，如果不指定则自动检测）
             video_title: 视频标题（可选）
             video_url: 视频URL（可选）
+            cancel_check: 取消检查函数，返回 True 时在下一个片段处停止
+            on_segment: 每解码出一个片段调用 on_segment(segment, progress)，
+                        progress 为 segment.end / 音频总时长（0~1），可为协程函数
+            on_progress: 按 ASR_PROGRESS_INTERVAL 节流调用 on_progress(stats)，stats 含
+                         已处理时长、RTF、片段速率、ETA（见 asr_telemetry），可为协程函数
+            model: 本次使用的模型名（同一 provider，须在 ASR_MODELS 中），默认用 ASR_MODEL
+            checkpoint_id: 任务 ID；长音频的转录进度写入该任务的检查点，已有检查点时从断点继续
+                           （与其他任务共享同一转录时，检查点属于发起转录的任务，该任务结束后不再写入）
             
         Returns:
             转录文本（Markdown格式）
@@ -48,82 +84,465 @@ class AudioTranscriber:
         Raises:
             Exception: 转录失败
         """
+        if model and model != self.config.model:
+            if model not in self.config.available_models:
+                raise Exception(f"不支持的ASR模型: {model}（可选: {', '.join(self.config.available_models)}）")
+            transcriber = self.with_model(model)
+            try:
+                return await transcriber.transcribe_audio(
+                    audio_path, language, video_title, video_url,
+                    cancel_check, on_segment, on_progress, checkpoint_id=checkpoint_id
+                )
+            finally:
+                self.last_detected_language = transcriber.last_detected_language
+
+        identity = media_probe.file_identity(audio_path)
+        if identity is None:
+            raise Exception(f"转录失败: 音频文件不存在: {audio_path}")
+
+        async def on_event(kind: str, *args):
+            if kind == "segment" and on_segment:
+                await self._invoke(on_segment, *args)
+            elif kind == "progress" and on_progress:
+                await self._invoke(on_progress, *args)
+
+        # 同一文件、模型与语言的并发转录只做一次，片段与进度推送给所有调用方
+        key = ("asr", identity, self.config.provider, self.config.model, language)
+        label = video_title or os.path.basename(audio_path)
+        segments, info = await media_flights.run(
+            key,
+            lambda flight: self._transcribe(audio_path, language, label, flight, checkpoint_id),
+            cancel_check=cancel_check,
+            on_event=on_event,
+        )
+
+        # 保存检测到的语言
+        detected_language = getattr(info, "language", None) or language or "unknown"
+        language_probability = getattr(info, "language_probability", None)
+        if language_probability is None:
+            language_probability = 0.0
+        self.last_detected_language = detected_language
+        logger.info(f"检测到的语言: {detected_language}（概率 {language_probability:.2f}）")
+
+        # 组装转录结果
+        return self._format_transcript(
+            segments,
+            detected_language,
+            language_probability,
+            video_title,
+            video_url
+        )
+
+    async def _transcribe(
+        self,
+        audio_path: str,
+        language: Optional[str],
+        label: str,
+        flight: Flight,
+        checkpoint_id: Optional[str]
+    ) -> Tuple[list, Any]:
+        """
+        解码并转录（可由多个调用方共享）：片段以 ("segment", segment, progress)、
+        进度以 ("progress", stats) 事件发布，所有调用方都取消后停止
+
+        Returns:
+            (segments, info)
+        """
+        audio = None
+        # 转录过程中生成、需要在结束时关闭的 PCM（压缩结果、续传切片）
+        owned: list = []
+        checkpoint = None
+        telemetry = None
+        status = "failed"
         try:
-            if not os.path.exists(audio_path):
-                raise Exception(f"音频文件不存在: {audio_path}")
-            
-            logger.info(f"开始转录音频: {audio_path}")
-            
-            async with _transcribe_semaphore:
-                provider = self.config.provider.lower()
-                logger.info(f"🤖 正在加载 ASR 模型: {provider}:{self.config.model}")
-                model = get_asr_model()
-                logger.info("✅ ASR 模型加载完成")
-                
-                if provider == "whisper":
-                    segments, info = await asyncio.to_thread(
-                        self._do_whisper_transcribe,
-                        model,
-                        audio_path,
-                        language
-                    )
-                elif provider == "funasr":
-                    segments, info = await asyncio.to_thread(
-                        self._do_funasr_transcribe,
-                        model,
-                        audio_path,
-                        language
-                    )
-                elif provider == "qwen3":
-                    segments, info = await asyncio.to_thread(
-                        self._do_qwen_transcribe,
-                        model,
-                        audio_path,
-                        language
+            segments = []
+            info = None
+            # 只解码一次：缓存键与 ASR 后端共用同一份 PCM
+            audio = await self.decode_audio(audio_path)
+            # 先查结果缓存（在获取 ASR 信号量之前，命中时不占用转录名额）
+            cache_key = await self._cache_key(audio, language)
+            cached = await asyncio.to_thread(asr_cache.get, cache_key) if cache_key else None
+            if cached:
+                logger.info(f"转录缓存命中: {cache_key}")
+                cached_segments, info = cached
+                stream = self._replay_segments(cached_segments, info)
+            else:
+                checkpoint = await self._open_checkpoint(checkpoint_id, audio, language)
+                if checkpoint and checkpoint.complete:
+                    # 上次已转录完成（任务在后续步骤中断）
+                    logger.info(f"转录检查点已完成，直接复用: {checkpoint_id}")
+                    stream = self._replay_segments(
+                        checkpoint.restored_segments(), checkpoint.restored_info(audio.duration)
                     )
+                    checkpoint = None
                 else:
-                    raise Exception(f"不支持的ASR提供方: {self.config.provider}")
-            
-            # 保存检测到的语言
-            detected_language = getattr(info, "language", None) or language or "unknown"
-            language_probability = getattr(info, "language_probability", None)
-            if language_probability is None:
-                language_probability = 0.0
-            self.last_detected_language = detected_language
-            logger.info(f"检测到的语言: {detected_language}")
-            logger.info(f"语言检测概率: {language_probability:.2f}")
-            
-            # 组装转录结果
-            transcript_text = self._format_transcript(
-                segments,
-                detected_language,
-                language_probability,
-                video_title,
-                video_url
-            )
-            
-            logger.info("转录完成")
-            return transcript_text
-            
+                    telemetry = asr_telemetry.begin(label, audio.duration)
+                    stream = await self._live_segments(
+                        audio_path, audio, language, flight.cancelled, telemetry, checkpoint, owned
+                    )
+
+            interval = get_settings().ASR_PROGRESS_INTERVAL
+            async with aclosing(stream) as stream:
+                async for segment, info in stream:
+                    segments.append(segment)
+                    # 逐段明细只走调试通道（ASR_LOG_SEGMENTS），进度与 RTF 由 asr_telemetry 汇总
+                    if segment_logger.isEnabledFor(logging.DEBUG):
+                        segment_logger.debug(
+                            f"片段 #{len(segments):03d} | {self._format_time(segment.start)} → "
+                            f"{self._format_time(segment.end)} | {segment.text.strip()[:50]}"
+                        )
+                    if telemetry:
+                        telemetry.update(segment)
+                        if telemetry.should_emit(interval):
+                            await flight.publish("progress", telemetry.snapshot(), replay=False)
+                    duration = getattr(info, "duration", None) or 0.0
+                    progress = min(1.0, max(0.0, segment.end / duration)) if duration > 0 else 0.0
+                    await flight.publish("segment", segment, progress)
+
+            if flight.cancelled():
+                status = "cancelled"
+                raise asyncio.CancelledError("任务已被取消")
+
+            if telemetry:
+                stats = asr_telemetry.finish(telemetry, "completed")
+                telemetry = None
+                rtf = f"{stats['rtf']:.3f}" if stats["rtf"] is not None else "-"
+                logger.info(
+                    f"转录完成: 音频 {stats['audio_seconds']:.0f}s, 用时 {stats['elapsed']:.1f}s, "
+                    f"RTF {rtf}, {stats['segments']} 个片段, 跳过静音 {stats['silence_removed_seconds']:.0f}s"
+                )
+                await flight.publish("progress", stats, replay=False)
+
+            if checkpoint:
+                # 标记完成，任务后续步骤中断时无需再转录；任务结束时由调用方删除
+                await asyncio.to_thread(checkpoint.save, True)
+                checkpoint = None
+
+            if cache_key and not cached and info is not None:
+                try:
+                    await asyncio.to_thread(asr_cache.put, cache_key, segments, info)
+                except OSError as e:
+                    logger.warning(f"写入转录缓存失败: {e}")
+
+            return segments, info
+
+        except asyncio.CancelledError:
+            status = "cancelled"
+            raise
         except Exception as e:
             logger.error(f"转录失败: {str(e)}")
             raise Exception(f"转录失败: {str(e)}")
+        finally:
+            if telemetry:
+                asr_telemetry.finish(telemetry, status)
+            if checkpoint:
+                # 中断（包括服务关闭）时写出最新进度
+                try:
+                    checkpoint.save()
+                except OSError as e:
+                    logger.warning(f"写入转录检查点失败: {e}")
+            for pcm in owned:
+                pcm.close()
+            if audio is not None:
+                audio.close()
+
+    @staticmethod
+    async def _invoke(callback: Callable, *args) -> None:
+        result = callback(*args)
+        if asyncio.iscoroutine(result):
+            await result
+
+    async def decode_audio(self, audio_path: str) -> PCMAudio:
+        """把音频/视频文件解码为 16kHz PCM（交给工作进程时落盘为 memmap 共享）"""
+        # 解码期间缓存中的音频不会被淘汰；解码完成后转录只用 PCM，不再读取文件
+        with audio_cache.pinned(audio_path):
+            audio = await asyncio.to_thread(decode_pcm, audio_path, self.config.worker_processes > 0)
+        # 下载的音频登记过期望时长时，用解码得到的实际时长校验下载是否完整
+        media_probe.verify_duration(audio_path, audio.duration)
+        return audio
+
+    async def _live_segments(
+        self,
+        audio_path: str,
+        audio: PCMAudio,
+        language: Optional[str],
+        cancel_check: Optional[callable],
+        telemetry,
+        checkpoint: Optional[ASRCheckpoint],
+        owned: list
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        """组装实际转录的片段流：检查点续传 → 静音压缩 → 模型 → 时间映射回原始媒体 → 记录检查点"""
+        base = 0.0
+        source = audio
+        restored = []
+        if checkpoint and checkpoint.offset > 0:
+            base = checkpoint.offset
+            restored = checkpoint.restored_segments()
+            restored_info = checkpoint.restored_info(audio.duration)
+            telemetry.resumed = base
+            logger.info(f"从转录检查点继续: {base:.0f}s / {audio.duration:.0f}s, 已有 {len(restored)} 个片段")
+            if audio.duration - base < 1.0:
+                return self._replay_segments(restored, restored_info)
+            # 续传部分沿用已检测出的语言
+            language = language or checkpoint.language
+            source = PCMAudio(audio.samples[int(base * audio.sample_rate):], audio.sample_rate)
+
+        # 去掉长静音后再送入模型，片段时间映射回原始媒体时间
+        compacted = await self.compact_audio(source)
+        if compacted:
+            owned.append(compacted.audio)
+            telemetry.silence_removed = compacted.removed_seconds
+            source = compacted.audio
+        elif base and self.config.worker_processes > 0:
+            # 工作进程从文件读取 PCM，续传切片需要单独落盘
+            source = await asyncio.to_thread(spill_pcm, source.samples)
+            owned.append(source)
+
+        stream = self.stream_segments(audio_path, language, cancel_check, audio=source, on_start=telemetry.start)
+        if compacted or base:
+            stream = self._remap_segments(stream, compacted, base, audio.duration)
+        if checkpoint:
+            stream = self._checkpointed(stream, checkpoint)
+        if restored:
+            stream = self._chain(self._replay_segments(restored, restored_info), stream)
+        return stream
+
+    async def _open_checkpoint(
+        self, checkpoint_id: Optional[str], audio: PCMAudio, language: Optional[str]
+    ) -> Optional[ASRCheckpoint]:
+        """长音频才记录检查点；音频长度与解码参数一致时才沿用已有进度"""
+        settings = get_settings()
+        if (not checkpoint_id or not settings.ASR_CHECKPOINT_ENABLED
+                or audio.duration < settings.ASR_CHECKPOINT_MIN_DURATION):
+            return None
+        fingerprint = {"samples": len(audio.samples), "params": decoding_params(self.config, language)}
+        try:
+            return await asyncio.to_thread(ASRCheckpoint.open, checkpoint_id, fingerprint)
+        except Exception as e:
+            logger.warning(f"读取转录检查点失败，不使用检查点: {e}")
+            return None
+
+    @staticmethod
+    async def _checkpointed(
+        stream: AsyncIterator[Tuple[Any, Any]], checkpoint: ASRCheckpoint
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        """记录经过的片段，每隔 ASR_CHECKPOINT_INTERVAL 秒写一次检查点"""
+        async with aclosing(stream) as stream:
+            async for segment, info in stream:
+                checkpoint.add(segment, info)
+                if checkpoint.due():
+                    try:
+                        await asyncio.to_thread(checkpoint.save)
+                    except OSError as e:
+                        logger.warning(f"写入转录检查点失败: {e}")
+                yield segment, info
+
+    @staticmethod
+    async def _chain(*streams: AsyncIterator[Tuple[Any, Any]]) -> AsyncIterator[Tuple[Any, Any]]:
+        for stream in streams:
+            async with aclosing(stream) as stream:
+                async for item in stream:
+                    yield item
+
+    async def compact_audio(self, audio: PCMAudio) -> Optional[CompactedAudio]:
+        """去掉长静音（ASR_COMPACT_ENABLED）；检测失败时不压缩，照常转录整段音频"""
+        if not get_settings().ASR_COMPACT_ENABLED:
+            return None
+        try:
+            return await asyncio.to_thread(compact_audio, audio, self.config.worker_processes > 0)
+        except Exception as e:
+            logger.warning(f"音频压缩失败，转录完整音频: {e}")
+            return None
+
+    @staticmethod
+    async def _remap_segments(
+        stream: AsyncIterator[Tuple[Any, Any]],
+        compacted: Optional[CompactedAudio],
+        base: float,
+        duration: float
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        """
+        把送入模型的音频上的片段时间映射回原始媒体时间：先经压缩的 OffsetMap，
+        再加上续传起点 base；info.duration 改为原始时长
+        """
+        def start_of(t: float) -> float:
+            return (compacted.offsets.to_original(t) if compacted else t) + base
+
+        def end_of(t: float) -> float:
+            return (compacted.offsets.to_original(t, end=True) if compacted else t) + base
+
+        source_info = info = None
+        async with aclosing(stream) as stream:
+            async for segment, segment_info in stream:
+                if segment_info is not source_info:
+                    source_info = segment_info
+                    info = SimpleNamespace(
+                        language=getattr(segment_info, "language", None),
+                        language_probability=getattr(segment_info, "language_probability", 0.0),
+                        duration=duration,
+                    )
+                yield SimpleNamespace(start=start_of(segment.start), end=end_of(segment.end), text=segment.text), info
+
+    async def _cache_key(self, audio: PCMAudio, language: Optional[str]) -> Optional[str]:
+        """计算转录缓存键；缓存关闭时返回 None"""
+        if not get_settings().ASR_CACHE_ENABLED:
+            return None
+        try:
+            return await asyncio.to_thread(asr_cache.key_for, audio.samples, self.config, language)
+        except Exception as e:
+            logger.warning(f"计算转录缓存键失败，跳过缓存: {e}")
+            return None
+
+    @staticmethod
+    async def _replay_segments(segments: list, info: Any) -> AsyncIterator[Tuple[Any, Any]]:
+        """按 stream_segments 的形式产出缓存中的片段"""
+        for segment in segments:
+            yield segment, info
+
+    async def stream_segments(
+        self,
+        audio_path: str,
+        language: Optional[str] = None,
+        cancel_check: Optional[callable] = None,
+        audio: Optional[PCMAudio] = None,
+        on_start: Optional[Callable[[], None]] = None
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        """
+        流式转录：模型每解码出一个片段就产出 (segment, info)
+        
+        解码在线程中进行，片段通过队列送回事件循环。Whisper 逐段产出；
+        FunASR / Qwen3 的接口一次返回全部结果，解码结束后依次产出。
+        cancel_check 返回 True 时在下一个片段处停止解码。
+        audio 为调用方已解码的 PCM（由调用方负责关闭）；不传时在这里解码。
+        on_start 在排队结束、真正开始转录时调用（用于遥测计时）。
+        
+        Raises:
+            Exception: 音频不存在 / 不支持的提供方 / 模型解码失败
+        """
+        if audio is None:
+            if not os.path.exists(audio_path):
+                raise Exception(f"音频文件不存在: {audio_path}")
+            audio = await self.decode_audio(audio_path)
+            owned = True
+        else:
+            owned = False
+        try:
+            stream = self._stream_decoded(audio_path, audio, language, cancel_check, on_start)
+            async with aclosing(stream) as stream:
+                async for item in stream:
+                    yield item
+        finally:
+            if owned:
+                audio.close()
+
+    async def _stream_decoded(
+        self,
+        audio_path: str,
+        audio: PCMAudio,
+        language: Optional[str],
+        cancel_check: Optional[callable],
+        on_start: Optional[Callable[[], None]] = None
+    ) -> AsyncIterator[Tuple[Any, Any]]:
+        if self.config.worker_processes > 0:
+            # 转录交给独立工作进程（读取同一个 PCM spill 文件），本进程只提交任务、接收片段
+            from backend.services.asr_workers import get_worker_pool
+            logger.info(f"提交转录任务到 ASR 工作进程: {audio_path}")
+            pool = get_worker_pool()
+            stream = pool.stream(str(audio.spill_path), language, cancel_check, on_start, self.config.model)
+            async with aclosing(stream) as stream:
+                async for item in stream:
+                    yield item
+            return
+
+        provider = self.config.provider.lower()
+        iter_backend = self._select_backend()
+
+        logger.info(f"开始转录音频: {audio_path}")
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+
+        def should_stop() -> bool:
+            return stop.is_set() or bool(cancel_check and cancel_check())
+
+        def produce(model):
+            try:
+                for item in iter_backend(model, audio, language, should_stop):
+                    if should_stop():
+                        logger.info("转录已停止")
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, item)
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, e)
+                return
+            loop.call_soon_threadsafe(queue.put_nowait, _STREAM_END)
+
+        # 模型在线程中加载（不阻塞其他请求），转录期间租用，不会被注册表淘汰
+        spec = asr_model_spec(self.config)
+        if not asr_models.is_ready(spec):
+            logger.info(f"🤖 正在加载 ASR 模型: {provider}:{self.config.model}")
+        async with asr_models.alease(spec) as model:
+            # 批量引擎自己串行推理，任务之间不再用信号量排队（否则攒不成批）
+            limiter = contextlib.nullcontext() if self.config.batch_engine else _transcribe_semaphore
+            async with limiter:
+                if on_start:
+                    on_start()
+
+                worker = asyncio.ensure_future(asyncio.to_thread(produce, model))
+                try:
+                    while True:
+                        item = await queue.get()
+                        if item is _STREAM_END:
+                            break
+                        if isinstance(item, Exception):
+                            raise item
+                        yield item
+                finally:
+                    # 消费方提前退出时通知解码线程停止，并等它释放模型后再归还并发名额
+                    stop.set()
+                    await worker
     
-    def _do_whisper_transcribe(self, model, audio_path: str, language: Optional[str]):
+    def _select_backend(self, use_engine: bool = True) -> Callable:
+        """按配置选择逐段产出 (segment, info) 的转录实现"""
+        provider = self.config.provider.lower()
+        if use_engine and self.config.batch_engine:
+            return self._iter_engine_segments
+        if provider == "whisper":
+            return self._iter_whisper_segments
+        if provider == "funasr":
+            return self._iter_batch_segments(self._do_funasr_transcribe)
+        if provider == "qwen3":
+            return self._iter_batch_segments(self._do_qwen_transcribe)
+        raise Exception(f"不支持的ASR提供方: {self.config.provider}")
+
+    def _iter_whisper_segments(self, model, audio: PCMAudio, language: Optional[str], should_stop=None):
         """
-        执行实际的转录操作（在线程中运行）
+        执行实际的转录操作（在线程中运行），逐段产出
+        
+        超过 parallel_min_duration 的长音频改走多进程并行转录（asr_parallel）。
         
         Args:
             model: Whisper模型实例
-            audio_path: 音频文件路径
+            audio: 解码后的 16kHz PCM
             language: 指定语言
+            should_stop: 返回 True 时尽快停止
             
-        Returns:
-            (segments, info) 转录片段和信息
+        Yields:
+            (segment, info) 转录片段和信息（info.duration 为音频总时长）
         """
+        from backend.services import asr_parallel
+
+        duration = audio.duration
+        if asr_parallel.should_use_parallel(self.config, duration):
+            logger.info(f"音频时长 {duration:.0f}s，使用并行分段转录")
+            yield from asr_parallel.iter_segments(
+                self.config, audio, language, get_settings().TEMP_DIR / "asr", should_stop
+            )
+            return
+
         whisper_config = self.config.whisper
         segments_generator, info = model.transcribe(
-            audio_path,
+            audio.samples,
             language=language,
             beam_size=whisper_config.beam_size,
             best_of=whisper_config.best_of,
@@ -142,38 +561,31 @@ class AudioTranscriber:
             condition_on_previous_text=whisper_config.condition_on_previous_text
         )
         
-        # 收集所有segment并打印时间段信息
-        segments_list = []
-        segment_count = 0
-        
-        logger.info("=" * 60)
-        logger.info("🎬 开始逐段处理音频")
-        logger.info("=" * 60)
-        
+        # faster-whisper 的片段是惰性生成的：每次迭代才解码下一段
         for segment in segments_generator:
-            segment_count += 1
-            start_time = self._format_time(segment.start)
-            end_time = self._format_time(segment.end)
-            duration = segment.end - segment.start
-            text_preview = segment.text.strip()[:50] + "..." if len(segment.text.strip()) > 50 else segment.text.strip()
-            
-            # 打印每个segment的详细信息
-            logger.info(f"📝 片段 #{segment_count:03d} | {start_time} → {end_time} | 时长: {duration:.1f}s")
-            logger.info(f"   内容: {text_preview}")
-            logger.info("-" * 60)
-            
-            segments_list.append(segment)
-        
-        logger.info("=" * 60)
-        logger.info(f"✅ 处理完成！共 {segment_count} 个片段")
-        logger.info("=" * 60)
-        
-        return segments_list, info
+            yield segment, info
+
+    def _iter_engine_segments(self, model, audio: PCMAudio, language: Optional[str], should_stop=None):
+        """经跨任务批量引擎转录（在线程中运行）"""
+        from backend.services import asr_engine
+        yield from asr_engine.iter_segments(
+            asr_engine.get_engine(), self.config, audio, language, should_stop
+        )
+
+    @staticmethod
+    def _iter_batch_segments(transcribe):
+        """把一次性返回全部片段的后端包装成逐段产出"""
+        def iterate(model, audio: PCMAudio, language: Optional[str], should_stop=None):
+            segments, info = transcribe(model, audio, language)
+            info.duration = audio.duration
+            for segment in segments:
+                yield segment, info
+        return iterate
 
-    def _do_funasr_transcribe(self, model, audio_path: str, language: Optional[str]):
+    def _do_funasr_transcribe(self, model, audio: PCMAudio, language: Optional[str]):
         model_id = self.config.model
         result = model.generate(
-            input=[audio_path],
+            input=[np.asarray(audio.samples)],
             cache={},
             language=language or "auto",
             batch_size=1
@@ -186,9 +598,9 @@ class AudioTranscriber:
         )
         return segments, info
 
-    def _do_qwen_transcribe(self, model, audio_path: str, language: Optional[str]):
+    def _do_qwen_transcribe(self, model, audio: PCMAudio, language: Optional[str]):
         results = model.transcribe(
-            audio=audio_path,
+            audio=(np.asarray(audio.samples), SAMPLE_RATE),
             language=language
         )
         segments, detected_language = self._parse_qwen_result(results, language)
@@ -409,7 +821,7 @@ class AudioTranscriber:
             True if Whisper模型可用
         """
         try:
-            model = get_asr_model()
+            model = asr_models.get(asr_model_spec(self.config))
             return model is not None
         except Exception as e:
             logger.error(f"检查ASR模型可用性失败: {e}")
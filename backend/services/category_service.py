@@ -4,14 +4,14 @@
 import logging
 from typing import Optional
 
-from backend.db.connection import get_db
+from backend.db.connection import get_db, get_read_db
 
 logger = logging.getLogger(__name__)
 
 
 async def list_categories(include_counts: bool = True) -> list[dict]:
     """列出所有分类，可选附带笔记计数"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         if include_counts:
             cursor = await db.execute(
                 """SELECT c.id, c.name, c.sort_order, c.is_system, c.created_at,
@@ -97,7 +97,7 @@ async def delete_category(category_id: int) -> bool:
 
 async def get_category_id_by_name(name: str) -> Optional[int]:
     """按名称查分类ID"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute("SELECT id FROM categories WHERE name = ?", (name,))
         row = await cursor.fetchone()
         return row[0] if row else None
@@ -0,0 +1,254 @@
+"""
+媒体解码 — 把任意音视频直接解码为内存中的 16kHz 单声道 float32 PCM
+
+ffmpeg 以 `-f s16le -ar 16000 -ac 1 pipe:1` 输出到管道，边读边转换为 float32，
+不再先写临时 WAV / M4A 再让 ASR 后端重新解码一遍。超长媒体（超过
+AUDIO_DECODE_SPILL_SECONDS）落盘为 float32 原始文件并以 memmap 只读打开，
+ASR 工作进程 / 并行转录进程可直接共享同一个文件。
+未安装 ffmpeg 时退回 PyAV（faster-whisper 的依赖）解码。
+"""
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import uuid
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+# 每次从管道读取的字节数（s16le，约 32 秒音频）
+CHUNK_BYTES = 1 << 20
+# 落盘复制时每块的采样点数（约 1 分钟音频）
+COPY_BLOCK_SAMPLES = SAMPLE_RATE * 60
+
+
+@dataclass
+class PCMAudio:
+    """解码后的音频：samples 为 float32 [-1, 1]，可能是内存数组或 memmap"""
+    samples: np.ndarray
+    sample_rate: int = SAMPLE_RATE
+    spill_path: Optional[Path] = None
+    # spill 文件是否由本对象创建（close 时删除）
+    owns_spill: bool = False
+    # 仍在读取 spill 文件的子进程任务数：全部结束后才删除文件
+    _readers: int = field(default=0, init=False, repr=False)
+    _closed: bool = field(default=False, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False, compare=False)
+
+    @property
+    def duration(self) -> float:
+        return len(self.samples) / self.sample_rate
+
+    @classmethod
+    def open_spill(cls, path: Union[str, Path]) -> "PCMAudio":
+        """只读打开其他进程写好的 spill 文件（不负责删除）"""
+        path = Path(path)
+        return cls(np.memmap(path, dtype=np.float32, mode="r"), spill_path=path)
+
+    def keep_spill_until(self, futures: Iterable[Future]) -> None:
+        """spill 文件仍被这些子进程任务读取：close 之后等它们全部结束再删除"""
+        pending = [f for f in futures if not f.done()]
+        if not pending:
+            return
+        with self._lock:
+            self._readers += len(pending)
+        for future in pending:
+            future.add_done_callback(self._reader_done)
+
+    def _reader_done(self, _future: Future) -> None:
+        with self._lock:
+            self._readers -= 1
+            unlink = self._closed and self._readers == 0
+        if unlink:
+            self._unlink_spill()
+
+    def close(self) -> None:
+        self.samples = np.zeros(0, dtype=np.float32)
+        with self._lock:
+            self._closed = True
+            unlink = self._readers == 0
+        if unlink:
+            self._unlink_spill()
+
+    def _unlink_spill(self) -> None:
+        # Windows 上无法删除仍被打开的文件：读取方都结束后才会调用到这里
+        if self.owns_spill and self.spill_path is not None:
+            try:
+                self.spill_path.unlink()
+            except OSError as e:
+                logger.warning(f"删除 PCM 落盘文件失败: {self.spill_path}: {e}")
+            self.owns_spill = False
+
+    def __enter__(self) -> "PCMAudio":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def unlink_when_done(path: Path, futures: Iterable[Future]) -> None:
+    """读取 path 的子进程任务全部结束后删除文件（已全部结束时立即删除）"""
+    pending = [f for f in futures if not f.done()]
+    remaining = [len(pending)]
+    lock = threading.Lock()
+
+    def unlink() -> None:
+        try:
+            path.unlink(missing_ok=True)
+        except OSError as e:
+            logger.warning(f"删除 PCM 文件失败: {path}: {e}")
+
+    def reader_done(_future: Future) -> None:
+        with lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            unlink()
+
+    if not pending:
+        unlink()
+        return
+    for future in pending:
+        future.add_done_callback(reader_done)
+
+
+def _iter_ffmpeg(ffmpeg: str, source: str) -> Iterator[np.ndarray]:
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(
+            [
+                ffmpeg, "-nostdin", "-v", "error", "-i", source,
+                "-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+                "-ar", str(SAMPLE_RATE), "-ac", "1", "pipe:1",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=stderr,
+        )
+        try:
+            while True:
+                data = proc.stdout.read(CHUNK_BYTES)
+                if not data:
+                    break
+                yield np.frombuffer(data, dtype=np.int16)
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors="replace")[:500]
+            raise RuntimeError(f"FFmpeg 解码音频失败: {message}")
+
+
+def _iter_pyav(source: str) -> Iterator[np.ndarray]:
+    import av
+
+    with av.open(source) as container:
+        if not container.streams.audio:
+            raise RuntimeError(f"文件中没有音频流: {source}")
+        resampler = av.AudioResampler(format="s16", layout="mono", rate=SAMPLE_RATE)
+        for frame in container.decode(container.streams.audio[0]):
+            for out in resampler.resample(frame):
+                yield out.to_ndarray().reshape(-1)
+        for out in resampler.resample(None):
+            yield out.to_ndarray().reshape(-1)
+
+
+def iter_pcm_chunks(source: str) -> Iterator[np.ndarray]:
+    """逐块产出 16kHz 单声道 int16 PCM"""
+    ffmpeg = shutil.which("ffmpeg")
+    return _iter_ffmpeg(ffmpeg, source) if ffmpeg else _iter_pyav(source)
+
+
+def spill_pcm(samples: np.ndarray) -> PCMAudio:
+    """把内存中的 PCM 落盘为 memmap（供其他进程读取），返回的对象负责删除文件"""
+    return spill_regions(samples, [(0, len(samples))])
+
+
+def spill_regions(samples: np.ndarray, regions: List[Tuple[int, int]]) -> PCMAudio:
+    """
+    把 samples 中的若干区间（采样点）依次拼接写入落盘文件，返回的 memmap 对象负责删除文件
+
+    按块复制，samples 为 memmap 时也不会把整段音频读进内存。
+    """
+    spill_dir = get_settings().TEMP_DIR / "asr"
+    spill_dir.mkdir(parents=True, exist_ok=True)
+    spill_path = spill_dir / f"pcm_{uuid.uuid4().hex[:8]}.f32"
+    try:
+        with open(spill_path, "wb") as f:
+            for start, end in regions:
+                for first in range(start, end, COPY_BLOCK_SAMPLES):
+                    block = samples[first:min(end, first + COPY_BLOCK_SAMPLES)]
+                    np.asarray(block, dtype=np.float32).tofile(f)
+    except BaseException:
+        spill_path.unlink(missing_ok=True)
+        raise
+    audio = PCMAudio.open_spill(spill_path)
+    audio.owns_spill = True
+    return audio
+
+
+def decode_pcm(source: str, force_spill: bool = False) -> PCMAudio:
+    """
+    解码媒体文件为 PCMAudio（阻塞，在线程中调用）
+
+    Args:
+        source: 音频或视频文件路径
+        force_spill: 总是落盘为 memmap（需要交给其他进程读取时）
+
+    Raises:
+        RuntimeError: 解码失败或没有音频流
+    """
+    settings = get_settings()
+    spill_samples = int(settings.AUDIO_DECODE_SPILL_SECONDS * SAMPLE_RATE)
+    spill_dir = settings.TEMP_DIR / "asr"
+
+    chunks = []
+    total = 0
+    spill_path: Optional[Path] = None
+    spill_file = None
+    try:
+        for chunk in iter_pcm_chunks(source):
+            samples = chunk.astype(np.float32) / 32768.0
+            total += len(samples)
+            if spill_file is None and (force_spill or (spill_samples > 0 and total > spill_samples)):
+                spill_dir.mkdir(parents=True, exist_ok=True)
+                spill_path = spill_dir / f"pcm_{uuid.uuid4().hex[:8]}.f32"
+                spill_file = open(spill_path, "wb")
+                for pending in chunks:
+                    spill_file.write(pending.tobytes())
+                chunks = []
+            if spill_file is not None:
+                spill_file.write(samples.tobytes())
+            else:
+                chunks.append(samples)
+    except BaseException:
+        if spill_file is not None:
+            spill_file.close()
+            os.unlink(spill_path)
+        raise
+
+    if spill_file is not None:
+        spill_file.close()
+        if total == 0:
+            os.unlink(spill_path)
+        else:
+            logger.debug(f"音频 {total / SAMPLE_RATE:.0f}s 落盘解码: {spill_path}")
+            audio = PCMAudio.open_spill(spill_path)
+            audio.owns_spill = True
+            return audio
+
+    if total == 0:
+        raise RuntimeError(f"未能从文件中解码出音频: {source}")
+    samples = np.concatenate(chunks) if len(chunks) > 1 else chunks[0]
+    return PCMAudio(samples)
@@ -0,0 +1,120 @@
+"""
+媒体探测 — ffprobe / ffmpeg 的异步调用与按文件缓存的探测结果
+
+所有外部媒体工具都以参数列表启动（不经 shell），在事件循环中异步等待输出，
+超时或调用方被取消时终止子进程，探测长文件不会阻塞 SSE 等其他请求。
+ffprobe 结果按（路径, 大小, 修改时间）缓存；下载音频的时长校验不再单独调用 ffprobe，
+而是在转录解码完成后用解码得到的实际时长比对（decode_pcm 本来就会读完整个音频流）。
+"""
+import asyncio
+import json
+import logging
+import os
+from collections import OrderedDict
+from typing import Optional, Sequence, Tuple
+
+from backend.config.settings import get_settings
+
+logger = logging.getLogger(__name__)
+
+# 缓存的探测结果 / 待校验时长的最大条目数
+MAX_ENTRIES = 256
+# 实际时长与期望时长相差超过该比例时告警
+DURATION_TOLERANCE = 0.1
+
+_probes: "OrderedDict[Tuple[str, int, int], dict]" = OrderedDict()
+_expected: "OrderedDict[str, float]" = OrderedDict()
+
+
+async def run_media_tool(args: Sequence[str], timeout: float) -> Tuple[int, bytes, bytes]:
+    """
+    运行 ffprobe / ffmpeg 等命令，返回 (returncode, stdout, stderr)
+
+    Raises:
+        FileNotFoundError: 命令不存在
+        asyncio.TimeoutError: 超过 timeout 秒（子进程已终止）
+    """
+    proc = await asyncio.create_subprocess_exec(
+        *args,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(proc.communicate(), timeout)
+    except BaseException:
+        # 超时或被取消：不留下孤儿进程
+        if proc.returncode is None:
+            proc.kill()
+            await asyncio.shield(proc.wait())
+        raise
+    return proc.returncode, stdout, stderr
+
+
+def file_identity(path: str) -> Optional[Tuple[str, int, int]]:
+    """文件标识（绝对路径, 大小, 修改时间），文件不存在时返回 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return os.path.abspath(path), st.st_size, st.st_mtime_ns
+
+
+async def probe_media(path: str) -> Optional[dict]:
+    """
+    ffprobe 探测文件的容器与全部流信息（{"format": ..., "streams": [...]}），按文件缓存
+
+    Returns:
+        探测结果；文件不存在、未安装 ffprobe、超时或探测失败时返回 None
+    """
+    key = file_identity(path)
+    if key is None:
+        return None
+    if key in _probes:
+        _probes.move_to_end(key)
+        return _probes[key]
+
+    try:
+        returncode, stdout, stderr = await run_media_tool(
+            ["ffprobe", "-v", "error", "-show_format", "-show_streams", "-of", "json", path],
+            get_settings().MEDIA_PROBE_TIMEOUT,
+        )
+    except FileNotFoundError:
+        logger.warning("未找到 ffprobe，跳过媒体探测")
+        return None
+    except asyncio.TimeoutError:
+        logger.warning(f"ffprobe 探测超时: {os.path.basename(path)}")
+        return None
+    if returncode != 0:
+        logger.warning(f"ffprobe 探测失败: {stderr.decode(errors='replace')[:200]}")
+        return None
+
+    try:
+        probe = json.loads(stdout.decode("utf-8"))
+    except (json.JSONDecodeError, UnicodeDecodeError) as e:
+        logger.warning(f"ffprobe 输出解析失败: {e}")
+        return None
+
+    _probes[key] = probe
+    while len(_probes) > MAX_ENTRIES:
+        _probes.popitem(last=False)
+    return probe
+
+
+def expect_duration(path: str, duration: float) -> None:
+    """登记下载文件的期望时长（来自视频元数据），解码后由 verify_duration 校验"""
+    if not duration:
+        return
+    _expected[os.path.abspath(path)] = float(duration)
+    while len(_expected) > MAX_ENTRIES:
+        _expected.popitem(last=False)
+
+
+def verify_duration(path: str, actual: float) -> None:
+    """
+    用解码得到的实际时长校验下载是否完整（只记录告警：转录按音频包解码，
+    容器时长信息错误不影响结果，时长明显偏短通常说明下载不完整）
+    """
+    expected = _expected.pop(os.path.abspath(path), None)
+    if expected and actual and abs(actual - expected) / expected > DURATION_TOLERANCE:
+        logger.warning(f"音频时长异常，期望{expected:.0f}s，实际{actual:.0f}s，下载可能不完整")
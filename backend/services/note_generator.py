@@ -10,7 +10,6 @@ import re
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Callable, Dict, Any
-import aiofiles
 
 from backend.services.video_downloader import VideoDownloader
 from backend.services.audio_transcriber import AudioTranscriber
@@ -18,6 +17,7 @@ from backend.services.text_optimizer import TextOptimizer
 from backend.services.content_summarizer import ContentSummarizer
 from backend.services.text_translator import TextTranslator
 from backend.utils.file_handler import sanitize_filename
+from backend.core.artifact_store import artifact_store
 
 logger = logging.getLogger(__name__)
 
@@ -54,6 +54,10 @@ class NoteGenerator:
         audio_path_override: Optional[str] = None,
         video_title_override: Optional[str] = None,
         subtitle_text_override: Optional[str] = None,
+        transcript_callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        asr_progress_callback: Optional[Callable[[Dict[str, Any]], Any]] = None,
+        asr_model: Optional[str] = None,
+        checkpoint_id: Optional[str] = None,
     ) -> Dict[str, Any]:
         """
         生成完整的视频笔记
@@ -64,6 +68,10 @@ class NoteGenerator:
             summary_language: 摘要语言代码
             progress_callback: 进度回调函数 callback(progress: int, message: str)
             cancel_check: 取消检查函数 cancel_check() -> bool
+            transcript_callback: 转录片段回调 callback({index, start, end, text})，ASR 每解码出一段调用一次
+            asr_progress_callback: 转录遥测回调 callback(stats)，stats 含已处理时长、RTF、ETA 等（节流后调用）
+            asr_model: 本次转录使用的 ASR 模型（须在 ASR_MODELS 中），默认用 ASR_MODEL
+            checkpoint_id: 转录检查点 ID（通常为任务 ID），长音频转录可从断点继续
             
         Returns:
             包含所有结果的字典：
@@ -109,9 +117,7 @@ class NoteGenerator:
                 self._check_cancelled(cancel_check)
                 
                 try:
-                    subtitle_text, video_title = await self.video_downloader.extract_subtitles(
-                        video_url, temp_dir
-                    )
+                    subtitle_text, video_title = await self.video_downloader.extract_subtitles(video_url)
                 except Exception as e:
                     logger.warning(f"字幕提取异常: {e}")
                     subtitle_text = None
@@ -180,11 +186,49 @@ class NoteGenerator:
                 await asyncio.sleep(0.2)
                 self._check_cancelled(cancel_check)
                 
+                # 转录进度按 segment.end / 音频时长映射到 40%~54%，只在百分比变化时更新
+                segment_index = 0
+                last_percent = -1
+
+                async def on_segment(segment, ratio: float):
+                    nonlocal segment_index, last_percent
+                    segment_index += 1
+                    if transcript_callback:
+                        try:
+                            result = transcript_callback({
+                                "index": segment_index,
+                                "start": round(segment.start, 2),
+                                "end": round(segment.end, 2),
+                                "text": segment.text.strip(),
+                            })
+                            if asyncio.iscoroutine(result):
+                                await result
+                        except Exception as e:
+                            logger.warning(f"转录片段回调失败: {e}")
+                    percent = int(ratio * 100)
+                    if percent != last_percent:
+                        last_percent = percent
+                        await self._update_progress(
+                            progress_callback, 40 + int(ratio * 14), f"🎤 ViNote正在原文转录... {percent}%"
+                        )
+
+                async def on_progress(stats: Dict[str, Any]):
+                    try:
+                        result = asr_progress_callback(stats)
+                        if asyncio.iscoroutine(result):
+                            await result
+                    except Exception as e:
+                        logger.warning(f"转录进度回调失败: {e}")
+
                 raw_transcript = await self.audio_transcriber.transcribe_audio(
                     audio_path,
                     video_title=video_title,
                     video_url=video_url,
-                    cancel_check=cancel_check
+                    cancel_check=cancel_check,
+                    on_segment=on_segment,
+                    on_progress=on_progress if asr_progress_callback else None,
+                    model=asr_model,
+                    checkpoint_id=checkpoint_id
                 )
                 
                 detected_language = self.audio_transcriber.get_detected_language(raw_transcript)
@@ -197,9 +241,8 @@ class NoteGenerator:
             safe_title = self._sanitize_title(video_title)
             
             # 保存原始转录
-            raw_md_filename = f"raw_{safe_title}_{short_id}.md"
-            raw_md_path = temp_dir / raw_md_filename
-            await self._save_file(raw_md_path, raw_transcript)
+            raw_md_filename = artifact_store.display_name("raw", safe_title, short_id)
+            raw_md_path = await self._save_file(short_id, safe_title, "raw", raw_transcript)
             
             # 步骤3: 优化转录文本
             await self._update_progress(progress_callback, 55, "✍️ ViNote正在整理完整笔记...")
@@ -226,9 +269,8 @@ class NoteGenerator:
 """
             
             # 保存优化后的转录
-            transcript_filename = f"transcript_{safe_title}_{short_id}.md"
-            transcript_path = temp_dir / transcript_filename
-            await self._save_file(transcript_path, transcript_with_meta)
+            transcript_filename = artifact_store.display_name("transcript", safe_title, short_id)
+            transcript_path = await self._save_file(short_id, safe_title, "transcript", transcript_with_meta)
             
             # 步骤4: 检查是否需要翻译
             translation_content = None
@@ -267,9 +309,8 @@ class NoteGenerator:
 """
                 
                 # 保存翻译
-                translation_filename = f"translation_{safe_title}_{short_id}.md"
-                translation_path = temp_dir / translation_filename
-                await self._save_file(translation_path, translation_with_meta)
+                translation_filename = artifact_store.display_name("translation", safe_title, short_id)
+                translation_path = await self._save_file(short_id, safe_title, "translation", translation_with_meta)
             else:
                 logger.info(f"不需要翻译: detected={detected_language}, target={summary_language}")
             
@@ -293,9 +334,8 @@ class NoteGenerator:
             mindmap_filename = None
             mindmap_path = None
             if mindmap:
-                mindmap_filename = f"mindmap_{safe_title}_{short_id}.md"
-                mindmap_path = temp_dir / mindmap_filename
-                await self._save_file(mindmap_path, mindmap)
+                mindmap_filename = artifact_store.display_name("mindmap", safe_title, short_id)
+                mindmap_path = await self._save_file(short_id, safe_title, "mindmap", mindmap)
             
             summary_with_meta = f"""# {video_title}
 
@@ -311,9 +351,8 @@ class NoteGenerator:
 *由 ViNote AI 自动生成*
 """
             
-            summary_filename = f"summary_{safe_title}_{short_id}.md"
-            summary_path = temp_dir / summary_filename
-            await self._save_file(summary_path, summary_with_meta)
+            summary_filename = artifact_store.display_name("summary", safe_title, short_id)
+            summary_path = await self._save_file(short_id, safe_title, "summary", summary_with_meta)
             
             # 步骤7: 完成
             await self._update_progress(progress_callback, 100, "✨ 所有处理已完成！")
@@ -343,7 +382,7 @@ class NoteGenerator:
             if translation_content and translation_path and translation_with_meta:
                 result["translation"] = translation_with_meta
                 result["files"]["translation_path"] = translation_path
-                result["files"]["translation_filename"] = translation_path.name
+                result["files"]["translation_filename"] = translation_filename
             
             logger.info(f"笔记生成完成: {video_title}")
             return result
@@ -450,14 +489,14 @@ class NoteGenerator:
         # 最长限制
         return safe[:80] or "untitled"
     
-    async def _save_file(self, path: Path, content: str):
-        """保存文件"""
+    async def _save_file(self, short_id: str, safe_title: str, file_type: str, content: str) -> Path:
+        """保存笔记文件到分片存储，返回实际路径"""
         try:
-            async with aiofiles.open(path, "w", encoding="utf-8") as f:
-                await f.write(content)
-            logger.info(f"文件已保存: {path.name}")
+            path = await artifact_store.write(short_id, safe_title, file_type, content)
+            logger.info(f"文件已保存: {path.relative_to(artifact_store.root)}")
+            return path
         except Exception as e:
-            logger.error(f"保存文件失败 {path.name}: {e}")
+            logger.error(f"保存文件失败 {file_type}_{short_id}: {e}")
             raise
     
     def is_available(self) -> bool:
@@ -1,10 +1,13 @@
 """
 笔记数据访问层 — SQLite CRUD + 分页/筛选/排序
 """
+import base64
+import json
 import logging
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-from backend.db.connection import get_db
+from backend.db.connection import get_db, get_pool, get_read_db
+from backend.services import note_search
 
 logger = logging.getLogger(__name__)
 
@@ -65,6 +68,69 @@ async def save_note(
             return cursor.lastrowid
 
 
+# 排序键表达式：completed_at 可能为 NULL，用 COALESCE 让键可比较（与 schema 中的表达式索引一致）
+SORT_KEYS = {
+    "created_at": "n.created_at",
+    "title": "n.title",
+    "completed_at": "COALESCE(n.completed_at, '')",
+}
+
+# 总数缓存：(查询条件) -> (写代数, total)；任何写事务都会使缓存失效
+_count_cache: Dict[tuple, Tuple[int, int]] = {}
+_COUNT_CACHE_MAX = 256
+
+
+def encode_cursor(payload: dict) -> str:
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """解析分页游标，格式不对时抛 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+    except Exception:
+        raise ValueError("无效的分页游标")
+    if not isinstance(payload, dict):
+        raise ValueError("无效的分页游标")
+    # 键集游标：[排序键（各排序表达式都是文本）, 笔记 id]
+    if "k" in payload:
+        k = payload["k"]
+        if not (
+            isinstance(k, list) and len(k) == 2
+            and isinstance(k[0], str)
+            and isinstance(k[1], int) and not isinstance(k[1], bool)
+        ):
+            raise ValueError("无效的分页游标")
+    if "o" in payload:
+        o = payload["o"]
+        if not isinstance(o, int) or isinstance(o, bool) or o < 0:
+            raise ValueError("无效的分页游标")
+    return payload
+
+
+async def _count_notes_cached(db, from_sql: str, where_sql: str, params: list) -> int:
+    generation = get_pool().write_generation
+    key = (from_sql, where_sql, tuple(params))
+    cached = _count_cache.get(key)
+    if cached and cached[0] == generation:
+        return cached[1]
+
+    cursor = await db.execute(
+        f"""SELECT COUNT(DISTINCT n.id)
+            FROM {from_sql}
+            LEFT JOIN categories c ON n.category_id = c.id
+            {where_sql}""",
+        params,
+    )
+    total = (await cursor.fetchone())[0]
+    if len(_count_cache) >= _COUNT_CACHE_MAX:
+        _count_cache.clear()
+    _count_cache[key] = (generation, total)
+    return total
+
+
 async def list_notes(
     *,
     category: Optional[str] = None,
@@ -74,15 +140,21 @@ async def list_notes(
     page_size: int = 50,
     sort_by: str = "created_at",
     sort_order: str = "desc",
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ) -> dict:
-    """分页查询笔记列表，带筛选/排序。返回 {tasks, total, page, page_size}。"""
-    allowed_sort = {"created_at", "title", "completed_at"}
-    if sort_by not in allowed_sort:
+    """分页查询笔记列表，带筛选/排序。返回 {tasks, total, page, page_size, next_cursor}。
+
+    传 cursor（上一页返回的 next_cursor）时按 (排序键, id) 做 keyset 翻页，
+    不再使用 OFFSET；不传时仍按 page/page_size 分页。include_total=False 时不计算总数。
+    """
+    if sort_by not in SORT_KEYS:
         sort_by = "created_at"
     if sort_order not in ("asc", "desc"):
         sort_order = "desc"
+    sort_expr = SORT_KEYS[sort_by]
 
-    async with get_db() as db:
+    async with get_read_db() as db:
         where_clauses = []
         params: list = []
 
@@ -96,77 +168,95 @@ async def list_notes(
             )
             params.append(tag)
 
-        if search:
+        # 全文检索：FTS5 按 bm25 相关度排序并返回高亮片段；trigram 匹配不了的短词在各列上 LIKE，
+        # FTS 不可用时回退标题 LIKE
+        fts_search = note_search.build_search(search) if search else None
+        match_query = fts_search[0] if fts_search else None
+        from_sql = "notes n"
+        extra_columns = ""
+        order_sql = f"{sort_expr} {sort_order}, n.id {sort_order}"
+        if fts_search:
+            from_sql = "notes_fts JOIN notes n ON n.id = notes_fts.rowid"
+            like_clauses, like_params = note_search.like_filter(fts_search[1])
+            where_clauses.extend(like_clauses)
+            params.extend(like_params)
+        if match_query:
+            where_clauses.insert(0, "notes_fts MATCH ?")
+            params.insert(0, match_query)
+            extra_columns = f", bm25(notes_fts, {note_search.BM25_WEIGHTS}) AS rank"
+            order_sql = f"rank, {order_sql}"
+        elif search and not fts_search:
             where_clauses.append("n.title LIKE ?")
             params.append(f"%{search}%")
 
-        where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
+        filter_where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
+        total = await _count_notes_cached(db, from_sql, filter_where_sql, params) if include_total else None
 
-        # Count total
-        count_sql = f"""
-            SELECT COUNT(DISTINCT n.id)
-            FROM notes n
-            LEFT JOIN categories c ON n.category_id = c.id
-            {where_sql}
-        """
-        cursor = await db.execute(count_sql, params)
-        total = (await cursor.fetchone())[0]
+        # 游标：普通排序用 keyset（排序键, id）；相关度排序的分值不稳定，游标里记偏移量
+        offset = (page - 1) * page_size
+        page_params = list(params)
+        if cursor:
+            state = decode_cursor(cursor)
+            if state.get("s") != [sort_by, sort_order]:
+                raise ValueError("分页游标与排序方式不一致")
+            if match_query or "k" not in state:
+                offset = int(state.get("o", 0))
+            else:
+                key, last_id = state["k"]
+                op = "<" if sort_order == "desc" else ">"
+                # 冗余的单列边界让表达式索引（completed_at）也能直接定位起点而不是扫描
+                where_clauses.append(f"{sort_expr} {op}= ? AND ({sort_expr}, n.id) {op} (?, ?)")
+                page_params.extend([key, key, last_id])
+                offset = 0
+        where_sql = (" WHERE " + " AND ".join(where_clauses)) if where_clauses else ""
 
         # Fetch paginated results with inline tags + category
         query_sql = f"""
             SELECT n.id, n.short_id, n.task_id, n.url, n.title, n.safe_title,
                    n.source, n.status, n.has_summary, n.has_transcript,
                    n.batch_id, n.created_at, n.completed_at,
-                   c.name AS category_name, c.id AS category_id
-            FROM notes n
+                   c.name AS category_name, c.id AS category_id,
+                   {sort_expr} AS sort_key{extra_columns}
+            FROM {from_sql}
             LEFT JOIN categories c ON n.category_id = c.id
             {where_sql}
-            ORDER BY n.{sort_by} {sort_order}
+            ORDER BY {order_sql}
             LIMIT ? OFFSET ?
         """
-        offset = (page - 1) * page_size
-        cursor = await db.execute(query_sql, [*params, page_size, offset])
-        rows = await cursor.fetchall()
-
-        tasks = []
-        for row in rows:
-            note_id = row[0]
-            short_id = row[1]
-
-            # Fetch tags for this note
-            tag_cursor = await db.execute(
-                "SELECT t.name FROM note_tags nt JOIN tags t ON nt.tag_id=t.id WHERE nt.note_id=?",
-                (note_id,),
-            )
-            tag_rows = await tag_cursor.fetchall()
-            note_tags = [r[0] for r in tag_rows]
-
-            tasks.append({
-                "task_id": short_id,
-                "video_title": row[4],  # title
-                "type": "notes" if row[8] else "qa",  # has_summary
-                "has_summary": bool(row[8]),
-                "has_transcript": bool(row[9]),
-                "category": row[13] or "",  # category_name
-                "category_id": row[14],
-                "tags": note_tags,
-                "created_at": row[11],  # created_at
-                "url": row[3] or "",
-                "source": row[6] or "url",
-                "batch_id": row[10] or "",
-            })
+        # 多取一行判断是否还有下一页
+        db_cursor = await db.execute(query_sql, [*page_params, page_size + 1, offset])
+        rows = await db_cursor.fetchall()
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+
+        tags_by_note = await _fetch_tags(db, [row["id"] for row in rows])
+        tasks = [_row_to_list_item(row, tags_by_note.get(row["id"], [])) for row in rows]
+        if match_query:
+            snippets = await note_search.snippets(db, match_query, [row["id"] for row in rows])
+            for item, row in zip(tasks, rows):
+                item["snippet"] = snippets.get(row["id"], "")
+
+        next_cursor = None
+        if has_more:
+            state = {"s": [sort_by, sort_order]}
+            if match_query:
+                state["o"] = offset + page_size
+            else:
+                state["k"] = [rows[-1]["sort_key"], rows[-1]["id"]]
+            next_cursor = encode_cursor(state)
 
         return {
             "tasks": tasks,
             "total": total,
             "page": page,
             "page_size": page_size,
+            "next_cursor": next_cursor,
         }
 
 
 async def get_note(short_id: str) -> Optional[dict]:
     """获取单条笔记详情（按 short_id）"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             """SELECT n.*, c.name AS category_name
                FROM notes n LEFT JOIN categories c ON n.category_id = c.id
@@ -181,7 +271,7 @@ async def get_note(short_id: str) -> Optional[dict]:
 
 async def get_note_by_task_id(task_id: str) -> Optional[dict]:
     """获取单条笔记详情（按完整 task_id / UUID）"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             """SELECT n.*, c.name AS category_name
                FROM notes n LEFT JOIN categories c ON n.category_id = c.id
@@ -194,42 +284,75 @@ async def get_note_by_task_id(task_id: str) -> Optional[dict]:
         return await _row_to_note(db, row)
 
 
-async def _row_to_note(db, row) -> dict:
-    """将数据库行转为笔记 dict"""
-    note_id = row[0]
-    tag_cursor = await db.execute(
-        "SELECT t.name FROM note_tags nt JOIN tags t ON nt.tag_id=t.id WHERE nt.note_id=?",
-        (note_id,),
+async def _fetch_tags(db, note_ids: list[int]) -> dict[int, list[str]]:
+    """一次查询取回多条笔记的标签，返回 {note_id: [tag, ...]}"""
+    tags_by_note: dict[int, list[str]] = {}
+    if not note_ids:
+        return tags_by_note
+    placeholders = ",".join("?" * len(note_ids))
+    cursor = await db.execute(
+        f"""SELECT nt.note_id, t.name FROM note_tags nt JOIN tags t ON nt.tag_id=t.id
+            WHERE nt.note_id IN ({placeholders})
+            ORDER BY nt.note_id, t.id""",
+        note_ids,
     )
-    tag_rows = await tag_cursor.fetchall()
+    for row in await cursor.fetchall():
+        tags_by_note.setdefault(row["note_id"], []).append(row["name"])
+    return tags_by_note
+
+
+def _row_to_list_item(row, tags: list[str]) -> dict:
+    """将列表查询行转为历史记录条目"""
+    return {
+        "task_id": row["short_id"],
+        "video_title": row["title"],
+        "type": "notes" if row["has_summary"] else "qa",
+        "has_summary": bool(row["has_summary"]),
+        "has_transcript": bool(row["has_transcript"]),
+        "category": row["category_name"] or "",
+        "category_id": row["category_id"],
+        "tags": tags,
+        "created_at": row["created_at"],
+        "url": row["url"] or "",
+        "source": row["source"] or "url",
+        "batch_id": row["batch_id"] or "",
+    }
+
 
+async def _row_to_note(db, row) -> dict:
+    """将数据库行转为笔记 dict"""
+    tags_by_note = await _fetch_tags(db, [row["id"]])
     return {
-        "id": row[0],
-        "short_id": row[1],
-        "task_id": row[2],
-        "url": row[3],
-        "title": row[4],
-        "safe_title": row[5],
-        "source": row[6],
-        "status": row[7],
-        "category_id": row[8],
-        "summary_file": row[9],
-        "transcript_file": row[10],
-        "mindmap_file": row[11],
-        "translation_file": row[12],
-        "category_name": row[-1],
-        "has_summary": bool(row[13]),
-        "has_transcript": bool(row[14]),
-        "batch_id": row[15],
-        "created_at": row[16],
-        "completed_at": row[17],
-        "tags": [r[0] for r in tag_rows],
+        "id": row["id"],
+        "short_id": row["short_id"],
+        "task_id": row["task_id"],
+        "url": row["url"],
+        "title": row["title"],
+        "safe_title": row["safe_title"],
+        "source": row["source"],
+        "status": row["status"],
+        "category_id": row["category_id"],
+        "summary_file": row["summary_file"],
+        "transcript_file": row["transcript_file"],
+        "mindmap_file": row["mindmap_file"],
+        "translation_file": row["translation_file"],
+        "category_name": row["category_name"],
+        "has_summary": bool(row["has_summary"]),
+        "has_transcript": bool(row["has_transcript"]),
+        "batch_id": row["batch_id"],
+        "created_at": row["created_at"],
+        "completed_at": row["completed_at"],
+        "tags": tags_by_note.get(row["id"], []),
     }
 
 
 async def delete_note(short_id: str) -> bool:
     """删除一条笔记（CASCADE 自动删 note_tags）"""
     async with get_db() as db:
+        cursor = await db.execute("SELECT id FROM notes WHERE short_id = ?", (short_id,))
+        row = await cursor.fetchone()
+        if row:
+            await note_search.remove_notes(db, [row["id"]])
         cursor = await db.execute("DELETE FROM notes WHERE short_id = ?", (short_id,))
         await db.commit()
         return cursor.rowcount > 0
@@ -238,27 +361,28 @@ async def delete_note(short_id: str) -> bool:
 async def delete_all_notes() -> int:
     """删除所有笔记"""
     async with get_db() as db:
+        await note_search.remove_notes(db)
         cursor = await db.execute("DELETE FROM notes")
         await db.commit()
         return cursor.rowcount
 
 
 async def count_notes() -> int:
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute("SELECT COUNT(*) FROM notes")
         return (await cursor.fetchone())[0]
 
 
 async def list_notes_by_batch(batch_id: str) -> list[dict]:
     """按 batch_id 查询所有已完成笔记（批量状态查询用）"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             """SELECT short_id, title, status FROM notes WHERE batch_id = ?""",
             (batch_id,),
         )
         rows = await cursor.fetchall()
         return [
-            {"task_id": row[0], "video_title": row[1], "status": row[2] or "completed"}
+            {"task_id": row["short_id"], "video_title": row["title"], "status": row["status"] or "completed"}
             for row in rows
         ]
 
@@ -299,4 +423,5 @@ async def set_note_tags(short_id: str, tag_names: list[str]) -> None:
                 (note_id, tag_id),
             )
 
+        await note_search.refresh_tags(db, [note_id])
         await db.commit()
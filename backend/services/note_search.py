@@ -0,0 +1,202 @@
+"""
+笔记全文检索 — SQLite FTS5（标题 / 摘要 / 整理后的转录稿 / 标签）
+
+notes_fts 的 rowid 与 notes.id 一致。优先使用 trigram 分词器（对中文等无空格语言可用，
+MATCH 的词至少 3 个字符）；SQLite 不支持 trigram 时退化为 unicode61。
+trigram 下不足 3 个字符的词（如「模型」「教程」）改为在 notes_fts 各列上 LIKE 匹配，
+与其余词的 MATCH 取 AND；FTS 不可用时，list_notes 回退到标题 LIKE 匹配。
+"""
+import asyncio
+import logging
+from typing import Iterable, List, Optional, Tuple
+
+from backend.db.connection import get_db, get_read_db
+
+logger = logging.getLogger(__name__)
+
+FTS_COLUMNS = ("title", "summary", "transcript", "tags")
+# bm25 列权重：rowid 之外依次为 title, summary, transcript, tags
+BM25_WEIGHTS = "10.0, 4.0, 1.0, 6.0"
+SNIPPET_SQL = "snippet(notes_fts, -1, '<mark>', '</mark>', '…', 24)"
+
+_tokenizer: Optional[str] = None  # "trigram" / "unicode61" / ""（不可用）
+
+
+async def ensure_fts(db) -> str:
+    """（init_db 调用）创建 notes_fts，返回实际使用的分词器"""
+    global _tokenizer
+    cursor = await db.execute("SELECT sql FROM sqlite_master WHERE name = 'notes_fts'")
+    row = await cursor.fetchone()
+    if row is None:
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                await db.execute(
+                    f"CREATE VIRTUAL TABLE notes_fts USING fts5("
+                    f"{', '.join(FTS_COLUMNS)}, tokenize='{tokenizer}')"
+                )
+                await db.commit()
+                _tokenizer = tokenizer
+                break
+            except Exception as e:
+                logger.warning(f"FTS5 分词器 {tokenizer} 不可用: {e}")
+        else:
+            _tokenizer = ""
+    else:
+        _tokenizer = "trigram" if "trigram" in (row[0] or "") else "unicode61"
+    logger.info(f"全文检索分词器: {_tokenizer or '不可用，回退 LIKE'}")
+    return _tokenizer
+
+
+def build_search(query: str) -> Optional[Tuple[Optional[str], List[str]]]:
+    """
+    把用户输入拆成 (FTS5 MATCH 表达式, 需要 LIKE 匹配的短词)；FTS 不可用或查询为空时返回 None
+
+    MATCH 表达式在所有词都过短时为 None；短词只在 trigram 分词器下出现。
+    """
+    query = query.strip()
+    if not _tokenizer or not query:
+        return None
+    terms = query.split()
+    min_length = 3 if _tokenizer == "trigram" else 1
+    short = [t for t in terms if len(t) < min_length]
+    matched = [t for t in terms if len(t) >= min_length]
+    # 每个词作为短语，词之间 AND；双引号转义防止被解析成 FTS 语法
+    match_query = " ".join('"' + t.replace('"', '""') + '"' for t in matched) or None
+    return match_query, short
+
+
+def like_filter(terms: List[str]) -> Tuple[List[str], list]:
+    """短词的 WHERE 条件：每个词命中 notes_fts 任一列即可，词之间 AND（需 FROM notes_fts）"""
+    clauses, params = [], []
+    for term in terms:
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        clauses.append(
+            "(" + " OR ".join(f"notes_fts.{column} LIKE ? ESCAPE '\\'" for column in FTS_COLUMNS) + ")"
+        )
+        params.extend([pattern] * len(FTS_COLUMNS))
+    return clauses, params
+
+
+async def snippets(db, match_query: str, note_ids: list) -> dict:
+    """只为当前页的笔记生成高亮片段（snippet() 放进排序查询会对所有命中行计算），返回 {note_id: 片段}"""
+    if not note_ids:
+        return {}
+    placeholders = ",".join("?" * len(note_ids))
+    cursor = await db.execute(
+        f"""SELECT rowid, {SNIPPET_SQL} AS snippet FROM notes_fts
+            WHERE notes_fts MATCH ? AND rowid IN ({placeholders})""",
+        [match_query, *note_ids],
+    )
+    return {r["rowid"]: r["snippet"] for r in await cursor.fetchall()}
+
+
+def _tags_text(tags: Iterable[str]) -> str:
+    return " ".join(tags)
+
+
+async def index_note(
+    short_id: str,
+    *,
+    title: str = "",
+    summary: str = "",
+    transcript: str = "",
+    db=None,
+) -> None:
+    """写入/更新一条笔记的全文索引（标签从 note_tags 读取）"""
+    if not _tokenizer:
+        return
+    if db is None:
+        async with get_db() as db:
+            await index_note(short_id, title=title, summary=summary, transcript=transcript, db=db)
+            await db.commit()
+        return
+
+    cursor = await db.execute("SELECT id FROM notes WHERE short_id = ?", (short_id,))
+    row = await cursor.fetchone()
+    if not row:
+        return
+    note_id = row["id"]
+    cursor = await db.execute(
+        "SELECT t.name FROM note_tags nt JOIN tags t ON nt.tag_id=t.id WHERE nt.note_id=?",
+        (note_id,),
+    )
+    tags = [r["name"] for r in await cursor.fetchall()]
+    await db.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+    await db.execute(
+        "INSERT INTO notes_fts (rowid, title, summary, transcript, tags) VALUES (?, ?, ?, ?, ?)",
+        (note_id, title, summary, transcript, _tags_text(tags)),
+    )
+
+
+async def refresh_tags(db, note_ids: Iterable[int]) -> None:
+    """标签变化后同步 notes_fts.tags（调用方负责提交）"""
+    if not _tokenizer:
+        return
+    for note_id in note_ids:
+        cursor = await db.execute(
+            "SELECT t.name FROM note_tags nt JOIN tags t ON nt.tag_id=t.id WHERE nt.note_id=?",
+            (note_id,),
+        )
+        tags = [r["name"] for r in await cursor.fetchall()]
+        await db.execute(
+            "UPDATE notes_fts SET tags = ? WHERE rowid = ?", (_tags_text(tags), note_id)
+        )
+
+
+async def remove_notes(db, note_ids: Optional[Iterable[int]] = None) -> None:
+    """删除笔记的全文索引；note_ids 为 None 时清空（调用方负责提交）"""
+    if not _tokenizer:
+        return
+    if note_ids is None:
+        await db.execute("DELETE FROM notes_fts")
+        return
+    for note_id in note_ids:
+        await db.execute("DELETE FROM notes_fts WHERE rowid = ?", (note_id,))
+
+
+async def backfill(batch_size: int = 100) -> int:
+    """为尚未建立全文索引的笔记补建索引（内容从笔记文件读取），返回处理条数"""
+    from backend.core.artifact_index import artifact_index
+
+    if not _tokenizer:
+        return 0
+
+    async with get_read_db() as db:
+        cursor = await db.execute(
+            """SELECT short_id, title FROM notes
+               WHERE id NOT IN (SELECT rowid FROM notes_fts)"""
+        )
+        pending = [(r["short_id"], r["title"]) for r in await cursor.fetchall()]
+    if not pending:
+        return 0
+
+    def _read(short_id: str, file_type: str) -> str:
+        path = artifact_index.get(short_id, file_type)
+        try:
+            return path.read_text(encoding="utf-8") if path else ""
+        except OSError:
+            return ""
+
+    done = 0
+    for i in range(0, len(pending), batch_size):
+        batch = pending[i:i + batch_size]
+        contents = await asyncio.to_thread(
+            lambda: [
+                (sid, title, _read(sid, "summary"), _read(sid, "transcript") or _read(sid, "raw"))
+                for sid, title in batch
+            ]
+        )
+        async with get_db() as db:
+            for sid, title, summary, transcript in contents:
+                # 读文件期间任务流水线可能已写入索引，不要用文件内容覆盖
+                cursor = await db.execute(
+                    "SELECT 1 FROM notes_fts WHERE rowid = (SELECT id FROM notes WHERE short_id = ?)",
+                    (sid,),
+                )
+                if await cursor.fetchone():
+                    continue
+                await index_note(sid, title=title or "", summary=summary, transcript=transcript, db=db)
+            await db.commit()
+        done += len(batch)
+    logger.info(f"全文索引补建完成: {done} 条笔记")
+    return done
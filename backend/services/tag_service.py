@@ -4,15 +4,16 @@
 import json
 import logging
 
-from backend.db.connection import get_db
+from backend.db.connection import get_db, get_read_db
 from backend.db.schema import PREDEFINED_CATEGORIES
+from backend.services import note_search
 
 logger = logging.getLogger(__name__)
 
 
 async def get_task_tags(short_id: str) -> dict:
     """获取指定笔记的标签和分类"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             """SELECT n.id, c.name AS category_name
                FROM notes n LEFT JOIN categories c ON n.category_id = c.id
@@ -64,7 +65,7 @@ async def delete_task_tags(short_id: str) -> None:
 
 async def get_all_tags() -> list[str]:
     """获取所有已用标签（去重排序）"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             "SELECT DISTINCT t.name FROM tags t JOIN note_tags nt ON t.id=nt.tag_id ORDER BY t.name"
         )
@@ -73,7 +74,7 @@ async def get_all_tags() -> list[str]:
 
 async def get_all_categories() -> list[str]:
     """获取所有已用分类（去重排序）"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             """SELECT DISTINCT c.name FROM categories c
                JOIN notes n ON n.category_id = c.id
@@ -84,7 +85,7 @@ async def get_all_categories() -> list[str]:
 
 async def get_all_tags_with_counts() -> list[dict]:
     """获取所有标签及其关联笔记数量（包含 0 计数的标签）"""
-    async with get_db() as db:
+    async with get_read_db() as db:
         cursor = await db.execute(
             """SELECT t.name, COUNT(nt.note_id) AS note_count
                FROM tags t
@@ -132,6 +133,7 @@ async def rename_tag(old_name: str, new_name: str) -> bool:
             raise ValueError(f"标签「{new_name}」已存在")
 
         await db.execute("UPDATE tags SET name = ? WHERE name = ?", (new_name, old_name))
+        await _refresh_fts_tags_for(db, row[0])
         await db.commit()
         return True
 
@@ -145,12 +147,21 @@ async def delete_tag(tag_name: str) -> bool:
             return False
 
         tag_id = row[0]
+        cursor = await db.execute("SELECT note_id FROM note_tags WHERE tag_id = ?", (tag_id,))
+        note_ids = [r[0] for r in await cursor.fetchall()]
         await db.execute("DELETE FROM note_tags WHERE tag_id = ?", (tag_id,))
         await db.execute("DELETE FROM tags WHERE id = ?", (tag_id,))
+        await note_search.refresh_tags(db, note_ids)
         await db.commit()
         return True
 
 
+async def _refresh_fts_tags_for(db, tag_id: int) -> None:
+    """标签改名后同步引用它的笔记的全文索引"""
+    cursor = await db.execute("SELECT note_id FROM note_tags WHERE tag_id = ?", (tag_id,))
+    await note_search.refresh_tags(db, [r[0] for r in await cursor.fetchall()])
+
+
 async def auto_tag_from_summary(short_id: str, summary: str, title: str = "") -> dict:
     """用 AI 从摘要中自动提取标签和分类"""
     from backend.core.ai_client import get_async_openai_client, is_openai_available
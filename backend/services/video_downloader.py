@@ -1,19 +1,24 @@
 """
 视频下载服务
-使用yt-dlp下载视频并转换为音频，支持字幕提取
+使用yt-dlp下载视频音频（保留源编码，由转录服务直接解码），支持字幕提取
 """
-import os
 import re
+import shutil
+import tempfile
 import yt_dlp
 import logging
 import asyncio
-import subprocess
-import shlex
 import uuid
 from pathlib import Path
 from typing import Tuple, Optional, List
 
 from backend.config.settings import get_settings
+from backend.core.single_flight import media_flights
+from backend.services import media_probe
+from backend.services.audio_cache import audio_cache
+from backend.services.video_metadata import (
+    YOUTUBE_EXTRACTOR_ARGS, canonical_url, download_with_info, video_metadata,
+)
 from backend.utils.video_helpers import (
     BILIBILI_COOKIES_PATH,
     format_time_display,
@@ -25,6 +30,8 @@ from backend.utils.video_helpers import (
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+AUDIO_DOWNLOAD_MODES = ("compact", "best")
+
 
 class VideoDownloader:
     """视频下载服务"""
@@ -37,25 +44,13 @@ class VideoDownloader:
         
         # 基础配置（不含 cookies）- 移除可能导致YouTube问题的http_headers
         self.base_ydl_opts = {
-            'format': 'bestaudio/best',  # 优先下载最佳音频源
+            'format': 'bestaudio/best',  # 实际格式由 _audio_format_opts 按 AUDIO_DOWNLOAD_MODE 选择
             'outtmpl': '%(title)s.%(ext)s',
             'retries': 10,  # 增加重试次数
             'fragment_retries': 10,
             # YouTube 403 修复：使用 android_vr 客户端绕过限制 (fix #4 #5)
-            'extractor_args': {
-                'youtube': {
-                    'player_client': ['android_vr', 'web']
-                }
-            },
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                # 直接在提取阶段转换为单声道 16k（空间小且稳定）
-                'preferredcodec': 'm4a',
-                'preferredquality': '192'
-            }],
-            # 全局FFmpeg参数：单声道 + 16k 采样率 + faststart
-            'postprocessor_args': ['-ac', '1', '-ar', '16000', '-movflags', '+faststart'],
-            'prefer_ffmpeg': True,
+            'extractor_args': YOUTUBE_EXTRACTOR_ARGS,
+            # 不做 FFmpegExtractAudio 转码：转录服务直接把源文件解码为 16k PCM（media_decode）
             'quiet': True,
             'no_warnings': True,
             'noplaylist': True,  # 强制只下载单个视频，不下载播放列表
@@ -65,17 +60,38 @@ class VideoDownloader:
         """根据 URL 获取对应的 cookies 文件路径"""
         return get_cookies_for_url(url, self.bilibili_cookies, logger)
 
+    def _audio_format_opts(self, mode: str) -> dict:
+        """
+        音频格式选择
+        - compact: 码率不低于 AUDIO_DOWNLOAD_MIN_ABR 的最小纯音频流（opus 优先，其次 m4a），
+                   转录只需要 16kHz 单声道，更高码率只会增加下载量
+        - best:    最佳音频源
+        """
+        if mode != "compact":
+            return {'format': 'bestaudio/best'}
+        abr = settings.AUDIO_DOWNLOAD_MIN_ABR
+        return {
+            'format': f'ba[abr>={abr}][acodec^=opus]/ba[abr>={abr}][acodec^=mp4a]/ba[abr>={abr}]/ba/best',
+            # 码率升序：同一条件下选最小的流
+            'format_sort': ['+abr', '+size'],
+        }
+
     async def download_video_audio(
         self,
         url: str,
-        output_dir: Optional[Path] = None
+        output_dir: Optional[Path] = None,
+        mode: Optional[str] = None
     ) -> Tuple[str, str]:
         """
-        下载视频并转换为音频格式
+        下载视频音频（源编码，不转码）
+
+        启用音频缓存时，同一视频的音频只下载一次，保存在共享的缓存目录中（不在 output_dir），
+        调用方只读取、不要删除返回的文件；视频没有 ID 或关闭缓存时下载到 output_dir。
 
         Args:
             url: 视频URL
             output_dir: 输出目录，默认使用配置的TEMP_DIR
+            mode: 音频格式选择 compact / best，默认 AUDIO_DOWNLOAD_MODE
 
         Returns:
             (音频文件路径, 视频标题)
@@ -85,57 +101,69 @@ class VideoDownloader:
         """
         if output_dir is None:
             output_dir = settings.TEMP_DIR
+        mode = mode or settings.AUDIO_DOWNLOAD_MODE
+
+        use_cache = audio_cache.accepts(url)
+        if use_cache:
+            # 之前处理过的 URL 直接命中，不再提取视频信息
+            cached = await asyncio.to_thread(audio_cache.lookup_url, url, mode)
+            if cached:
+                logger.info(f"♻️ 复用已缓存的音频: {cached[1]}")
+                return cached
+
+        # 同一视频（规范化 URL）并发请求只下载一次，共用同一个文件
+        key = ("audio", canonical_url(url), mode, None if use_cache else str(output_dir))
+        return await media_flights.run(
+            key, lambda flight: self._fetch_audio(url, output_dir, mode, use_cache)
+        )
 
+    async def _fetch_audio(self, url: str, output_dir: Path, mode: str, use_cache: bool) -> Tuple[str, str]:
         try:
-            # 创建输出目录
-            output_dir.mkdir(exist_ok=True)
-
-            # 生成唯一的文件名
-            unique_id = str(uuid.uuid4())[:8]
-            output_template = str(output_dir / f"audio_{unique_id}.%(ext)s")
-
-            # 更新yt-dlp选项
-            ydl_opts = self.base_ydl_opts.copy()
-            ydl_opts['outtmpl'] = output_template
-            
-            # 根据 URL 选择对应的 cookies
-            cookies_file = self._get_cookies_for_url(url)
-            if cookies_file:
-                ydl_opts['cookiefile'] = cookies_file
+            if mode not in AUDIO_DOWNLOAD_MODES:
+                raise ValueError(f"不支持的音频下载方式: {mode}")
 
             logger.info(f"📥 开始提取音频: {url[:60]}...")
 
-            # 在线程池中执行yt-dlp操作（避免阻塞事件循环）
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # 获取视频信息
-                info = await asyncio.to_thread(ydl.extract_info, url, False)
-                video_title = info.get('title', 'unknown')
-                expected_duration = info.get('duration') or 0
-                logger.info(f"🎬 视频标题: {video_title}")
-
-                # 下载视频
-                await asyncio.to_thread(ydl.download, [url])
-
-            # 查找生成的m4a文件
-            audio_file = str(output_dir / f"audio_{unique_id}.m4a")
-
-            if not os.path.exists(audio_file):
-                # 如果m4a文件不存在，查找其他音频格式
-                for ext in ['webm', 'mp4', 'mp3', 'wav']:
-                    potential_file = str(output_dir / f"audio_{unique_id}.{ext}")
-                    if os.path.exists(potential_file):
-                        audio_file = potential_file
-                        break
-                else:
-                    raise Exception("未找到下载的音频文件")
-
-            # 校验时长，如果和源视频差异较大，尝试一次ffmpeg规范化重封装
-            audio_file = await self._verify_and_fix_audio(
-                audio_file,
-                expected_duration,
-                output_dir,
-                unique_id
-            )
+            # 获取视频信息（与字幕探测、预览共用同一次提取）
+            info = await video_metadata.get(url)
+            video_title = info.get('title', 'unknown')
+            expected_duration = info.get('duration') or 0
+            logger.info(f"🎬 视频标题: {video_title}")
+
+            # 同一视频的其他链接（分享参数、短链等）下载过时直接复用
+            cache_key = audio_cache.key_for(info, mode) if use_cache else None
+            if cache_key:
+                cached = await asyncio.to_thread(audio_cache.lookup, cache_key, url, mode)
+                if cached:
+                    logger.info(f"♻️ 复用已缓存的音频: {video_title}")
+                    return cached
+                target_dir = audio_cache.staging_dir()
+            else:
+                target_dir = output_dir
+                target_dir.mkdir(parents=True, exist_ok=True)
+
+            try:
+                audio_file = await self._download_audio(url, info, target_dir, mode)
+            except Exception as e:
+                if mode == "best":
+                    raise
+                # 小码率纯音频流不可用（或下载失败）时回退为最佳音频；
+                # 缓存按实际下载方式记录，不把最佳音频存在 compact 的键下
+                logger.warning(f"纯音频流下载失败，回退为最佳音频: {e}")
+                mode = "best"
+                if cache_key:
+                    cache_key = audio_cache.key_for(info, mode)
+                    cached = await asyncio.to_thread(audio_cache.lookup, cache_key, url, mode)
+                    if cached:
+                        logger.info(f"♻️ 复用已缓存的最佳音频: {video_title}")
+                        return cached
+                audio_file = await self._download_audio(url, info, target_dir, mode)
+
+            if cache_key:
+                audio_file = await asyncio.to_thread(audio_cache.put, cache_key, audio_file, info, url, mode)
+
+            # 时长在转录解码后用实际解码长度校验（只记录告警），不再单独调用 ffprobe
+            media_probe.expect_duration(audio_file, expected_duration)
 
             logger.info(f"✅ 音频提取完成")
             return audio_file, video_title
@@ -144,10 +172,43 @@ class VideoDownloader:
             logger.error(f"❌ 音频提取失败: {str(e)}")
             raise Exception(f"音频提取失败: {str(e)}")
 
+    async def _download_audio(self, url: str, info: dict, output_dir: Path, mode: str) -> str:
+        """按 mode 选择格式下载源音频，返回文件路径"""
+        # 生成唯一的文件名
+        unique_id = str(uuid.uuid4())[:8]
+        output_template = str(output_dir / f"audio_{unique_id}.%(ext)s")
+
+        # 更新yt-dlp选项
+        ydl_opts = self.base_ydl_opts.copy()
+        ydl_opts.update(self._audio_format_opts(mode))
+        ydl_opts['outtmpl'] = output_template
+
+        # 根据 URL 选择对应的 cookies
+        cookies_file = self._get_cookies_for_url(url)
+        if cookies_file:
+            ydl_opts['cookiefile'] = cookies_file
+
+        try:
+            # 在线程池中执行yt-dlp操作（避免阻塞事件循环），基于已提取的信息选择格式并下载
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                await asyncio.to_thread(download_with_info, ydl, info, url)
+        except Exception:
+            for partial in output_dir.glob(f"audio_{unique_id}.*"):
+                partial.unlink(missing_ok=True)
+            raise
+
+        # 查找下载的文件（扩展名取决于源音频编码：opus(webm) / m4a / mp3 ...）
+        candidates = [
+            p for p in output_dir.glob(f"audio_{unique_id}.*")
+            if not p.name.endswith((".part", ".ytdl"))
+        ]
+        if not candidates:
+            raise Exception("未找到下载的音频文件")
+        return str(candidates[0])
+
     async def extract_subtitles(
         self,
         url: str,
-        output_dir: Optional[Path] = None,
         preferred_langs: Optional[List[str]] = None,
     ) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -158,39 +219,26 @@ class VideoDownloader:
 
         Args:
             url: 视频URL
-            output_dir: 输出目录
             preferred_langs: 优先语言列表，如 ['zh', 'en', 'ja']
 
         Returns:
             (字幕文本, 视频标题) — 如果无字幕则字幕文本为 None
         """
-        if output_dir is None:
-            output_dir = settings.TEMP_DIR
-
-        output_dir.mkdir(exist_ok=True)
-
         if preferred_langs is None:
             preferred_langs = ['zh-Hans', 'zh-Hant', 'zh', 'en', 'ja', 'ko']
 
-        try:
-            # 第一步：获取视频信息，检查可用字幕
-            # 注意：必须启用 writesubtitles/writeautomaticsub，否则 yt-dlp 不会拉取字幕信息
-            info_opts = {
-                'quiet': True,
-                'no_warnings': True,
-                'skip_download': True,
-                'writesubtitles': True,
-                'writeautomaticsub': True,
-                'allsubtitles': True,
-                'noplaylist': True,  # 合集只取单个视频，避免遍历所有分P导致卡死
-            }
-            
-            cookies_file = self._get_cookies_for_url(url)
-            if cookies_file:
-                info_opts['cookiefile'] = cookies_file
+        # 只返回字幕文本，与调用方的目录无关：同一视频的并发请求共用一次提取
+        key = ("subtitles", canonical_url(url), tuple(preferred_langs))
+        return await media_flights.run(
+            key, lambda flight: self._fetch_subtitles(url, preferred_langs)
+        )
 
-            with yt_dlp.YoutubeDL(info_opts) as ydl:
-                info = await asyncio.to_thread(ydl.extract_info, url, False)
+    async def _fetch_subtitles(
+        self, url: str, preferred_langs: List[str]
+    ) -> Tuple[Optional[str], Optional[str]]:
+        try:
+            # 第一步：获取视频信息，检查可用字幕（缓存的提取结果含字幕信息，之后的音频下载复用）
+            info = await video_metadata.get(url)
 
             manual_subs = info.get('subtitles') or {}
             auto_subs = info.get('automatic_captions') or {}
@@ -213,40 +261,7 @@ class VideoDownloader:
             
             if not subtitle_text:
                 # 内嵌数据不可用，通过下载字幕文件获取
-                unique_id = str(uuid.uuid4())[:8]
-                sub_output = str(output_dir / f"sub_{unique_id}")
-
-                sub_opts = {
-                    'quiet': True,
-                    'no_warnings': True,
-                    'skip_download': True,
-                    'writesubtitles': not is_auto,
-                    'writeautomaticsub': is_auto,
-                    'subtitleslangs': [chosen_lang],
-                    'subtitlesformat': 'srt/vtt/ass/best',
-                    'outtmpl': sub_output,
-                    'noplaylist': True,
-                }
-                
-                if cookies_file:
-                    sub_opts['cookiefile'] = cookies_file
-
-                with yt_dlp.YoutubeDL(sub_opts) as ydl:
-                    await asyncio.to_thread(ydl.download, [url])
-
-                # 查找下载的字幕文件
-                sub_file = self._find_subtitle_file(output_dir, f"sub_{unique_id}")
-                if not sub_file:
-                    logger.warning("字幕下载后未找到文件")
-                    return None
-
-                subtitle_text = self._parse_subtitle_file(sub_file)
-
-                # 清理字幕文件
-                try:
-                    os.remove(sub_file)
-                except Exception:
-                    pass
+                subtitle_text = await self._download_subtitle(url, info, chosen_lang, is_auto)
 
             if not subtitle_text or len(subtitle_text.strip()) < 10:
                 logger.warning("字幕内容为空或过短")
@@ -259,6 +274,39 @@ class VideoDownloader:
             logger.warning(f"字幕提取失败: {e}")
             return None, None
 
+    async def _download_subtitle(self, url: str, info: dict, lang: str, is_auto: bool) -> Optional[str]:
+        """下载字幕文件并解析为文本；文件写在本次下载自己的临时目录，解析后连目录一起删除"""
+        settings.TASK_SCRATCH_DIR.mkdir(parents=True, exist_ok=True)
+        work_dir = Path(tempfile.mkdtemp(prefix="subtitles_", dir=settings.TASK_SCRATCH_DIR))
+        try:
+            sub_opts = {
+                'quiet': True,
+                'no_warnings': True,
+                'skip_download': True,
+                'writesubtitles': not is_auto,
+                'writeautomaticsub': is_auto,
+                'subtitleslangs': [lang],
+                'subtitlesformat': 'srt/vtt/ass/best',
+                'outtmpl': str(work_dir / "sub"),
+                'noplaylist': True,
+            }
+
+            cookies_file = self._get_cookies_for_url(url)
+            if cookies_file:
+                sub_opts['cookiefile'] = cookies_file
+
+            with yt_dlp.YoutubeDL(sub_opts) as ydl:
+                await asyncio.to_thread(download_with_info, ydl, info, url)
+
+            # 查找下载的字幕文件
+            sub_file = self._find_subtitle_file(work_dir, "sub")
+            if not sub_file:
+                logger.warning("字幕下载后未找到文件")
+                return None
+            return self._parse_subtitle_file(sub_file)
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
     def _try_extract_inline_subtitle(self, source_dict: dict, lang: str) -> Optional[str]:
         """
         尝试从 yt-dlp info 中直接读取内嵌字幕数据
@@ -510,55 +558,3 @@ class VideoDownloader:
     def _format_time_display(self, seconds: float) -> str:
         """将秒数格式化为 HH:MM:SS 或 MM:SS"""
         return format_time_display(seconds)
-
-    async def _verify_and_fix_audio(
-        self,
-        audio_file: str,
-        expected_duration: float,
-        output_dir: Path,
-        unique_id: str
-    ) -> str:
-        """
-        验证并修复音频文件时长
-
-        Args:
-            audio_file: 音频文件路径
-            expected_duration: 期望时长（秒）
-            output_dir: 输出目录
-            unique_id: 唯一标识
-
-        Returns:
-            音频文件路径（可能是修复后的新文件）
-        """
-        try:
-            # 获取实际时长
-            probe_cmd = f"ffprobe -v error -show_entries format=duration -of default=noprint_wrappers=1:nokey=1 {shlex.quote(audio_file)}"
-            out = subprocess.check_output(probe_cmd, shell=True).decode().strip()
-            actual_duration = float(out) if out else 0.0
-        except Exception:
-            actual_duration = 0.0
-
-        # 检查时长差异
-        if expected_duration and actual_duration and abs(actual_duration - expected_duration) / expected_duration > 0.1:
-            logger.warning(
-                f"音频时长异常，期望{expected_duration}s，实际{actual_duration}s，尝试重封装修复…"
-            )
-            try:
-                fixed_path = str(output_dir / f"audio_{unique_id}_fixed.m4a")
-                fix_cmd = f"ffmpeg -y -i {shlex.quote(audio_file)} -vn -c:a aac -b:a 160k -movflags +faststart {shlex.quote(fixed_path)}"
-                subprocess.check_call(fix_cmd, shell=True)
-
-                # 用修复后的文件替换
-                audio_file = fixed_path
-
-                # 重新探测
-                out2 = subprocess.check_output(
-                    probe_cmd.replace(shlex.quote(audio_file.rsplit('.', 1)[0] + '.m4a'), shlex.quote(audio_file)),
-                    shell=True
-                ).decode().strip()
-                actual_duration2 = float(out2) if out2 else 0.0
-                logger.info(f"重封装完成，新时长≈{actual_duration2:.2f}s")
-            except Exception as e:
-                logger.error(f"重封装失败：{e}")
-
-        return audio_file
@@ -0,0 +1,149 @@
+"""
+视频元数据缓存 — 同一视频的 yt-dlp 信息提取只做一次
+
+生成一篇笔记时，字幕探测、音频下载都要先 extract_info，而 ydl.download([url]) 还会再提取一遍；
+用户预览视频时往往几秒前已经提取过同一个 URL。这里按规范化后的 URL 缓存提取结果（短 TTL），
+并发请求同一 URL 时只发起一次提取（single-flight）。
+字幕下载、格式选择与下载都基于缓存的信息进行（process_ie_result，等同 download_with_info_file），
+不再访问视频页面；信息过期导致下载失败时按 URL 重新提取一次。
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import yt_dlp
+from yt_dlp.utils import DownloadError, ReExtractInfo
+
+from backend.config.settings import get_settings
+from backend.utils.video_helpers import BILIBILI_COOKIES_PATH, get_cookies_for_url
+
+logger = logging.getLogger(__name__)
+
+# YouTube 403 修复：使用 android_vr 客户端绕过限制 (fix #4 #5)
+YOUTUBE_EXTRACTOR_ARGS = {
+    'youtube': {
+        'player_client': ['android_vr', 'web']
+    }
+}
+
+# 分享链接里常见、不影响视频内容的跟踪参数（B站分P 的 p 等参数保留）
+TRACKING_PARAMS = {
+    'si', 'feature', 'pp', 'spm_id_from', 'vd_source', 'from_spmid', 'share_source',
+    'share_medium', 'share_plat', 'share_session_id', 'share_tag', 'share_from',
+    'unique_k', 'bbid', 'ts',
+}
+
+
+def canonical_url(url: str) -> str:
+    """规范化 URL 作为缓存键：协议与域名小写、去掉片段和跟踪参数、查询参数排序"""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k not in TRACKING_PARAMS and not k.startswith('utm_')
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ''))
+
+
+def _probe_options(url: str) -> dict:
+    # 字幕信息只在启用 writesubtitles/writeautomaticsub 时才会被提取（download=False 时不会写文件）
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'writesubtitles': True,
+        'writeautomaticsub': True,
+        'noplaylist': True,  # 合集只取单个视频，避免遍历所有分P导致卡死
+        'extractor_args': YOUTUBE_EXTRACTOR_ARGS,
+    }
+    cookies_file = get_cookies_for_url(url, BILIBILI_COOKIES_PATH, logger)
+    if cookies_file:
+        opts['cookiefile'] = cookies_file
+    return opts
+
+
+def _extract(url: str) -> dict:
+    with yt_dlp.YoutubeDL(_probe_options(url)) as ydl:
+        return ydl.extract_info(url, download=False)
+
+
+class VideoMetadataCache:
+    """按规范化 URL 缓存 yt-dlp 提取结果，并发请求合并为一次提取"""
+
+    def __init__(self, ttl: float, max_entries: int):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, dict]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    async def get(self, url: str) -> dict:
+        """
+        获取视频信息（调用方只读，不要修改返回的 dict）
+
+        Raises:
+            yt_dlp.utils.DownloadError: 提取失败（失败结果不缓存）
+        """
+        key = canonical_url(url)
+        entry = self._entries.get(key)
+        if entry and entry[0] > time.monotonic():
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._load(key, url))
+            # 所有等待方都被取消时，也不留下未读取的异常
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+            self._inflight[key] = task
+        else:
+            self.shared += 1
+        # 单个调用方被取消不影响其他等待同一提取的调用方
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, url: str) -> dict:
+        try:
+            info = await asyncio.to_thread(_extract, url)
+        finally:
+            self._inflight.pop(key, None)
+        if self.ttl > 0:
+            self._entries[key] = (time.monotonic() + self.ttl, info)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return info
+
+    def invalidate(self, url: str) -> None:
+        self._entries.pop(canonical_url(url), None)
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+        }
+
+
+def download_with_info(ydl: yt_dlp.YoutubeDL, info: dict, url: str) -> None:
+    """
+    用已提取的信息执行下载（按 ydl 自身的选项选择格式 / 字幕），阻塞，在线程中调用。
+    信息中的媒体地址过期等导致失败时，丢弃缓存并按 URL 重新提取下载。
+    """
+    try:
+        ydl.process_ie_result(yt_dlp.YoutubeDL.sanitize_info(info, remove_private_keys=True), download=True)
+    except (DownloadError, ReExtractInfo) as e:
+        logger.warning(f"使用缓存的视频信息下载失败，重新提取: {e}")
+        video_metadata.invalidate(url)
+        ydl.download([url])
+
+
+_settings = get_settings()
+video_metadata = VideoMetadataCache(_settings.VIDEO_INFO_CACHE_TTL, _settings.VIDEO_INFO_CACHE_SIZE)
@@ -3,12 +3,10 @@
 获取视频信息而无需下载
 """
 import logging
-import asyncio
 import re
-from typing import Dict, Optional
-import yt_dlp
+from typing import Dict
 
-from backend.utils.video_helpers import BILIBILI_COOKIES_PATH, get_cookies_for_url
+from backend.services.video_metadata import video_metadata
 
 logger = logging.getLogger(__name__)
 
@@ -16,24 +14,6 @@ logger = logging.getLogger(__name__)
 class VideoPreviewService:
     """视频预览服务"""
     
-    def __init__(self):
-        """初始化视频预览服务"""
-        # 获取cookies文件路径（项目根目录）
-        self.project_root = BILIBILI_COOKIES_PATH.parent
-        self.bilibili_cookies = BILIBILI_COOKIES_PATH
-        
-        # 基础配置（不含 cookies） - 移除可能导致问题的 http_headers
-        self.base_ydl_opts = {
-            'quiet': True,
-            'no_warnings': True,
-            'extract_flat': False,
-            'skip_download': True,
-        }
-    
-    def _get_cookies_for_url(self, url: str) -> Optional[str]:
-        """根据 URL 获取对应的 cookies 文件路径"""
-        return get_cookies_for_url(url, self.bilibili_cookies, logger)
-
     async def get_video_info(self, url: str) -> Dict:
         """
         获取视频信息
@@ -47,14 +27,8 @@ class VideoPreviewService:
         try:
             logger.info(f"开始获取视频信息: {url}")
             
-            # 根据 URL 选择对应的 cookies
-            ydl_opts = self.base_ydl_opts.copy()
-            cookies_file = self._get_cookies_for_url(url)
-            if cookies_file:
-                ydl_opts['cookiefile'] = cookies_file
-            
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                info = await asyncio.to_thread(ydl.extract_info, url, False)
+            # 提取结果会被缓存，随后生成笔记时的字幕探测与下载直接复用
+            info = await video_metadata.get(url)
             
             video_info = {
                 'title': info.get('title', 'Unknown Title'),
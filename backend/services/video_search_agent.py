@@ -8,6 +8,7 @@ from typing import AsyncGenerator, Dict, Any, List, Optional
 from openai.types.chat import ChatCompletionMessage, ChatCompletionMessageToolCall
 from openai.types.chat.chat_completion_message_tool_call import Function
 
+from backend.core import task_scratch
 from backend.core.ai_client import get_async_openai_client, is_openai_available
 from backend.services.note_generator import NoteGenerator
 from backend.config.ai_config import get_openai_config
@@ -252,7 +253,7 @@ class VideoSearchAgent:
         self.generation_cancel_flags[generation_id] = False
         yield {"type": "generation_id", "generation_id": generation_id}
 
-        temp_dir = Path(__file__).parent.parent.parent / "temp"
+        temp_dir = task_scratch.scratch_dir(generation_id, create=True)
         progress_queue: asyncio.Queue = asyncio.Queue()
 
         async def progress_callback(progress: int, message: str):
@@ -317,6 +318,7 @@ class VideoSearchAgent:
         finally:
             self.active_generation_tasks.pop(generation_id, None)
             self.generation_cancel_flags.pop(generation_id, None)
+            task_scratch.discard(generation_id)
 
     async def generate_notes_for_video(
         self, video_url: str, temp_dir: Path, summary_language: str = "zh", generation_id: Optional[str] = None,
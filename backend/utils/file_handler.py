@@ -1,11 +1,9 @@
 """
 文件处理工具函数
-文件名清洗、验证、音频提取、内嵌字幕提取等
+文件名清洗、验证、内嵌字幕提取等
 """
 import asyncio
-import json
 import logging
-import os
 import re
 from pathlib import Path
 from typing import Optional
@@ -28,51 +26,11 @@ _IMAGE_SUBTITLE_CODECS = {"dvd_subtitle", "hdmv_pgs_subtitle", "dvb_subtitle", "
 _LANG_PREFERENCE = ["zh", "chi", "cn", "en", "eng", "ja", "jpn", "ko", "kor"]
 
 
-async def extract_audio_from_file(file_path: str, output_dir: Path, task_id: str) -> tuple[str, bool]:
-    """
-    从视频文件提取音频，音频文件直接返回原路径。
-
-    Args:
-        file_path: 源媒体文件路径
-        output_dir: 临时输出目录
-        task_id: 任务 ID（用于命名临时文件）
-
-    Returns:
-        (audio_path, needs_cleanup) — needs_cleanup=True 表示 audio_path 是临时文件，调用方用完需删除
-    """
-    ext = Path(file_path).suffix.lower()
-    if ext not in VIDEO_EXTENSIONS:
-        return file_path, False
-
-    audio_path = str(output_dir / f"{task_id}.wav")
-    proc = await asyncio.create_subprocess_exec(
-        "ffmpeg", "-i", file_path,
-        "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1", "-y",
-        audio_path,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    _, stderr = await proc.communicate()
-    if proc.returncode != 0:
-        raise RuntimeError(f"FFmpeg 提取音频失败: {stderr.decode(errors='replace')[:500]}")
-
-    return audio_path, True
-
-
-def cleanup_temp_audio(audio_path: str, needs_cleanup: bool) -> None:
-    """安全删除临时音频文件"""
-    if needs_cleanup and os.path.exists(audio_path):
-        try:
-            os.remove(audio_path)
-        except Exception:
-            pass
-
-
 async def extract_embedded_subtitles(file_path: str) -> Optional[str]:
     """
     从本地视频文件中提取内嵌字幕轨道。
 
-    使用 ffprobe 探测字幕流 → 选择最佳文本字幕 → ffmpeg 提取为 SRT → 解析为 Markdown。
+    使用 ffprobe 探测字幕流（结果按文件缓存）→ 选择最佳文本字幕 → ffmpeg 提取为 SRT → 解析为 Markdown。
 
     Args:
         file_path: 本地视频文件路径
@@ -123,27 +81,12 @@ async def extract_embedded_subtitles(file_path: str) -> Optional[str]:
 
 async def _probe_subtitle_streams(file_path: str) -> list[dict]:
     """用 ffprobe 获取视频中的字幕流信息"""
-    proc = await asyncio.create_subprocess_exec(
-        "ffprobe",
-        "-v", "quiet",
-        "-select_streams", "s",
-        "-show_streams",
-        "-of", "json",
-        file_path,
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
-        logger.warning(f"ffprobe 探测字幕失败: {stderr.decode(errors='replace')[:200]}")
-        return []
+    from backend.services.media_probe import probe_media
 
-    try:
-        data = json.loads(stdout.decode("utf-8"))
-        return data.get("streams", [])
-    except (json.JSONDecodeError, UnicodeDecodeError) as e:
-        logger.warning(f"ffprobe 输出解析失败: {e}")
+    probe = await probe_media(file_path)
+    if not probe:
         return []
+    return [s for s in probe.get("streams", []) if s.get("codec_type") == "subtitle"]
 
 
 def _pick_best_stream(streams: list[dict]) -> dict:
@@ -158,18 +101,21 @@ def _pick_best_stream(streams: list[dict]) -> dict:
 
 async def _extract_stream_as_srt(file_path: str, stream_index: int) -> Optional[str]:
     """用 ffmpeg 将指定字幕流提取为 SRT 文本"""
-    proc = await asyncio.create_subprocess_exec(
-        "ffmpeg",
-        "-i", file_path,
-        "-map", f"0:{stream_index}",
-        "-f", "srt",
-        "-v", "quiet",
-        "-",
-        stdout=asyncio.subprocess.PIPE,
-        stderr=asyncio.subprocess.PIPE,
-    )
-    stdout, stderr = await proc.communicate()
-    if proc.returncode != 0:
+    from backend.config.settings import get_settings
+    from backend.services.media_probe import run_media_tool
+
+    try:
+        returncode, stdout, stderr = await run_media_tool(
+            ["ffmpeg", "-nostdin", "-v", "quiet", "-i", file_path, "-map", f"0:{stream_index}", "-f", "srt", "-"],
+            get_settings().MEDIA_EXTRACT_TIMEOUT,
+        )
+    except FileNotFoundError:
+        logger.warning("未找到 ffmpeg，无法提取内嵌字幕")
+        return None
+    except asyncio.TimeoutError:
+        logger.warning("ffmpeg 提取字幕超时")
+        return None
+    if returncode != 0:
         logger.warning(f"ffmpeg 提取字幕失败: {stderr.decode(errors='replace')[:200]}")
         return None
 
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""Autotune CPU ASR settings: grid-search compute type, threads and concurrency, write a profile.
+
+Usage: python scripts/bench_asr_autotune.py FIXTURE [FIXTURE ...]
+           [--models whisper:base,whisper:small] [--compute-types int8,float32]
+           [--threads 2,4,8] [--concurrency 1,2,4] [--repeat 1]
+           [--max-rtf 0.5] [--max-rss-mb 4000] [--output asr_profile.json] [--dry-run]
+
+FIXTURE is an audio/video file or a directory of them; use a few minutes of
+speech representative of what the host will transcribe. Every grid point runs
+in its own spawned process (so model memory and peak RSS are isolated): the
+model is loaded through the app's registry, each fixture is queued `repeat`
+times, and `concurrency` threads drain the queue through the same backend
+iterators AudioTranscriber uses. Reported per trial:
+
+  throughput  audio seconds transcribed per wall-clock second (higher is better)
+  RTF         mean per-job processing time / audio duration (lower is better)
+  peak RSS    maximum resident memory of the trial process
+
+The best trial per provider:model (highest throughput among trials within
+--max-rtf / --max-rss-mb) is merged into the profile file, which
+ai_config.ASRConfig loads at startup (ASR_PROFILE, default asr_profile.json)
+to set ASR_COMPUTE_TYPE, ASR_CPU_THREADS, ASR_NUM_WORKERS and ASR_CONCURRENCY.
+Model loading and a short warm-up are excluded from the timings.
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import platform
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+MEDIA_SUFFIXES = {".wav", ".mp3", ".m4a", ".flac", ".ogg", ".opus", ".aac", ".webm", ".mp4", ".mkv", ".mov"}
+# Providers whose compute type is a CTranslate2 setting; the torch backends ignore it
+CT2_PROVIDERS = {"whisper"}
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def run_trial(trial: dict, fixtures: list[str], repeat: int, results) -> None:
+    """Child process entry point: configure via env before the backend is imported."""
+    os.environ.update({
+        "ASR_PROVIDER": trial["provider"],
+        "ASR_MODEL": trial["model"],
+        "ASR_DEVICE": trial["device"],
+        "ASR_COMPUTE_TYPE": trial["compute_type"],
+        "ASR_CPU_THREADS": str(trial["cpu_threads"]),
+        "ASR_NUM_WORKERS": str(trial["num_workers"]),
+        "ASR_CONCURRENCY": str(trial["concurrency"]),
+        "ASR_PARALLEL_MIN_DURATION": "0",
+        "ASR_WORKER_PROCESSES": "0",
+        "ASR_BATCH_ENGINE": "false",
+        "ASR_PROFILE": "off",
+        "OMP_NUM_THREADS": str(trial["cpu_threads"]),
+    })
+    # Legacy override read from .env for whisper; pin it to the trial model
+    os.environ["WHISPER_MODEL_SIZE"] = trial["model"]
+    try:
+        from backend.core.ai_client import get_asr_model
+        from backend.services.audio_transcriber import AudioTranscriber
+        from backend.services.media_decode import PCMAudio, decode_pcm
+
+        audios = [decode_pcm(path) for path in fixtures]
+        started = time.perf_counter()
+        model = get_asr_model()
+        load_seconds = time.perf_counter() - started
+        iter_backend = AudioTranscriber()._select_backend(use_engine=False)
+
+        def transcribe(audio) -> int:
+            return sum(1 for _ in iter_backend(model, audio, None, None))
+
+        # Warm-up on a short clip so first-call allocations are not timed
+        transcribe(PCMAudio(audios[0].samples[: 5 * audios[0].sample_rate]))
+
+        jobs: queue.Queue = queue.Queue()
+        for audio in audios * repeat:
+            jobs.put(audio)
+        job_rtfs: list[float] = []
+        segments = [0]
+        errors: list[str] = []
+        lock = threading.Lock()
+
+        def drain() -> None:
+            while True:
+                try:
+                    audio = jobs.get_nowait()
+                except queue.Empty:
+                    return
+                job_started = time.perf_counter()
+                try:
+                    count = transcribe(audio)
+                except Exception as e:  # report, don't kill sibling threads
+                    with lock:
+                        errors.append(str(e))
+                    return
+                with lock:
+                    job_rtfs.append((time.perf_counter() - job_started) / audio.duration)
+                    segments[0] += count
+
+        threads = [threading.Thread(target=drain) for _ in range(trial["concurrency"])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        wall = time.perf_counter() - started
+        if errors:
+            raise RuntimeError(errors[0])
+
+        audio_seconds = sum(a.duration for a in audios) * repeat
+        results.put(dict(
+            trial,
+            status="ok",
+            load_seconds=round(load_seconds, 1),
+            wall_seconds=round(wall, 2),
+            throughput=round(audio_seconds / wall, 3),
+            rtf_mean=round(sum(job_rtfs) / len(job_rtfs), 3),
+            rtf_max=round(max(job_rtfs), 3),
+            segments=segments[0],
+            peak_rss_mb=round(_peak_rss_mb(), 1),
+        ))
+    except Exception as e:
+        results.put(dict(trial, status="error", error=str(e)[:200], peak_rss_mb=round(_peak_rss_mb(), 1)))
+
+
+def execute(trial: dict, fixtures: list[str], repeat: int, timeout: float) -> dict:
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=run_trial, args=(trial, fixtures, repeat, results))
+    process.start()
+    try:
+        return results.get(timeout=timeout)
+    except queue.Empty:
+        return dict(trial, status="error", error=f"timed out after {timeout:.0f}s (exitcode={process.exitcode})")
+    finally:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.kill()
+
+
+def collect_fixtures(paths: list[str]) -> list[str]:
+    fixtures = []
+    for raw in paths:
+        path = Path(raw)
+        if path.is_dir():
+            fixtures += sorted(str(p) for p in path.rglob("*") if p.suffix.lower() in MEDIA_SUFFIXES)
+        elif path.is_file():
+            fixtures.append(str(path))
+        else:
+            raise SystemExit(f"fixture not found: {raw}")
+    if not fixtures:
+        raise SystemExit("no audio fixtures found")
+    return fixtures
+
+
+def build_grid(args, config) -> list[dict]:
+    cpus = os.cpu_count() or 1
+    models = [m.strip() for m in (args.models or f"{config.provider}:{config.model}").split(",") if m.strip()]
+    threads = _ints(args.threads) if args.threads else sorted({max(1, cpus // 4), max(1, cpus // 2), cpus})
+    concurrency = _ints(args.concurrency)
+    grid = []
+    for spec in models:
+        provider, _, model = spec.partition(":")
+        if not model:
+            provider, model = config.provider, provider
+        compute_types = args.compute_types.split(",") if provider in CT2_PROVIDERS else [config.compute_type]
+        for compute_type, cpu_threads, conc in itertools.product(compute_types, threads, concurrency):
+            if not args.oversubscribe and cpu_threads * conc > cpus:
+                continue
+            grid.append({
+                "provider": provider, "model": model, "device": config.device,
+                "compute_type": compute_type.strip(), "cpu_threads": cpu_threads,
+                "num_workers": conc, "concurrency": conc,
+            })
+    return grid
+
+
+def _ints(value: str) -> list[int]:
+    return sorted({int(v) for v in value.split(",") if v.strip()})
+
+
+def pick_best(results: list[dict], max_rtf: float | None, max_rss_mb: float | None) -> dict[str, dict]:
+    best: dict[str, dict] = {}
+    for result in results:
+        if result["status"] != "ok":
+            continue
+        if max_rtf is not None and result["rtf_max"] > max_rtf:
+            continue
+        if max_rss_mb is not None and result["peak_rss_mb"] > max_rss_mb:
+            continue
+        key = f"{result['provider']}:{result['model']}"
+        current = best.get(key)
+        # Highest throughput wins; within 3% prefer the smaller memory footprint
+        if current is None or result["throughput"] > current["throughput"] * 1.03 or (
+            result["throughput"] >= current["throughput"] * 0.97 and result["peak_rss_mb"] < current["peak_rss_mb"]
+        ):
+            best[key] = result
+    return best
+
+
+def write_profile(path: Path, best: dict[str, dict], results: list[dict], fixtures: list[str]) -> None:
+    try:
+        profile = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        profile = {}
+    profiles = profile.get("profiles", {})
+    for key, result in best.items():
+        profiles[key] = {
+            "device": result["device"],
+            "compute_type": result["compute_type"],
+            "cpu_threads": result["cpu_threads"],
+            "num_workers": result["num_workers"],
+            "concurrency": result["concurrency"],
+            "throughput": result["throughput"],
+            "rtf_mean": result["rtf_mean"],
+            "peak_rss_mb": result["peak_rss_mb"],
+        }
+    profile.update({
+        "version": 1,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "host": {"platform": platform.platform(), "machine": platform.machine(), "cpu_count": os.cpu_count()},
+        "fixtures": [Path(f).name for f in fixtures],
+        "profiles": profiles,
+        "trials": results,
+    })
+    path.write_text(json.dumps(profile, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def report(result: dict) -> None:
+    label = (f"{result['provider']}:{result['model']:<14} {result['compute_type']:<13} "
+             f"threads {result['cpu_threads']:>2}  conc {result['concurrency']:>2}")
+    if result["status"] != "ok":
+        print(f"{label}   ERROR {result['error']}")
+        return
+    print(f"{label}   {result['throughput']:7.2f}x   RTF {result['rtf_mean']:6.3f} (max {result['rtf_max']:.3f})   "
+          f"RSS {result['peak_rss_mb']:7.0f}MB   load {result['load_seconds']:.1f}s", flush=True)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("fixtures", nargs="+", help="audio/video files or directories")
+    parser.add_argument("--models", default=None, help="comma-separated provider:model (default: ASR_PROVIDER:ASR_MODEL)")
+    parser.add_argument("--compute-types", default="int8,int8_float32,float32",
+                        help="CTranslate2 compute types to try (whisper only)")
+    parser.add_argument("--threads", default=None, help="cpu_threads values (default: cpus/4, cpus/2, cpus)")
+    parser.add_argument("--concurrency", default="1,2,4", help="concurrent transcriptions (also num_workers)")
+    parser.add_argument("--oversubscribe", action="store_true", help="also try threads x concurrency > cpu count")
+    parser.add_argument("--repeat", type=int, default=1, help="times each fixture is queued per trial")
+    parser.add_argument("--max-rtf", type=float, default=None, help="reject trials whose slowest job exceeds this RTF")
+    parser.add_argument("--max-rss-mb", type=float, default=None, help="reject trials above this peak RSS")
+    parser.add_argument("--timeout", type=float, default=3600, help="per-trial timeout in seconds")
+    parser.add_argument("--output", default=str(ROOT / "asr_profile.json"))
+    parser.add_argument("--dry-run", action="store_true", help="print results without writing the profile")
+    args = parser.parse_args()
+
+    from backend.config.ai_config import get_asr_config
+
+    config = get_asr_config()
+    if not config.device.startswith("cpu"):
+        print(f"warning: ASR_DEVICE={config.device}; this tuner targets CPU inference", file=sys.stderr)
+    fixtures = collect_fixtures(args.fixtures)
+    grid = build_grid(args, config)
+    if not grid:
+        print("empty grid (every threads x concurrency combination oversubscribes; try --oversubscribe)",
+              file=sys.stderr)
+        return 1
+    print(f"{len(fixtures)} fixtures, {len(grid)} trials, {os.cpu_count()} CPUs")
+
+    results = []
+    for trial in grid:
+        result = execute(trial, fixtures, args.repeat, args.timeout)
+        report(result)
+        results.append(result)
+
+    best = pick_best(results, args.max_rtf, args.max_rss_mb)
+    if not best:
+        print("no trial satisfied the constraints; profile not written", file=sys.stderr)
+        return 1
+    print()
+    for key, result in best.items():
+        print(f"best {key}: ASR_COMPUTE_TYPE={result['compute_type']} ASR_CPU_THREADS={result['cpu_threads']} "
+              f"ASR_NUM_WORKERS={result['num_workers']} ASR_CONCURRENCY={result['concurrency']} "
+              f"({result['throughput']:.2f}x realtime)")
+    if not args.dry_run:
+        output = Path(args.output)
+        write_profile(output, best, results, fixtures)
+        print(f"profile written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
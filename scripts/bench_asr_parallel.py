@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""Benchmark Whisper transcription: single model.transcribe call vs parallel chunked windows.
+
+Usage: python scripts/bench_asr_parallel.py AUDIO [--model base] [--workers 8] [--cpu-threads 4]
+                                                  [--window 300] [--overlap 2] [--skip-single]
+
+Reports wall time and real-time factor (RTF = processing time / audio duration,
+lower is better) for both paths, plus segment/character counts so the outputs
+can be sanity-checked against each other. Decoding and model loading are
+excluded from the timings (the audio is decoded once up front and the parallel
+pool is warmed up before the clock starts).
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+from backend.config.ai_config import get_asr_config  # noqa: E402
+from backend.services import asr_parallel  # noqa: E402
+from backend.services.media_decode import decode_pcm  # noqa: E402
+
+
+def run_single(config, audio) -> tuple[float, list]:
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(
+        config.model, device=config.device, compute_type=config.compute_type,
+        cpu_threads=os.cpu_count() or 0,
+    )
+    options = asr_parallel._whisper_options(config.whisper)
+    start = time.perf_counter()
+    segments, _ = model.transcribe(audio.samples, **options)
+    segments = list(segments)
+    return time.perf_counter() - start, segments
+
+
+def run_parallel(config, audio) -> tuple[float, list]:
+    with asr_parallel.acquire_pool(config) as pool, tempfile.TemporaryDirectory() as tmp:
+        # Warm up: every worker loads its model in the initializer when it starts
+        list(pool.map(time.sleep, [1.0] * asr_parallel.resolve_workers(config)))
+        start = time.perf_counter()
+        segments = [seg for seg, _ in asr_parallel.iter_segments(config, audio, None, Path(tmp))]
+        elapsed = time.perf_counter() - start
+    asr_parallel.shutdown_pool()
+    return elapsed, segments
+
+
+def report(label: str, elapsed: float, duration: float, segments: list) -> None:
+    chars = sum(len(seg.text.strip()) for seg in segments)
+    print(f"{label:<9} {elapsed:8.1f}s   RTF {elapsed / duration:6.3f}   "
+          f"{len(segments):5d} segments   {chars:7d} chars")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("audio")
+    parser.add_argument("--model", default=None, help="defaults to ASR_MODEL")
+    parser.add_argument("--workers", type=int, default=0, help="0 = cpu_count / cpu-threads")
+    parser.add_argument("--cpu-threads", type=int, default=4)
+    parser.add_argument("--window", type=float, default=300.0)
+    parser.add_argument("--overlap", type=float, default=2.0)
+    parser.add_argument("--skip-single", action="store_true")
+    args = parser.parse_args()
+
+    config = get_asr_config()
+    if args.model:
+        config.model = args.model
+    config.parallel_workers = args.workers
+    config.parallel_cpu_threads = args.cpu_threads
+    config.parallel_window_seconds = args.window
+    config.parallel_overlap_seconds = args.overlap
+
+    try:
+        audio = decode_pcm(args.audio)
+    except RuntimeError as e:
+        print(f"cannot decode {args.audio}: {e}", file=sys.stderr)
+        return 1
+    duration = audio.duration
+    print(f"{args.audio}: {duration:.0f}s, model {config.model}, "
+          f"{asr_parallel.resolve_workers(config)} workers x {config.parallel_cpu_threads} threads")
+
+    if not args.skip_single:
+        elapsed, segments = run_single(config, audio)
+        report("single", elapsed, duration, segments)
+    elapsed, segments = run_parallel(config, audio)
+    report("parallel", elapsed, duration, segments)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
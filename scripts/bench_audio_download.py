@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""Benchmark audio fetch for ASR: smallest acceptable audio-only stream vs best audio.
+
+Usage: python scripts/bench_audio_download.py URL [URL ...] [--modes compact,best]
+                                              [--repeat 1] [--decode] [--keep DIR]
+
+For every URL the yt-dlp metadata is extracted once up front (through the app's
+shared video_metadata cache, as in a real note run), then each mode downloads the
+audio through VideoDownloader.download_video_audio:
+
+  compact  smallest audio-only format at or above AUDIO_DOWNLOAD_MIN_ABR kbps
+           (opus, then m4a), falling back to best when unavailable
+  best     bestaudio/best
+
+Reported per mode, normalised per minute of media (the extractor's duration, or
+the decoded length when it reports none) so URLs of different length can be
+compared:
+
+  MB/min   bytes downloaded
+  s/min    download wall time
+  dec/min  PCM decode wall time (with --decode; the ASR decodes the raw container)
+
+Metadata extraction is excluded from the timings. The shared audio cache is
+disabled so every repeat really downloads; files go to a temporary directory
+that is removed afterwards unless --keep is given.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+# Measure real downloads, not audio cache hits (read when settings are imported)
+os.environ["AUDIO_CACHE_ENABLED"] = "false"
+
+from backend.services.media_decode import decode_pcm  # noqa: E402
+from backend.services.video_downloader import AUDIO_DOWNLOAD_MODES, VideoDownloader  # noqa: E402
+from backend.services.video_metadata import video_metadata  # noqa: E402
+
+
+async def run(urls: list[str], modes: list[str], repeat: int, decode: bool, out_dir: Path) -> dict:
+    downloader = VideoDownloader()
+    totals = {mode: {"minutes": 0.0, "bytes": 0, "download": 0.0, "decode": 0.0} for mode in modes}
+    for url in urls:
+        info = await video_metadata.get(url)
+        minutes = (info.get("duration") or 0) / 60
+        print(f"{info.get('title', url)} ({minutes:.1f} min)" if minutes else f"{info.get('title', url)}")
+        for mode in modes:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                path, _ = await downloader.download_video_audio(url, out_dir, mode=mode)
+                elapsed = time.perf_counter() - start
+                size = Path(path).stat().st_size
+                decode_elapsed = 0.0
+                if decode or not minutes:
+                    start = time.perf_counter()
+                    audio = decode_pcm(path)
+                    decode_elapsed = time.perf_counter() - start
+                    # Extractor reported no duration (e.g. direct file links): use the decoded length
+                    minutes = minutes or audio.duration / 60
+                    audio.close()
+                print(f"  {mode:<8} {Path(path).suffix:<6} {size / 1e6:8.2f} MB  {elapsed:7.2f}s download"
+                      + (f"  {decode_elapsed:6.2f}s decode" if decode else ""))
+                total = totals[mode]
+                total["minutes"] += minutes
+                total["bytes"] += size
+                total["download"] += elapsed
+                total["decode"] += decode_elapsed
+    return totals
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("urls", nargs="+")
+    parser.add_argument("--modes", default="compact,best")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--decode", action="store_true", help="also time decoding to 16 kHz PCM")
+    parser.add_argument("--keep", default=None, help="keep downloaded files in this directory")
+    args = parser.parse_args()
+
+    modes = [m.strip() for m in args.modes.split(",") if m.strip()]
+    unknown = [m for m in modes if m not in AUDIO_DOWNLOAD_MODES]
+    if unknown:
+        parser.error(f"unknown mode(s): {', '.join(unknown)}")
+
+    out_dir = Path(args.keep) if args.keep else Path(tempfile.mkdtemp(prefix="bench_audio_"))
+    out_dir.mkdir(parents=True, exist_ok=True)
+    try:
+        totals = asyncio.run(run(args.urls, modes, args.repeat, args.decode, out_dir))
+    except Exception as e:
+        print(f"benchmark failed: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if not args.keep:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    print(f"\n{'mode':<8} {'MB/min':>8} {'s/min':>8}" + (f" {'dec/min':>8}" if args.decode else ""))
+    for mode, total in totals.items():
+        minutes = total["minutes"]
+        if not minutes:
+            continue
+        print(f"{mode:<8} {total['bytes'] / 1e6 / minutes:8.3f} {total['download'] / minutes:8.3f}"
+              + (f" {total['decode'] / minutes:8.3f}" if args.decode else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""Benchmark list_notes / get_note throughput: connection-per-call vs pooled connections.
+
+Usage: python scripts/bench_db_pool.py [--notes 2000] [--seconds 3] [--concurrency 8]
+
+Builds a synthetic library in a temporary SQLite file, then runs the
+repository functions against it twice: once with the legacy get_db()
+(new aiosqlite connection + PRAGMAs per call) and once through the pool.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import aiosqlite  # noqa: E402
+
+from backend.db import connection  # noqa: E402
+from backend.db.schema import CREATE_TABLES_SQL  # noqa: E402
+from backend.services import note_repository  # noqa: E402
+
+
+def make_legacy_get_db(path: Path):
+    @asynccontextmanager
+    async def legacy_get_db():
+        db = await aiosqlite.connect(str(path))
+        db.row_factory = aiosqlite.Row
+        await db.execute("PRAGMA journal_mode=WAL")
+        await db.execute("PRAGMA foreign_keys=ON")
+        try:
+            yield db
+        finally:
+            await db.close()
+    return legacy_get_db
+
+
+async def populate(path: Path, n_notes: int) -> list[str]:
+    short_ids = [f"{i:06x}" for i in range(n_notes)]
+    async with aiosqlite.connect(str(path)) as db:
+        await db.executescript(CREATE_TABLES_SQL)
+        await db.execute("INSERT INTO categories (name) VALUES ('编程开发')")
+        for t in range(20):
+            await db.execute("INSERT INTO tags (name) VALUES (?)", (f"tag{t}",))
+        await db.executemany(
+            """INSERT INTO notes (short_id, task_id, url, title, safe_title, category_id,
+                                  has_summary, has_transcript, completed_at)
+               VALUES (?, ?, ?, ?, ?, 1, 1, 1, datetime('now'))""",
+            [(sid, f"task-{sid}", f"https://example.com/{sid}", f"视频标题 {sid}", f"title_{sid}")
+             for sid in short_ids],
+        )
+        await db.executemany(
+            "INSERT OR IGNORE INTO note_tags (note_id, tag_id) VALUES (?, ?)",
+            [(i + 1, (i + k) % 20 + 1) for i in range(n_notes) for k in range(3)],
+        )
+        await db.commit()
+    return short_ids
+
+
+async def run_for(seconds: float, concurrency: int, op) -> float:
+    deadline = time.perf_counter() + seconds
+    count = 0
+
+    async def worker():
+        nonlocal count
+        while time.perf_counter() < deadline:
+            await op()
+            count += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return count / (time.perf_counter() - start)
+
+
+async def bench(label: str, short_ids: list[str], seconds: float, concurrency: int) -> None:
+    async def op_list():
+        await note_repository.list_notes(page=random.randint(1, 5), page_size=50)
+
+    async def op_get():
+        await note_repository.get_note(random.choice(short_ids))
+
+    list_rate = await run_for(seconds, concurrency, op_list)
+    get_rate = await run_for(seconds, concurrency, op_get)
+    print(f"{label:<10} list_notes {list_rate:9.1f} ops/s   get_note {get_rate:9.1f} ops/s")
+
+
+async def main_async(args) -> int:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        short_ids = await populate(path, args.notes)
+        print(f"{args.notes} notes, concurrency {args.concurrency}, {args.seconds}s per run")
+
+        legacy = make_legacy_get_db(path)
+        note_repository.get_db = legacy
+        note_repository.get_read_db = legacy
+        await bench("per-call", short_ids, args.seconds, args.concurrency)
+
+        pool = connection.ConnectionPool(path)
+        connection._pool = pool
+        note_repository.get_db = connection.get_db
+        note_repository.get_read_db = connection.get_read_db
+        await bench("pooled", short_ids, args.seconds, args.concurrency)
+        await connection.close_db()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Benchmark note search: LIKE scan over title/summary/transcript vs the FTS5 index.
+
+Usage: python scripts/bench_fts_search.py [--notes 10000] [--queries 50]
+
+Builds a synthetic library (titles, summaries and transcripts of a few KB each)
+in a temporary SQLite file, indexes it with note_search, then times the same
+queries as a substring LIKE scan and as note_repository.list_notes(search=...).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+import aiosqlite  # noqa: E402
+
+from backend.db import connection  # noqa: E402
+from backend.db.schema import CREATE_TABLES_SQL  # noqa: E402
+from backend.services import note_repository, note_search  # noqa: E402
+
+
+SYLLABLES = (
+    "ka ri to mu se na lo vi pe zu ha ne qi xo la be du fo gi ja "
+    "学 习 网 络 数 据 模 型 设 计 增 长 投 资 历 史 编 程 算 法 系 统"
+).split()
+
+
+def make_vocabulary(rng: random.Random, size: int) -> list[str]:
+    return ["".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(size)]
+
+
+def fake_text(rng: random.Random, vocab: list[str], n_words: int) -> str:
+    # Zipf-like: a few very common words plus a long tail
+    return " ".join(vocab[min(int(rng.paretovariate(1.1)) - 1, len(vocab) - 1)] for _ in range(n_words))
+
+
+async def populate(path: Path, n_notes: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    vocab = make_vocabulary(rng, 20000)
+    rng.shuffle(vocab)
+    async with aiosqlite.connect(str(path)) as db:
+        await db.executescript(CREATE_TABLES_SQL)
+        await db.execute("INSERT INTO categories (name) VALUES ('编程开发')")
+        for t in range(20):
+            await db.execute("INSERT INTO tags (name) VALUES (?)", (f"标签{t}",))
+        await db.commit()
+
+    connection._pool = connection.ConnectionPool(path)
+    async with connection.get_db() as db:
+        await note_search.ensure_fts(db)
+        rows = []
+        for i in range(n_notes):
+            sid = f"{i:06x}"
+            rows.append((sid, f"task-{sid}", f"https://example.com/{sid}",
+                         fake_text(rng, vocab, 6), f"title_{sid}"))
+        await db.executemany(
+            """INSERT INTO notes (short_id, task_id, url, title, safe_title, category_id,
+                                  has_summary, has_transcript, completed_at)
+               VALUES (?, ?, ?, ?, ?, 1, 1, 1, datetime('now'))""",
+            rows,
+        )
+        await db.executemany(
+            "INSERT OR IGNORE INTO note_tags (note_id, tag_id) VALUES (?, ?)",
+            [(i + 1, (i + k) % 20 + 1) for i in range(n_notes) for k in range(3)],
+        )
+        # Plain copy of the text for the LIKE baseline
+        await db.execute(
+            "CREATE TABLE note_text (id INTEGER PRIMARY KEY, title TEXT, summary TEXT, transcript TEXT)"
+        )
+        for i, (sid, _, _, title, _) in enumerate(rows):
+            summary = fake_text(rng, vocab, 80)
+            transcript = fake_text(rng, vocab, 600)
+            await db.execute(
+                "INSERT INTO note_text VALUES (?, ?, ?, ?)", (i + 1, title, summary, transcript)
+            )
+            await note_search.index_note(sid, title=title, summary=summary, transcript=transcript, db=db)
+        await db.commit()
+    return vocab
+
+
+async def time_like(query: str) -> float:
+    start = time.perf_counter()
+    async with connection.get_read_db() as db:
+        # Same shape as list_notes: total count + first page
+        pattern = f"%{query}%"
+        where = "WHERE title LIKE ? OR summary LIKE ? OR transcript LIKE ?"
+        cursor = await db.execute(f"SELECT COUNT(*) FROM note_text {where}", (pattern,) * 3)
+        await cursor.fetchone()
+        cursor = await db.execute(
+            f"SELECT id FROM note_text {where} ORDER BY id DESC LIMIT 20", (pattern,) * 3
+        )
+        await cursor.fetchall()
+    return time.perf_counter() - start
+
+
+async def time_fts(query: str) -> float:
+    start = time.perf_counter()
+    await note_repository.list_notes(page=1, page_size=20, search=query)
+    return time.perf_counter() - start
+
+
+def report(label: str, samples: list[float]) -> None:
+    samples = sorted(samples)
+    p95 = samples[int(len(samples) * 0.95) - 1] if len(samples) >= 20 else samples[-1]
+    print(f"{label:<6} median {statistics.median(samples) * 1000:8.2f} ms   p95 {p95 * 1000:8.2f} ms")
+
+
+async def main_async(args) -> int:
+    rng = random.Random(args.seed + 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "bench.db"
+        t0 = time.perf_counter()
+        vocab = await populate(path, args.notes, args.seed)
+        print(f"{args.notes} notes indexed in {time.perf_counter() - t0:.1f}s "
+              f"(tokenizer: {note_search._tokenizer or 'none'})")
+
+        # Mid-frequency terms: neither stopword-common nor absent
+        queries = [w for w in rng.sample(vocab[20:2000], args.queries * 2) if len(w) >= 3][:args.queries]
+        like = [await time_like(q) for q in queries]
+        fts = [await time_fts(q) for q in queries]
+        report("LIKE", like)
+        report("FTS5", fts)
+        await connection.close_db()
+    return 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    return asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
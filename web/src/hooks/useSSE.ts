@@ -2,40 +2,137 @@ import { useEffect, useRef, useCallback, useState } from 'react';
 
 interface UseSSEOptions {
   onMessage: (data: unknown) => void;
+  // 临时事件（如转录中的部分片段），不并入任务状态
+  onEvent?: (event: string, data: unknown) => void;
   onError?: () => void;
 }
 
+interface ArtifactRef {
+  url: string;
+  size: number;
+}
+
+// 任务流 v2 协议帧：snapshot 为完整状态，delta 只含变化字段；大字段按引用下发；
+// event 为临时事件，不改变任务状态
+interface StreamFrame {
+  v: number;
+  seq: number;
+  type: 'snapshot' | 'delta' | 'event';
+  fields?: Record<string, unknown>;
+  removed?: string[];
+  artifacts?: Record<string, ArtifactRef>;
+  event?: string;
+  data?: unknown;
+}
+
+const TERMINAL = ['completed', 'error', 'cancelled'];
+const MAX_RETRIES = 3;
+
+function isFrame(data: unknown): data is StreamFrame {
+  return typeof data === 'object' && data !== null && (data as StreamFrame).v === 2;
+}
+
+async function fetchArtifact(ref: ArtifactRef): Promise<string> {
+  const res = await fetch(ref.url);
+  if (!res.ok) throw new Error(`artifact ${res.status}`);
+  const body = (await res.json()) as { content?: string };
+  return body.content ?? '';
+}
+
 export function useSSE() {
   const esRef = useRef<EventSource | null>(null);
+  const genRef = useRef(0);
   const [connected, setConnected] = useState(false);
 
   const connect = useCallback((path: string, opts: UseSSEOptions) => {
     esRef.current?.close();
-    const es = new EventSource(path);
-    esRef.current = es;
+    const gen = ++genRef.current;
 
-    es.onopen = () => {
-      setConnected(true);
-    };
+    // 由帧重建出完整任务状态，页面仍然拿到与 /api/task-status 相同结构的对象
+    let state: Record<string, unknown> = {};
+    let lastEventId = '';
+    let retries = 0;
+    let finished = false;
+    let chain = Promise.resolve();
 
-    es.onmessage = (e) => {
-      try {
-        const data = JSON.parse(e.data);
-        if (data.type === 'heartbeat') return;
-        opts.onMessage(data);
-      } catch {
-        /* skip */
-      }
+    const apply = async (frame: StreamFrame) => {
+      const artifacts: Record<string, string> = {};
+      await Promise.all(
+        Object.entries(frame.artifacts ?? {}).map(async ([field, ref]) => {
+          try {
+            artifacts[field] = await fetchArtifact(ref);
+          } catch {
+            /* 拉取失败时保留旧值 */
+          }
+        }),
+      );
+      const base = frame.type === 'snapshot' ? {} : { ...state };
+      for (const key of frame.removed ?? []) delete base[key];
+      state = { ...base, ...frame.fields, ...artifacts };
+      if (gen !== genRef.current) return;
+      opts.onMessage({ ...state });
     };
 
-    es.onerror = () => {
-      setConnected(false);
-      opts.onError?.();
-      es.close();
+    const open = () => {
+      const url = lastEventId
+        ? `${path}${path.includes('?') ? '&' : '?'}last_event_id=${encodeURIComponent(lastEventId)}`
+        : path;
+      const es = new EventSource(url);
+      esRef.current = es;
+
+      es.onopen = () => {
+        retries = 0;
+        setConnected(true);
+      };
+
+      es.onmessage = (e) => {
+        try {
+          const data = JSON.parse(e.data);
+          if (data.type === 'heartbeat') return;
+          if (!isFrame(data)) {
+            opts.onMessage(data);
+            return;
+          }
+          if (e.lastEventId) lastEventId = e.lastEventId;
+          if (data.type === 'event') {
+            // 与状态帧走同一条链，保证先后顺序
+            chain = chain
+              .then(() => {
+                if (gen === genRef.current) opts.onEvent?.(data.event ?? '', data.data);
+              })
+              .catch(() => undefined);
+            return;
+          }
+          if (TERMINAL.includes(String(data.fields?.status))) finished = true;
+          chain = chain.then(() => apply(data)).catch(() => undefined);
+        } catch {
+          /* skip */
+        }
+      };
+
+      es.onerror = () => {
+        es.close();
+        if (esRef.current !== es) return;
+        setConnected(false);
+        // 终态帧之后服务端主动关闭连接，属于正常结束
+        if (finished) return;
+        if (retries < MAX_RETRIES) {
+          // 断线后带上最后的事件 ID 重连，服务端补发缺失的帧
+          retries += 1;
+          setTimeout(() => {
+            if (esRef.current === es) open();
+          }, 1000 * retries);
+          return;
+        }
+        opts.onError?.();
+      };
     };
+
+    open();
   }, []);
 
   const disconnect = useCallback(() => {
+    genRef.current += 1;
     esRef.current?.close();
     esRef.current = null;
     setConnected(false);
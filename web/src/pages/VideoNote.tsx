@@ -8,7 +8,7 @@ import { SUBTITLE_STEPS } from '../components/progressStepData';
 import MarkdownRenderer from '../components/MarkdownRenderer';
 import Modal from '../components/Modal';
 import { toast } from '../components/toastStore';
-import type { TaskStatus, VideoInfo, BatchStatus, BatchTaskInfo, ScanResult, ScannedFile } from '../types';
+import type { TaskStatus, VideoInfo, BatchStatus, BatchTaskInfo, ScanResult, ScannedFile, TranscriptSegment, ASRProgress } from '../types';
 import { Play, Download, Square, Sparkles, BrainCircuit, List, CheckCircle2, XCircle, Loader2, Clock, FolderSearch, Layers } from 'lucide-react';
 
 const MarkmapView = lazy(() => import('../components/MarkmapView'));
@@ -48,6 +48,15 @@ function stepFromMessage(msg: string): string {
   return '';
 }
 
+// 转录进行中实时显示的最近片段数
+const LIVE_SEGMENT_LIMIT = 20;
+
+function formatSeconds(sec: number): string {
+  const m = Math.floor(sec / 60);
+  const s = Math.floor(sec % 60);
+  return `${String(m).padStart(2, '0')}:${String(s).padStart(2, '0')}`;
+}
+
 function BatchTaskStatusIcon({ status }: { status: string }) {
   switch (status) {
     case 'completed':
@@ -75,6 +84,8 @@ export default function VideoNote() {
   const [currentStep, setCurrentStep] = useState('');
   const [completedSteps, setCompletedSteps] = useState<string[]>([]);
   const [useSubtitleFlow, setUseSubtitleFlow] = useState(false);
+  const [liveSegments, setLiveSegments] = useState<TranscriptSegment[]>([]);
+  const [asrProgress, setAsrProgress] = useState<ASRProgress | null>(null);
   const [showDownloadModal, setShowDownloadModal] = useState(false);
   const [selectedQuality, setSelectedQuality] = useState<string | null>(null);
   const [downloadId, setDownloadId] = useState<string | null>(null);
@@ -207,10 +218,20 @@ export default function VideoNote() {
       ).then((res) => setPreview(res.data)).catch(() => {});
     }
     setLoading(true); setTask(null); setCurrentStep(''); setCompletedSteps([]); setUseSubtitleFlow(false);
+    setLiveSegments([]);
+    setAsrProgress(null);
     try {
       const res = await postFormData<{ task_id: string }>('/api/process-video', { url, summary_language: language });
       setTaskId(res.task_id);
       connect(`/api/task-stream/${res.task_id}`, {
+        onEvent: (event, data) => {
+          if (event === 'asr_progress') {
+            setAsrProgress(data as ASRProgress);
+            return;
+          }
+          if (event !== 'transcript_segment') return;
+          setLiveSegments((prev) => [...prev.slice(-(LIVE_SEGMENT_LIMIT - 1)), data as TranscriptSegment]);
+        },
         onMessage: (data) => {
           const t = data as TaskStatus;
           setTask(t);
@@ -533,6 +554,24 @@ export default function VideoNote() {
             <ProgressBar progress={task?.progress ?? 0} />
             <ProgressSteps currentStep={currentStep} completedSteps={completedSteps} steps={useSubtitleFlow ? SUBTITLE_STEPS : undefined} />
             {task?.message && <p className="text-xs text-[var(--color-text-secondary)]">{task.message}</p>}
+            {loading && currentStep === 'transcribe' && asrProgress && (
+              <p className="text-xs text-[var(--color-text-muted)]">
+                已转录 {formatSeconds(asrProgress.audio_seconds)} / {formatSeconds(asrProgress.duration)}
+                {asrProgress.rtf !== null && ` · 实时率 ${asrProgress.rtf.toFixed(2)}x`}
+                {asrProgress.eta_seconds !== null && ` · 预计剩余 ${formatSeconds(asrProgress.eta_seconds)}`}
+                {!!asrProgress.silence_removed_seconds && ` · 跳过静音 ${formatSeconds(asrProgress.silence_removed_seconds)}`}
+              </p>
+            )}
+            {loading && currentStep === 'transcribe' && liveSegments.length > 0 && (
+              <div className="max-h-32 overflow-y-auto rounded-lg bg-[var(--color-bg)] p-2 space-y-1">
+                {liveSegments.map((seg) => (
+                  <p key={seg.index} className="text-xs text-[var(--color-text-secondary)]">
+                    <span className="text-[var(--color-text-muted)] mr-1.5">{formatSeconds(seg.start)}</span>
+                    {seg.text}
+                  </p>
+                ))}
+              </div>
+            )}
           </div>
         )}
 
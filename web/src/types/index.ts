@@ -27,6 +27,29 @@ export interface TaskStatus {
   translation_filename?: string;
 }
 
+// Partial transcript segment pushed over the task stream while ASR is running
+export interface TranscriptSegment {
+  index: number;
+  start: number;
+  end: number;
+  text: string;
+}
+
+// SSE "asr_progress" event: throttled transcription telemetry
+export interface ASRProgress {
+  audio_seconds: number;
+  duration: number;
+  percent: number | null;
+  elapsed: number;
+  queued: boolean;
+  rtf: number | null;
+  segments: number;
+  segments_per_second: number;
+  eta_seconds: number | null;
+  // Seconds of silence / non-speech dropped before ASR (timestamps stay in media time)
+  silence_removed_seconds?: number;
+}
+
 export interface VideoInfo {
   title: string;
   duration: number;
@@ -170,6 +193,7 @@ export interface CompletedTask {
   url: string;
   source: string;
   batch_id: string;
+  snippet?: string;
 }
 
 export interface CompletedTasksResponse {
@@ -177,4 +201,6 @@ export interface CompletedTasksResponse {
   total: number;
   page: number;
   page_size: number;
+  // Keyset cursor for the next page (pass back as ?cursor=); null on the last page
+  next_cursor?: string | null;
 }